@@ -6,11 +6,13 @@ import time
 from dotenv import load_dotenv
 from datetime import datetime
 
-from config import APP_TITLE, APP_VERSION, MAX_INPUT_LENGTH
+from config import APP_TITLE, APP_VERSION, MAX_INPUT_LENGTH, WARM_START_ENABLED
 from pipeline import run_fact_checking_pipeline
 from core.metrics import metrics_collector
 from core.cache import query_cache
 from core.vector_db import vector_db
+from core.fact_filters import FactFilter
+from core.warm_start import warm_start
 
 # --- Logging Configuration ---
 logging.basicConfig(
@@ -55,6 +57,9 @@ def handle_wake_up():
         with st.spinner("Waking up the system... Loading database..."):
             try:
                 vector_db.load()
+                if WARM_START_ENABLED:
+                    # Restore cached verdicts/embeddings; models warm up in the background
+                    warm_start.start()
                 st.session_state.db_loaded = True
                 logger.info("Database loaded after wake-up")
                 st.success("System ready!")
@@ -80,6 +85,19 @@ with st.sidebar:
         "against a trusted fact database."
     )
     
+    st.subheader("Evidence filters")
+    filter_options = vector_db.filter_options()
+    selected_sources = st.multiselect("Sources", filter_options['sources'])
+    selected_categories = st.multiselect("Categories", filter_options['categories'])
+    published_within = st.selectbox(
+        "Published within",
+        [None, 7, 30, 90, 365],
+        format_func=lambda days: "Any time" if days is None else f"Last {days} days"
+    )
+    evidence_filters = FactFilter.create(
+        sources=selected_sources, categories=selected_categories, last_days=published_within
+    )
+    
 # --- Main UI ---
 st.title(f"{APP_TITLE}")
 st.markdown(
@@ -145,7 +163,7 @@ if verify_button:
                 progress_bar.progress(50)
                 
                 # Run pipeline
-                result = run_fact_checking_pipeline(input_text)
+                result = run_fact_checking_pipeline(input_text, filters=evidence_filters)
                 
                 status_text.text("Generating verdict...")
                 progress_bar.progress(80)
@@ -210,6 +228,8 @@ if verify_button:
                     st.write(f"- Evidence Retrieval: {perf['retrieval_time']}")
                     st.write(f"- LLM Verification: {perf['llm_time']}")
                     st.write(f"- **Total: {perf['total_time']}**")
+                    if result.get('degradations'):
+                        st.write(f"- Degraded to meet the deadline: {', '.join(result['degradations'])}")
                 
             except ValueError as e:
                 logger.error(f"Validation error: {e}")
@@ -0,0 +1,89 @@
+# bench/dedup_check.py
+"""
+Checks near-duplicate linking at ingest on a handful of fixture pairs.
+
+    python -m bench.dedup_check
+
+Builds a throwaway fact store and index over a few base facts, ingests
+rewordings and updated versions of them, and verifies that rewordings are
+linked to their base fact while statements whose numbers or dates changed
+("241 GW ... 2023" -> "250 GW ... 2024") stay separate, searchable facts.
+Exits non-zero on any mismatch.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+BASE_FACTS = [
+    "India's installed renewable energy capacity reached 241 GW by March 2023, according to the Ministry of New and Renewable Energy.",
+    "The Union Cabinet approved the PM Surya Ghar Muft Bijli Yojana with an outlay of Rs 75,021 crore for rooftop solar on 29 February 2024.",
+    "Chandrayaan-3 landed near the lunar south pole on 23 August 2023, making India the first country to land in that region.",
+]
+
+# (new statement, index of the base fact it duplicates or None)
+NEW_FACTS = [
+    ("India's installed renewable energy capacity reached 241 GW by March 2023, according to the Ministry of New & Renewable Energy.", 0),
+    ("India's installed renewable energy capacity reached 250 GW by March 2024, according to the Ministry of New and Renewable Energy.", None),
+    ("The Union Cabinet approved the PM Surya Ghar Muft Bijli Yojana with an outlay of Rs 75,021 crore for rooftop solar on 29 February 2024!", 1),
+    ("The Union Cabinet approved the PM Surya Ghar Muft Bijli Yojana with an outlay of Rs 78,000 crore for rooftop solar on 29 February 2024.", None),
+    ("Chandrayaan-3 landed near the lunar south pole on 23 August 2023, making India the first country to land in that region.", None),  # Exact copy: dropped by the store
+    ("Chandrayaan-3 landed near the lunar south pole on 24 August 2023, making India the first country to land in that region.", None),
+]
+
+
+def main():
+    workdir = Path(tempfile.mkdtemp(prefix="factcheck-dedup-"))
+    # Must be set before config is imported
+    os.environ["FACTS_DB_PATH"] = str(workdir / "facts.db")
+    os.environ["METRICS_PATH"] = str(workdir / "metrics.jsonl")
+    os.environ["CACHE_PATH"] = str(workdir / "query_cache.json")
+
+    import logging
+    logging.basicConfig(level=logging.WARNING)
+    from core.contradiction import contradiction_detector
+    from core.dedup import near_duplicate_detector
+    from core.fact_store import fact_store
+    from core.ingest import IngestPipeline
+    from core.verdict_index import verdict_index
+    from core.vector_db import vector_db
+
+    vector_db.index_path = workdir / "faiss_index.bin"
+    vector_db.bm25_path = workdir / "bm25_index.pkl"
+    near_duplicate_detector.path = workdir / "minhash_signatures.npy"
+    verdict_index.path = workdir / "verdict_index.npz"
+    contradiction_detector.path = workdir / "fact_features.npz"
+
+    base = fact_store.upsert([
+        {"statement": s, "source": "PIB India", "url": f"https://example.org/base/{i}", "date": "2024-03-01", "category": "government_announcement"}
+        for i, s in enumerate(BASE_FACTS)
+    ])
+    # The store imports trusted_facts.csv on first use; index everything it holds
+    existing = fact_store.all()
+    vector_db.build_and_save([r["statement"] for r in existing], metadata=existing)
+
+    records = [
+        {"statement": s, "source": "Factly", "url": f"https://example.org/new/{i}", "date": "2024-04-01", "category": "fact_check"}
+        for i, (s, _) in enumerate(NEW_FACTS)
+    ]
+    IngestPipeline(db=vector_db).ingest(records)
+
+    stored = {row["statement"]: row for row in fact_store.all()}
+    failures = 0
+    for statement, expected in NEW_FACTS:
+        row = stored[statement]
+        if row["fact_id"] <= base[-1]["fact_id"]:
+            got, want = "dropped", "dropped"
+        else:
+            got = row.get("canonical_id")
+            want = base[expected]["fact_id"] if expected is not None else None
+        ok = got == want
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} canonical={got!s:<8} expected={want!s:<8} {statement[:70]}")
+
+    print("OK" if not failures else f"FAILED ({failures})")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
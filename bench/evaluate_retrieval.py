@@ -0,0 +1,214 @@
+# bench/evaluate_retrieval.py
+"""
+Offline retrieval quality vs. speed evaluation over the built fact index.
+
+    python -m bench.evaluate_retrieval bench/data/labelled_claims.jsonl
+    python -m bench.evaluate_retrieval labels.csv --k 1,5,15 --label flat-l2 --output runs.jsonl
+
+Labelled files are JSONL ({"claim", "fact_ids", "verdict"}) or CSV with the
+same columns, where fact_ids is a ';'-separated list of fact ids from the
+fact store (the FAISS ids; row numbers of the original trusted_facts.csv).
+A JSONL record may also carry its own "evidence" statements, checked in
+place of the retrieved facts, for contradictions the index has no fact for.
+Each run prints recall@k for FAISS, BM25 and hybrid retrieval, MRR after the
+CrossEncoder and after the recency/source blend, the precision and recall of
+the contradiction detector on claims labelled False, verdict accuracy and the
+latency of every step; --output appends the run as one JSON line so
+configurations can be compared side by side.
+"""
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+from typing import List, Dict, Any, Callable
+
+
+def load_labels(path: str) -> List[Dict[str, Any]]:
+    """Read labelled claims from JSONL or CSV"""
+    labels = []
+    if path.endswith(".csv"):
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                ids = [int(i) for i in row.get("fact_ids", "").split(";") if i.strip()]
+                labels.append({"claim": row["claim"], "fact_ids": ids, "verdict": row.get("verdict", "")})
+    else:
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    record["fact_ids"] = [int(i) for i in record.get("fact_ids", [])]
+                    labels.append(record)
+    return labels
+
+
+def recall_at_k(retrieved: List[int], expected: List[int], k: int) -> float:
+    return len(set(retrieved[:k]) & set(expected)) / len(expected)
+
+
+def reciprocal_rank(ranked: List[int], expected: List[int]) -> float:
+    for rank, fact_id in enumerate(ranked, start=1):
+        if fact_id in expected:
+            return 1.0 / rank
+    return 0.0
+
+
+def timed(fn: Callable, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate retrieval quality against labelled claims")
+    parser.add_argument("labels", help="Labelled JSONL/CSV file")
+    parser.add_argument("--k", default="1,3,5,15", help="Comma-separated cut-offs for recall@k")
+    parser.add_argument("--llm-backend", help="Override LLM_BACKEND for verdict accuracy (e.g. stub)")
+    parser.add_argument("--no-verdicts", action="store_true", help="Skip verdict accuracy")
+    parser.add_argument("--label", default="default", help="Name of the retrieval config under test")
+    parser.add_argument("--output", help="Append the run summary as a JSON line to this file")
+    args = parser.parse_args()
+
+    # Must be set before config is imported. A fresh cache, so verdicts come
+    # from the backend under test rather than from earlier runs
+    if args.llm_backend:
+        os.environ["LLM_BACKEND"] = args.llm_backend
+    os.environ["CACHE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="factcheck-eval-"), "query_cache.json")
+
+    import numpy as np
+    from core.vector_db import vector_db
+    from core.re_ranker import re_ranker
+    from core.ranking import evidence_ranker
+    from core.llm_service import llm_service
+    from core.contradiction import contradiction_detector
+    from config import TOP_K_RETRIEVE, TOP_K_RERANK_RESULTS
+
+    cutoffs = [int(k) for k in args.k.split(",")]
+    max_k = max(max(cutoffs), TOP_K_RETRIEVE)
+    labels = load_labels(args.labels)
+    vector_db.load()
+
+    # Warm models so load time is not counted as latency
+    vector_db.search_ids(labels[0]["claim"], k=1)
+    re_ranker.rerank(labels[0]["claim"], vector_db.facts[:1], top_k=1)
+
+    recalls = {name: {k: [] for k in cutoffs} for name in ("faiss", "bm25", "hybrid")}
+    latencies = {name: [] for name in ("faiss", "bm25", "hybrid", "rerank", "rank", "contradiction", "llm")}
+    reciprocal_ranks = []
+    ranked_reciprocal_ranks = []
+    verdict_hits = []
+    contradictions = []  # (flagged, labelled False) per claim with a verdict label
+    false_flags = []  # Claims flagged as contradicted that are not labelled False
+
+    for record in labels:
+        claim, expected = record["claim"], record["fact_ids"]
+
+        faiss_ids, ms = timed(vector_db.faiss_search_ids, claim, max_k)
+        latencies["faiss"].append(ms)
+        bm25_ids, ms = timed(vector_db.bm25_search_ids, claim, max_k)
+        latencies["bm25"].append(ms)
+        hybrid_ids, ms = timed(vector_db.search_ids, claim, TOP_K_RETRIEVE)
+        latencies["hybrid"].append(ms)
+
+        # Claims with no supporting fact only count towards verdict accuracy
+        for k in cutoffs if expected else []:
+            recalls["faiss"][k].append(recall_at_k(faiss_ids, expected, k))
+            recalls["bm25"][k].append(recall_at_k(bm25_ids, expected, k))
+            recalls["hybrid"][k].append(recall_at_k(hybrid_ids, expected, k))
+
+        # MRR over the CrossEncoder ordering of the hybrid candidates
+        docs = [vector_db.facts[i] for i in hybrid_ids]
+        relevance, ms = timed(re_ranker.score, claim, docs)
+        latencies["rerank"].append(ms)
+        order = np.argsort(-relevance)
+        if expected:
+            reciprocal_ranks.append(reciprocal_rank([hybrid_ids[i] for i in order], expected))
+
+        # MRR once source weight and recency are blended in
+        blended, ms = timed(evidence_ranker.rank, vector_db.snapshot, hybrid_ids, relevance, len(hybrid_ids))
+        latencies["rank"].append(ms)
+        if expected:
+            ranked_reciprocal_ranks.append(reciprocal_rank([i for i, _ in blended], expected))
+
+        # Contradiction detector on the evidence the LLM would see, with index-time features
+        evidence_ids = [hybrid_ids[i] for i in order[:TOP_K_RERANK_RESULTS]]
+        evidence = [vector_db.facts[i] for i in evidence_ids]
+        if record.get("evidence"):
+            evidence, evidence_ids = record["evidence"], None
+        if record.get("verdict"):
+            found, ms = timed(contradiction_detector.check, claim, evidence, evidence_ids)
+            latencies["contradiction"].append(ms)
+            contradictions.append((found is not None, record["verdict"] == "False"))
+            if found is not None and record["verdict"] != "False":
+                false_flags.append({"claim": claim, "kind": found.kind})
+
+        if not args.no_verdicts and record.get("verdict"):
+            verdict, ms = timed(llm_service.get_verdict, claim, evidence, evidence_ids=evidence_ids)
+            latencies["llm"].append(ms)
+            verdict_hits.append(verdict.verdict == record["verdict"])
+
+    summary = {
+        "label": args.label,
+        "num_claims": len(labels),
+        "recall": {
+            name: {f"@{k}": round(float(np.mean(v)), 4) if v else 0.0 for k, v in by_k.items()}
+            for name, by_k in recalls.items()
+        },
+        "mrr_rerank": round(float(np.mean(reciprocal_ranks)), 4) if reciprocal_ranks else None,
+        "mrr_ranked": round(float(np.mean(ranked_reciprocal_ranks)), 4) if ranked_reciprocal_ranks else None,
+        "verdict_accuracy": round(float(np.mean(verdict_hits)), 4) if verdict_hits else None,
+        "contradiction": {
+            "flagged": sum(flagged for flagged, _ in contradictions),
+            "precision": round(float(np.mean([false for flagged, false in contradictions if flagged])), 4)
+            if any(flagged for flagged, _ in contradictions) else None,
+            "recall": round(float(np.mean([flagged for flagged, false in contradictions if false])), 4)
+            if any(false for _, false in contradictions) else None,
+            "false_flags": false_flags,
+        },
+        "latency_ms": {
+            name: {
+                "mean": round(float(np.mean(values)), 2),
+                "p95": round(float(np.percentile(values, 95)), 2),
+            }
+            for name, values in latencies.items() if values
+        },
+    }
+
+    # Quality next to latency for each retrieval step
+    print(f"\nRetrieval evaluation [{args.label}] over {len(labels)} claims")
+    print("-" * 72)
+    header = "".join(f"{'R@' + str(k):>9}" for k in cutoffs)
+    print(f"{'method':<10}{header}{'mean ms':>11}{'p95 ms':>10}")
+    for name in ("faiss", "bm25", "hybrid"):
+        row = "".join(f"{summary['recall'][name][f'@{k}']:>9.3f}" for k in cutoffs)
+        lat = summary["latency_ms"][name]
+        print(f"{name:<10}{row}{lat['mean']:>11.2f}{lat['p95']:>10.2f}")
+    print("-" * 72)
+    if summary["mrr_rerank"] is not None:
+        lat = summary["latency_ms"]["rerank"]
+        print(f"MRR after rerank:  {summary['mrr_rerank']:.3f}   ({lat['mean']:.2f} ms mean, {lat['p95']:.2f} ms p95)")
+        lat = summary["latency_ms"]["rank"]
+        print(f"MRR after ranking: {summary['mrr_ranked']:.3f}   ({lat['mean']:.2f} ms mean, {lat['p95']:.2f} ms p95)")
+    if contradictions:
+        stats = summary["contradiction"]
+        lat = summary["latency_ms"]["contradiction"]
+        fmt = lambda v: "n/a" if v is None else f"{v:.3f}"
+        print(
+            f"Contradictions:    {stats['flagged']} flagged, precision {fmt(stats['precision'])}, "
+            f"recall on False {fmt(stats['recall'])}   ({lat['mean']:.2f} ms mean, {lat['p95']:.2f} ms p95)"
+        )
+        for flag in stats["false_flags"]:
+            print(f"  flagged ({flag['kind']}) but not labelled False: {flag['claim'][:80]}")
+    if summary["verdict_accuracy"] is not None:
+        lat = summary["latency_ms"]["llm"]
+        print(f"Verdict accuracy:  {summary['verdict_accuracy']:.3f}   ({lat['mean']:.2f} ms mean, {lat['p95']:.2f} ms p95)")
+
+    if args.output:
+        with open(args.output, "a") as f:
+            f.write(json.dumps(summary) + "\n")
+        print(f"\nAppended run to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
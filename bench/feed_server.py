@@ -0,0 +1,133 @@
+# bench/feed_server.py
+"""
+Local stub server for the RSS fixtures in bench/fixtures/feeds, with
+ETag / Last-Modified support so conditional GETs can answer 304.
+
+    python -m bench.feed_server --port 8765          # serve until Ctrl+C
+    python -m bench.feed_server --check              # scrape the fixtures and verify
+
+--check runs DataScraper against the fixtures with a throwaway state file:
+a pass that is never committed must be fetched again in full, the first
+committed pass must return facts, the second must be all 304s with no facts,
+and a refetch without validators must skip every entry as already seen.
+"""
+import argparse
+import hashlib
+import sys
+import tempfile
+import threading
+from email.utils import formatdate
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures" / "feeds"
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    requests_seen = []
+
+    def do_GET(self):
+        path = FIXTURES_DIR / self.path.lstrip("/")
+        if not path.is_file() or path.parent != FIXTURES_DIR:
+            self.send_error(404)
+            return
+
+        body = path.read_bytes()
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        last_modified = formatdate(path.stat().st_mtime, usegmt=True)
+
+        not_modified = self.headers.get("If-None-Match") == etag or (
+            self.headers.get("If-None-Match") is None
+            and self.headers.get("If-Modified-Since") == last_modified
+        )
+        FeedHandler.requests_seen.append((self.path, 304 if not_modified else 200))
+
+        if not_modified:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/rss+xml")
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(port: int = 0) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", port), FeedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def check():
+    """Scrape the fixtures twice; the second pass must be served entirely from 304s"""
+    server = start_server()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    from core.data_scraper import DataScraper
+
+    scraper = DataScraper(sources={
+        "PIB India": f"{base}/pib.xml",
+        "Factly": f"{base}/factly.xml",
+    })
+    scraper.state_path = Path(tempfile.mkdtemp()) / "scrape_state.json"
+    scraper.state = {}
+
+    # A pass whose facts never get stored must not mark them seen
+    retried = scraper.scrape_all_sources()
+    first = scraper.scrape_all_sources()
+    scraper.commit_state()
+    second = scraper.scrape_all_sources()
+    scraper.commit_state()
+    conditional_statuses = [status for _, status in FeedHandler.requests_seen[-len(scraper.sources):]]
+
+    # Forget the validators: feeds are downloaded again, but every entry is already seen
+    for source_state in scraper.state.values():
+        source_state.pop("etag", None)
+        source_state.pop("last_modified", None)
+    third = scraper.scrape_all_sources()
+    scraper.commit_state()
+    server.shutdown()
+
+    print(f"Uncommitted pass: {len(retried)} facts, then {len(first)} on retry")
+    print(f"First pass:  {len(first)} facts")
+    print(f"Second pass: {len(second)} facts, responses {conditional_statuses}")
+    print(f"Third pass:  {len(third)} facts after refetch without validators")
+
+    ok = (
+        len(first) > 0
+        and len(retried) == len(first)
+        and len(second) == 0
+        and conditional_statuses == [304] * len(scraper.sources)
+        and len(third) == 0
+    )
+    print("OK" if ok else "FAILED")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve RSS fixtures with conditional GET support")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--check", action="store_true", help="Run the scraper against the fixtures and verify")
+    args = parser.parse_args()
+
+    if args.check:
+        sys.exit(0 if check() else 1)
+
+    server = start_server(args.port)
+    print(f"Serving {FIXTURES_DIR} on http://127.0.0.1:{args.port}/ (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
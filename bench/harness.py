@@ -0,0 +1,118 @@
+# bench/harness.py
+import json
+import resource
+import sys
+import threading
+import time
+from typing import Callable, Dict, Any, Iterable, List, Optional, Tuple
+import numpy as np
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def current_rss_mb() -> float:
+    """Resident set size right now, in MB (falls back to the peak off Linux)"""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * resource.getpagesize() / (1024 * 1024)
+    except (FileNotFoundError, IndexError, ValueError):
+        return peak_rss_mb()
+
+
+class RssSampler:
+    """
+    Samples current RSS on a background thread while a stage runs, so each
+    stage reports its own peak rather than the process peak so far.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.start_mb = 0.0
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+    def __enter__(self):
+        self.start_mb = self.peak_mb = current_rss_mb()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+
+def summarize(latencies: List[float], wall_time: float, rss: Optional[Tuple[float, float]] = None) -> Dict[str, Any]:
+    """
+    Latency percentiles (ms), throughput and memory for one stage.
+    rss is (RSS at stage start, peak RSS sampled during the stage) in MB;
+    process_peak_rss_mb is the peak of the whole process so far.
+    """
+    if not latencies:
+        return {"count": 0}
+    ms = np.asarray(latencies) * 1000
+    return {
+        "count": len(latencies),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+        "max_ms": round(float(ms.max()), 3),
+        "throughput_per_s": round(len(latencies) / wall_time, 2) if wall_time > 0 else None,
+        **({
+            "rss_start_mb": round(rss[0], 1),
+            "stage_peak_rss_mb": round(rss[1], 1),
+        } if rss else {}),
+        "process_peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def time_stage(fn: Callable[[Any], Any], inputs: Iterable[Any]) -> Dict[str, Any]:
+    """Call fn once per input and summarize the per-call latencies"""
+    latencies = []
+    with RssSampler() as rss:
+        wall_start = time.perf_counter()
+        for item in inputs:
+            start = time.perf_counter()
+            fn(item)
+            latencies.append(time.perf_counter() - start)
+        wall_time = time.perf_counter() - wall_start
+    return summarize(latencies, wall_time, (rss.start_mb, rss.peak_mb))
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any], max_regression: float) -> List[str]:
+    """
+    Compare p95/p99 of every stage present in both reports.
+    Returns: human readable descriptions of regressions beyond max_regression
+    """
+    failures = []
+    for stage, stats in current.get("stages", {}).items():
+        base = baseline.get("stages", {}).get(stage)
+        if not base:
+            continue
+        for key in ("p95_ms", "p99_ms"):
+            if base.get(key) and stats.get(key) and stats[key] > base[key] * (1 + max_regression):
+                failures.append(
+                    f"{stage} {key}: {stats[key]:.2f}ms vs baseline {base[key]:.2f}ms "
+                    f"(+{stats[key] / base[key] - 1:.0%})"
+                )
+    return failures
+
+
+def write_report(report: Dict[str, Any], path: str = None):
+    text = json.dumps(report, indent=2)
+    if path:
+        with open(path, "w") as f:
+            f.write(text + "\n")
+    print(text)
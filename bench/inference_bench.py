@@ -0,0 +1,170 @@
+# bench/inference_bench.py
+"""
+Model throughput with inline models vs the batching model server.
+
+    python -m bench.inference_bench --concurrency 1,4,16 --seconds 10
+    python -m bench.inference_bench --server-workers 2 --ops embed,score
+
+Each simulated request runs the model stages of the pipeline (claim
+extraction, query embedding, CrossEncoder scoring of --candidates facts)
+from one of --concurrency threads, like concurrent API requests. Inline,
+the threads share in-process models; in server mode the same calls go
+through core.inference to a spawned `python -m core.inference_server`.
+"""
+import argparse
+import os
+import secrets
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+
+OPS = ["extract", "embed", "score"]
+
+
+def run_load(ops: List[str], claims: List[str], docs: List[str], concurrency: int, seconds: float) -> Dict[str, Any]:
+    from bench.harness import summarize
+    from core.claim_extractor import claim_extractor
+    from core.re_ranker import re_ranker
+    from core.vector_db import vector_db
+
+    latencies: List[float] = []
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + seconds
+
+    def client(offset: int):
+        i = offset
+        while time.perf_counter() < stop_at:
+            claim = claims[i % len(claims)]
+            start = time.perf_counter()
+            if "extract" in ops:
+                claim = claim_extractor.extract(claim)
+            if "embed" in ops:
+                vector_db.encode_facts([claim])
+            if "score" in ops:
+                re_ranker.score(claim, docs)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+            i += concurrency
+
+    wall_start = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return {"concurrency": concurrency, **summarize(latencies, time.perf_counter() - wall_start)}
+
+
+def warm(ops: List[str], claims: List[str], docs: List[str]):
+    """Load the in-process models so loading is not measured"""
+    from core.claim_extractor import claim_extractor
+    from core.re_ranker import re_ranker
+    from core.vector_db import vector_db
+    if "extract" in ops:
+        claim_extractor._initialize_model()
+    if "embed" in ops:
+        vector_db.encode_facts(claims[:1])
+    if "score" in ops:
+        re_ranker.score(claims[0], docs)
+
+
+def server_stats() -> List[Dict[str, Any]]:
+    """Batching counters from every server process"""
+    from core.inference import inference_client
+    stats = []
+    for _ in inference_client.addresses:
+        stats.append(inference_client.stats())
+        inference_client._drop()  # Next call connects to the next process
+    return stats
+
+
+def set_remote(remote: bool):
+    from core.claim_extractor import claim_extractor
+    from core.re_ranker import re_ranker
+    from core.vector_db import vector_db
+    claim_extractor.remote = re_ranker.remote = vector_db.remote = remote
+
+
+def start_server(workers: int, threads: int) -> subprocess.Popen:
+    cmd = [sys.executable, "-m", "core.inference_server", "--workers", str(workers)]
+    if threads:
+        cmd += ["--threads", str(threads)]
+    proc = subprocess.Popen(cmd, env=os.environ.copy())
+
+    # Wait until every server process has loaded its models and accepts connections
+    deadline = time.time() + 300
+    while True:
+        try:
+            server_stats()
+            return proc
+        except (ConnectionError, OSError):
+            if proc.poll() is not None or time.time() > deadline:
+                proc.kill()
+                raise RuntimeError("Inference server did not start")
+            time.sleep(0.5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark inline models vs the inference server")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrent callers")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Load time per run")
+    parser.add_argument("--ops", default=",".join(OPS), help="Model stages per request")
+    parser.add_argument("--claims", type=int, default=200)
+    parser.add_argument("--candidates", type=int, default=20, help="Facts scored per request")
+    parser.add_argument("--server-workers", type=int, default=1)
+    parser.add_argument("--server-threads", type=int, default=0, help="Torch threads per server process")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    # Must be set before config is imported
+    workdir = Path(tempfile.mkdtemp(prefix="factcheck-inference-"))
+    os.environ["INFERENCE_SOCKET_PATH"] = str(workdir / "inference.sock")
+    os.environ["INFERENCE_WORKERS"] = str(args.server_workers)
+    os.environ["INFERENCE_AUTHKEY"] = secrets.token_hex(32)  # Shared with the server subprocess
+
+    from bench.harness import write_report
+    from bench.workloads import generate_facts, generate_claims
+
+    ops = [op.strip() for op in args.ops.split(",") if op.strip()]
+    levels = [int(c) for c in args.concurrency.split(",")]
+    facts = generate_facts(max(args.candidates, 1000), seed=args.seed)
+    claims = generate_claims(facts, args.claims, repeat_rate=0.0, seed=args.seed + 1)
+    docs = facts[:args.candidates]
+
+    report = {
+        "config": {
+            "ops": ops,
+            "candidates": args.candidates,
+            "seconds": args.seconds,
+            "server_workers": args.server_workers,
+            "cpus": os.cpu_count(),
+        },
+        "inline": [],
+        "server": [],
+    }
+
+    set_remote(False)
+    warm(ops, claims, docs)
+    for level in levels:
+        report["inline"].append(run_load(ops, claims, docs, level, args.seconds))
+
+    set_remote(True)
+    server = start_server(args.server_workers, args.server_threads)
+    try:
+        for level in levels:
+            report["server"].append(run_load(ops, claims, docs, level, args.seconds))
+        report["server_batches"] = server_stats()
+    finally:
+        server.terminate()
+        server.wait()
+
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# bench/multiworker_bench.py
+"""
+Memory and throughput of N search workers, private index copies vs one
+shared read-only bundle.
+
+    python -m bench.multiworker_bench --facts 200000 --workers 1,2,4,8 --seconds 10
+
+Each worker is a fresh process (like a uvicorn/gunicorn worker) that loads
+the index, then runs hybrid searches for a fixed time. Query embeddings are
+computed once up front and the embedding model is not loaded in workers, so
+the memory numbers reflect the index alone. Reported per worker count:
+total PSS (shared pages split between their users), private MB per worker
+(what each extra worker really costs) and aggregate searches per second.
+"""
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+
+
+def memory_mb() -> Dict[str, float]:
+    """Rss/Pss/private memory of this process from /proc/self/smaps_rollup (Linux)"""
+    fields = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1]) / 1024
+    except FileNotFoundError:
+        from bench.harness import peak_rss_mb
+        return {"rss_mb": round(peak_rss_mb(), 1)}
+    return {
+        "rss_mb": round(fields.get("Rss", 0), 1),
+        "pss_mb": round(fields.get("Pss", 0), 1),
+        "private_mb": round(fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0), 1),
+    }
+
+
+def worker(mode: str, workdir: str, claims: List[str], seconds: float, barrier, results):
+    # Must be set before config is imported
+    os.environ["INDEX_SERVING_MODE"] = mode
+    os.environ["FACTS_DB_PATH"] = str(Path(workdir) / "facts.db")
+    os.environ["SHARED_INDEX_DIR"] = str(Path(workdir) / "shared")
+
+    import numpy as np
+    from core.vector_db import vector_db
+
+    vector_db.index_path = Path(workdir) / "faiss_index.bin"
+    vector_db.bm25_path = Path(workdir) / "bm25_index.pkl"
+    # Models are per-process in both modes; keep them out so RSS reflects the index
+    vector_db._initialize_model = lambda: None
+    embeddings = np.load(Path(workdir) / "query_embeddings.npy")
+
+    load_start = time.perf_counter()
+    snapshot = vector_db.snapshot
+    load_seconds = time.perf_counter() - load_start
+
+    barrier.wait()
+    searches = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        i = searches % len(claims)
+        vector_db.search_ids(claims[i], snapshot=snapshot, query_embedding=embeddings[i])
+        searches += 1
+    elapsed = time.perf_counter() - start
+
+    results.put({
+        "load_seconds": round(load_seconds, 3),
+        "searches_per_s": searches / elapsed,
+        **memory_mb(),
+    })
+
+
+def run(mode: str, workers: int, workdir: Path, claims: List[str], seconds: float) -> Dict[str, Any]:
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(target=worker, args=(mode, str(workdir), claims, seconds, barrier, results))
+        for _ in range(workers)
+    ]
+    for p in procs:
+        p.start()
+    stats = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+
+    summary = {
+        "workers": workers,
+        "searches_per_s": round(sum(s["searches_per_s"] for s in stats), 1),
+        "load_seconds_max": max(s["load_seconds"] for s in stats),
+        "rss_mb_per_worker": round(sum(s["rss_mb"] for s in stats) / workers, 1),
+    }
+    if "pss_mb" in stats[0]:
+        summary["total_pss_mb"] = round(sum(s["pss_mb"] for s in stats), 1)
+        summary["private_mb_per_worker"] = round(sum(s["private_mb"] for s in stats) / workers, 1)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark private vs shared index serving across workers")
+    parser.add_argument("--facts", type=int, default=100_000, help="Synthetic corpus size")
+    parser.add_argument("--claims", type=int, default=200, help="Distinct queries cycled by each worker")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts")
+    parser.add_argument("--modes", default="private,shared")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Search time per run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="factcheck-workers-"))
+    os.environ["FACTS_DB_PATH"] = str(workdir / "facts.db")
+    os.environ["SHARED_INDEX_DIR"] = str(workdir / "shared")
+    os.environ["INDEX_SERVING_MODE"] = "private"
+
+    import numpy as np
+    from bench.harness import write_report
+    from bench.workloads import generate_facts, generate_claims
+    from core.fact_store import fact_store
+    from core.shared_index import export_bundle
+    from core.vector_db import vector_db
+    from config import SHARED_INDEX_DIR
+
+    # The private loader reads facts from the store, so build through it
+    fact_store.upsert([{"statement": f} for f in generate_facts(args.facts, seed=args.seed)])
+    rows = fact_store.all()
+    facts = [row["statement"] for row in rows]
+    vector_db.index_path = workdir / "faiss_index.bin"
+    vector_db.bm25_path = workdir / "bm25_index.pkl"
+    vector_db.build_and_save(facts, metadata=rows)
+    export_bundle(vector_db.snapshot, SHARED_INDEX_DIR)
+
+    claims = generate_claims(facts, args.claims, repeat_rate=0.0, seed=args.seed + 1)
+    np.save(workdir / "query_embeddings.npy", vector_db.encode_facts(claims))
+
+    report = {
+        "config": {"facts": len(facts), "seconds": args.seconds, "cpus": os.cpu_count()},
+        "modes": {},
+    }
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        runs = [run(mode, int(n), workdir, claims, args.seconds) for n in args.workers.split(",")]
+        report["modes"][mode] = {"runs": runs}
+        if len(runs) > 1 and "total_pss_mb" in runs[0]:
+            extra = runs[-1]["workers"] - runs[0]["workers"]
+            report["modes"][mode]["mb_per_extra_worker"] = round(
+                (runs[-1]["total_pss_mb"] - runs[0]["total_pss_mb"]) / extra, 1
+            )
+        print(f"{mode}: {runs}", file=sys.stderr)
+
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# bench/run_bench.py
+"""
+End-to-end benchmark of the fact-checking pipeline on synthetic data.
+
+    python -m bench.run_bench --facts 10000 --claims 500 --repeat-rate 0.3 --output bench.json
+    python -m bench.run_bench --baseline bench.json --max-regression 0.2
+
+The LLM is replaced by the in-process stub backend and metrics/cache files
+are redirected to a temporary directory, so nothing in data/ is touched.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+STAGES = ["vector_db", "reranker", "claim_extractor", "pipeline"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the fact-checking pipeline")
+    parser.add_argument("--facts", type=int, default=10_000, help="Synthetic corpus size (1k-1M)")
+    parser.add_argument("--claims", type=int, default=500, help="Number of claims in the workload")
+    parser.add_argument("--repeat-rate", type=float, default=0.2, help="Fraction of repeated claims")
+    parser.add_argument("--stages", default=",".join(STAGES), help="Comma-separated stages to run")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Simulated stub LLM latency")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--baseline", help="Fail if p95/p99 regress against this report")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    workdir = Path(tempfile.mkdtemp(prefix="factcheck-bench-"))
+
+    # Must be set before config is imported
+    os.environ["LLM_BACKEND"] = "stub"
+    os.environ["STUB_LLM_LATENCY_MS"] = str(args.llm_latency_ms)
+    os.environ["METRICS_PATH"] = str(workdir / "metrics.jsonl")
+    os.environ["CACHE_PATH"] = str(workdir / "query_cache.json")
+
+    from bench.harness import time_stage, RssSampler, compare_reports, write_report
+    from bench.workloads import generate_facts, generate_claims
+    from core.vector_db import vector_db
+    from core.re_ranker import re_ranker
+    from core.claim_extractor import claim_extractor
+    from pipeline import run_fact_checking_pipeline
+    from config import TOP_K_RETRIEVE, TOP_K_RERANK_RESULTS
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    facts = generate_facts(args.facts, seed=args.seed)
+    claims = generate_claims(facts, args.claims, repeat_rate=args.repeat_rate, seed=args.seed + 1)
+
+    report = {
+        "config": {
+            "facts": args.facts,
+            "claims": args.claims,
+            "repeat_rate": args.repeat_rate,
+            "llm_latency_ms": args.llm_latency_ms,
+            "seed": args.seed,
+        },
+        "build": {},
+        "stages": {},
+    }
+
+    # Build an index over the synthetic corpus in the temporary directory
+    vector_db.index_path = workdir / "faiss_index.bin"
+    vector_db.bm25_path = workdir / "bm25_index.pkl"
+    with RssSampler() as rss:
+        build_start = time.perf_counter()
+        vector_db.build_and_save(facts)
+        build_seconds = time.perf_counter() - build_start
+    report["build"] = {
+        "seconds": round(build_seconds, 2),
+        "stage_peak_rss_mb": round(rss.peak_mb, 1),
+    }
+
+    # Warm models so load time is not counted as request latency
+    vector_db.search(claims[0], k=TOP_K_RETRIEVE)
+    re_ranker.rerank(claims[0], facts[:2], top_k=1)
+    claim_extractor.extract(claims[0])
+
+    if "vector_db" in stages:
+        report["stages"]["vector_db.search"] = time_stage(
+            lambda c: vector_db.search(c, k=TOP_K_RETRIEVE), claims
+        )
+
+    if "reranker" in stages:
+        candidates = [(c, vector_db.search(c, k=TOP_K_RETRIEVE)) for c in claims]
+        report["stages"]["reranker.rerank"] = time_stage(
+            lambda pair: re_ranker.rerank(pair[0], pair[1], top_k=TOP_K_RERANK_RESULTS), candidates
+        )
+
+    if "claim_extractor" in stages:
+        report["stages"]["claim_extractor.extract"] = time_stage(claim_extractor.extract, claims)
+
+    if "pipeline" in stages:
+        report["stages"]["pipeline.total"] = time_stage(run_fact_checking_pipeline, claims)
+
+    write_report(report, args.output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        failures = compare_reports(baseline, report, args.max_regression)
+        if failures:
+            print("\nRegressions beyond threshold:", file=sys.stderr)
+            for failure in failures:
+                print(f"  - {failure}", file=sys.stderr)
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.max_regression:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
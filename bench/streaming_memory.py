@@ -0,0 +1,154 @@
+# bench/streaming_memory.py
+"""
+Checks that streaming a claim file runs in constant memory.
+
+    python -m bench.streaming_memory --claims 200000 --workers 8 --max-growth-mb 50
+
+Writes a large synthetic JSONL input (with a blank and a malformed line
+every --bad-every rows), streams it through core.streaming (read_claims ->
+check_stream -> output file) with the stub LLM, and checkpoints progress
+with the CLI's Checkpoint as cli.py does, sampling RSS as it goes. Once the
+window, the caches and the metrics ring buffer have filled (after --warmup
+of the input), RSS must stay flat. The run exits non-zero when it grows
+more than --max-growth-mb after that, when the checkpoint's sparse done
+set grows past --max-done-set (a row that is never marked makes it grow
+with every row after it), or when the watermark does not reach the last row.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+def write_input(path: Path, claims: int, facts, seed: int, bad_every: int, chunk: int = 10_000) -> int:
+    """
+    Generate the input chunk by chunk so the generator itself stays small.
+    Returns: rows written, blank and malformed lines included
+    """
+    from bench.workloads import generate_claims
+    rows = 0
+    with open(path, "w") as f:
+        for start in range(0, claims, chunk):
+            batch = generate_claims(facts, min(chunk, claims - start), repeat_rate=0.2, seed=seed + start)
+            for offset, claim in enumerate(batch):
+                f.write(json.dumps({"id": f"c{start + offset}", "claim": claim}) + "\n")
+                rows += 1
+                if bad_every and (start + offset + 1) % bad_every == 0:
+                    f.write("\n{\"id\": \"broken\n")
+                    rows += 2
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify constant-memory streaming over a large input")
+    parser.add_argument("--claims", type=int, default=100_000, help="Rows in the synthetic input")
+    parser.add_argument("--facts", type=int, default=5_000, help="Synthetic corpus size")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--warmup", type=float, default=0.2, help="Fraction of the input before the baseline sample")
+    parser.add_argument("--samples", type=int, default=20, help="RSS samples over the run")
+    parser.add_argument("--max-growth-mb", type=float, default=50.0)
+    parser.add_argument("--bad-every", type=int, default=1000, help="Add a blank and a malformed line every N claims (0: none)")
+    parser.add_argument("--checkpoint-every", type=int, default=1000, help="Results between checkpoint saves")
+    parser.add_argument("--max-done-set", type=int, help="Limit on rows done above the watermark (default: 10x the window)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="factcheck-stream-"))
+    # Must be set before config is imported
+    os.environ["LLM_BACKEND"] = "stub"
+    os.environ["METRICS_PATH"] = str(workdir / "metrics.jsonl")
+    os.environ["CACHE_PATH"] = str(workdir / "query_cache.json")
+    os.environ["FACTS_DB_PATH"] = str(workdir / "facts.db")
+
+    import logging
+    logging.basicConfig(level=logging.WARNING)
+    from bench.harness import current_rss_mb, peak_rss_mb, write_report
+    from bench.workloads import generate_facts
+    from cli import Checkpoint
+    from config import BULK_STREAM_WINDOW_PER_WORKER
+    from core.streaming import read_claims, check_stream
+    from core.vector_db import vector_db
+
+    facts = generate_facts(args.facts, seed=args.seed)
+    vector_db.index_path = workdir / "faiss_index.bin"
+    vector_db.bm25_path = workdir / "bm25_index.pkl"
+    vector_db.build_and_save(facts)
+
+    input_path = workdir / "claims.jsonl"
+    rows = write_input(input_path, args.claims, facts, args.seed + 1, args.bad_every)
+    del facts
+
+    output_path = workdir / "verdicts.jsonl"
+    checkpoint = Checkpoint(output_path.with_name(output_path.name + ".ckpt"), input_path)
+    # Rows finish out of order, so the done set follows the window, not the input size
+    max_done_set_limit = args.max_done_set or 10 * args.workers * BULK_STREAM_WINDOW_PER_WORKER
+    warmup_at = int(rows * args.warmup)
+    every = max(rows // args.samples, 1)
+    samples = []
+    baseline = None
+    completed = 0
+    max_done_set = 0
+    started = time.perf_counter()
+
+    with open(output_path, "w") as out:
+        for result in check_stream(read_claims(input_path), workers=args.workers):
+            out.write(json.dumps(result) + "\n")
+            checkpoint.mark(result["index"], error="error" in result)
+            max_done_set = max(max_done_set, len(checkpoint.done))
+            completed += 1
+            if completed % args.checkpoint_every == 0:
+                checkpoint.save(out.tell())
+            if completed == warmup_at:
+                baseline = current_rss_mb()
+            if completed % every == 0:
+                samples.append({
+                    "completed": completed,
+                    "rss_mb": round(current_rss_mb(), 1),
+                    "done_set": len(checkpoint.done),
+                    "checkpoint_bytes": checkpoint.path.stat().st_size if checkpoint.path.exists() else 0,
+                })
+                print(f"{completed}/{rows}: {samples[-1]['rss_mb']} MB, done set {len(checkpoint.done)}", file=sys.stderr)
+        checkpoint.save(out.tell())
+
+    elapsed = time.perf_counter() - started
+    baseline = baseline or samples[0]["rss_mb"]
+    after = [s["rss_mb"] for s in samples if s["completed"] >= warmup_at]
+    growth = max(after) - baseline if after else 0.0
+
+    report = {
+        "config": {"claims": args.claims, "rows": rows, "workers": args.workers, "warmup": args.warmup},
+        "claims_per_s": round(completed / elapsed, 1),
+        "baseline_rss_mb": round(baseline, 1),
+        "growth_after_warmup_mb": round(growth, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "checkpoint": {
+            "watermark": checkpoint.watermark,
+            "errors": checkpoint.errors,
+            "max_done_set": max_done_set,
+            "max_done_set_limit": max_done_set_limit,
+        },
+        "samples": samples,
+    }
+    write_report(report, args.output)
+
+    if completed != rows:
+        print(f"FAIL: {completed} results for {rows} rows", file=sys.stderr)
+        sys.exit(1)
+    if checkpoint.watermark != rows or checkpoint.done:
+        print(f"FAIL: checkpoint watermark {checkpoint.watermark} of {rows} rows, {len(checkpoint.done)} rows above it", file=sys.stderr)
+        sys.exit(1)
+    if max_done_set > max_done_set_limit:
+        print(f"FAIL: checkpoint done set reached {max_done_set} rows (limit {max_done_set_limit})", file=sys.stderr)
+        sys.exit(1)
+    if growth > args.max_growth_mb:
+        print(f"FAIL: RSS grew {growth:.1f} MB after warmup (limit {args.max_growth_mb} MB)", file=sys.stderr)
+        sys.exit(1)
+    print(f"OK: RSS grew {growth:.1f} MB after warmup, checkpoint done set peaked at {max_done_set} rows", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
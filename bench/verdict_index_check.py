@@ -0,0 +1,69 @@
+# bench/verdict_index_check.py
+"""
+Checks which restatements the precomputed verdict index accepts.
+
+    python -m bench.verdict_index_check
+
+Keys a few fixture facts into a throwaway VerdictIndex and looks up
+restatements that must resolve to their fact (case, punctuation, articles)
+and near-restatements that must not: swapped agent and recipient, a
+changed number or currency, an added negation. A false match here would be certified
+"True" before retrieval or the LLM run. Exits non-zero on any mismatch.
+"""
+import sys
+import tempfile
+from pathlib import Path
+
+FACTS = [
+    "The loan was given by India to Sri Lanka in 2022.",
+    "ISRO launched Chandrayaan-3 from Sriharikota on 14 July 2023.",
+    "The Union Cabinet approved an outlay of Rs 75,021 crore for the PM Surya Ghar scheme.",
+    "The government allocated ₹5 billion for the semiconductor mission.",
+]
+
+# (claim, index of the fact it restates or None)
+CLAIMS = [
+    ("The loan was given by India to Sri Lanka in 2022.", 0),
+    ("the loan was given by india to sri lanka in 2022", 0),
+    ("A loan was given by India to Sri Lanka in 2022", 0),
+    ("The loan was given to India by Sri Lanka in 2022.", None),
+    ("The loan was given by Sri Lanka to India in 2022.", None),
+    ("The loan was given by India to Sri Lanka in 2021.", None),
+    ("ISRO launched Chandrayaan-3 from Sriharikota on 14 July 2023", 1),
+    ("ISRO did not launch Chandrayaan-3 from Sriharikota on 14 July 2023.", None),
+    ("The Union Cabinet approved outlay of Rs 75021 crore for PM Surya Ghar scheme", 2),
+    ("The Union Cabinet approved an outlay of Rs 75,021 crore for the PM Surya Ghar scheme with states.", None),
+    ("The government allocated Rs. 5 billion for the semiconductor mission", 3),
+    ("The government allocated $5 billion for the semiconductor mission.", None),
+    ("Government allocated USD 5 billion for the semiconductor mission", None),
+]
+
+
+def main():
+    from core.fact_filters import FilterIndex
+    from core.vector_db import IndexSnapshot
+    from core.verdict_index import VerdictIndex
+
+    index = VerdictIndex()
+    index.path = Path(tempfile.mkdtemp(prefix="factcheck-verdicts-")) / "verdict_index.npz"
+    snapshot = IndexSnapshot(
+        index=None, bm25=None, facts=FACTS, metadata=None,
+        filter_index=FilterIndex.from_metadata(None, len(FACTS))
+    )
+    index.sync(FACTS, snapshot.filter_index.searchable, rebuild=True)
+
+    failures = 0
+    for claim, expected in CLAIMS:
+        match = index.lookup(claim, snapshot)
+        got = match.fact_id if match else None
+        ok = got == expected
+        failures += not ok
+        kind = match.kind if match else "-"
+        print(f"{'ok  ' if ok else 'FAIL'} match={got!s:<5} expected={expected!s:<5} {kind:<9} {claim[:70]}")
+
+    print("OK" if not failures else f"FAILED ({failures})")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
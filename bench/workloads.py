@@ -0,0 +1,74 @@
+# bench/workloads.py
+import random
+from typing import List, Dict
+
+ORGS = [
+    "PIB", "NITI Aayog", "ISRO", "RBI", "IREDA", "NHAI", "Indian Railways",
+    "Ministry of Power", "Ministry of Health", "SEBI", "NTPC", "DRDO"
+]
+STATES = [
+    "Gujarat", "Kerala", "Punjab", "Assam", "Bihar", "Odisha", "Maharashtra",
+    "Karnataka", "Rajasthan", "Tamil Nadu", "Uttar Pradesh", "West Bengal"
+]
+THINGS = [
+    "solar capacity", "road construction", "vaccine doses", "rural housing units",
+    "railway electrification", "crop insurance payouts", "startup registrations",
+    "peak power demand", "foodgrain procurement", "broadband connections"
+]
+UNITS = ["GW", "km", "crore", "lakh", "MW", "tonnes", "per cent"]
+VERBS = ["reported", "announced", "recorded", "achieved", "sanctioned", "completed"]
+TEMPLATES = [
+    "{org} {verb} {num} {unit} of {thing} in {state} during {year}",
+    "{state} {verb} {num} {unit} of {thing} in {year}, according to {org}",
+    "In {year}, {org} {verb} {thing} of {num} {unit} across {state}",
+]
+FILLERS = ["I read that ", "Someone told me ", "Apparently ", "Breaking: ", ""]
+
+
+def _fields(rng: random.Random) -> Dict[str, str]:
+    return {
+        "org": rng.choice(ORGS),
+        "verb": rng.choice(VERBS),
+        "num": str(rng.randint(2, 999)),
+        "unit": rng.choice(UNITS),
+        "thing": rng.choice(THINGS),
+        "state": rng.choice(STATES),
+        "year": str(rng.randint(2015, 2025)),
+    }
+
+
+def generate_facts(n: int, seed: int = 0) -> List[str]:
+    """Generate n synthetic fact statements shaped like scraped press releases"""
+    rng = random.Random(seed)
+    return [rng.choice(TEMPLATES).format(**_fields(rng)) for _ in range(n)]
+
+
+def generate_claims(facts: List[str], n: int, repeat_rate: float = 0.2, seed: int = 1) -> List[str]:
+    """
+    Generate n claims over a fact corpus. With probability repeat_rate a claim
+    repeats one already issued (exercising caches); otherwise it restates a
+    fact, alters one of its numbers, or is unrelated to the corpus.
+    """
+    rng = random.Random(seed)
+    claims: List[str] = []
+
+    for _ in range(n):
+        if claims and rng.random() < repeat_rate:
+            claims.append(rng.choice(claims))
+            continue
+
+        kind = rng.random()
+        if kind < 0.4:
+            claim = rng.choice(FILLERS) + rng.choice(facts)
+        elif kind < 0.8:
+            words = rng.choice(facts).split()
+            digits = [i for i, w in enumerate(words) if w.isdigit()]
+            if digits:
+                i = rng.choice(digits)
+                words[i] = str(int(words[i]) + rng.randint(1, 50))
+            claim = " ".join(words)
+        else:
+            claim = rng.choice(TEMPLATES).format(**_fields(rng))
+        claims.append(claim)
+
+    return claims
@@ -1,8 +1,10 @@
 # build_database.py
-import pandas as pd
 from core.vector_db import vector_db
 from core.data_scraper import data_scraper
-from config import FACTS_CSV_PATH, SCRAPE_ENABLED
+from core.fact_store import fact_store
+from core.verdict_index import verdict_index
+from core.contradiction import contradiction_detector
+from config import SCRAPE_ENABLED, EXPORT_SHARED_INDEX, SHARED_INDEX_DIR, VERDICT_INDEX_ENABLED
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -19,42 +21,57 @@ def main():
     try:
         # Step 1: Check if we should scrape new data
         if SCRAPE_ENABLED:
-            print("\n[1/3] Scraping fresh data from sources...")
+            print("\n[1/4] Scraping fresh data from sources...")
             fresh_df = data_scraper.scrape_all_sources()
             
-            # Persist and merge with existing data
-            facts_df = data_scraper.upsert_to_csv(fresh_df)
-            print(f"[OK] Added {len(facts_df)} total facts to storage")
+            # Only new rows are written; the store dedupes on statement hash and URL
+            new_facts = data_scraper.upsert_facts(fresh_df)
+            print(f"[OK] Added {len(new_facts)} new facts to storage")
         else:
-            print("\n[1/3] Loading existing data from CSV...")
-            if not FACTS_CSV_PATH.exists():
-                print("[!] No data found and scraping is disabled.")
-                return 
-            
-            facts_df = pd.read_csv(FACTS_CSV_PATH)
-            print(f"[OK] Loaded {len(facts_df)} total facts")
+            print("\n[1/4] Loading existing data from the fact store...")
         
-        # Step 2: Validate data
-        print("\n[2/3] Validating data...")
-        if "statement" not in facts_df.columns:
-            raise ValueError("CSV must contain a 'statement' column.")
+        facts_df = fact_store.to_dataframe()
+        if len(facts_df) == 0:
+            print("[!] No facts in storage. Enable scraping or import a CSV with `python -m core.fact_store import`.")
+            return
+        print(f"[OK] Loaded {len(facts_df)} total facts")
         
-        statements = facts_df["statement"].dropna().tolist()
+        # Step 2: Validate data
+        print("\n[2/4] Validating data...")
+        statements = facts_df["statement"].tolist()
         if len(statements) == 0:
             raise ValueError("No valid statements found in data.")
         
         print(f"[OK] Validated {len(statements)} statements")
         
         # Step 3: Build vector index
-        print("\n[3/3] Building FAISS vector index...")
+        print("\n[3/4] Building FAISS vector index...")
         vector_db.build_and_save(statements, metadata=facts_df.to_dict('records'))
+        # The scraped entries are indexed; only now mark them as seen
+        data_scraper.commit_state()
+        
+        # Step 4: Precompute verdicts for restatements and per-fact contradiction features
+        print("\n[4/4] Precomputing verdicts and fact features...")
+        if VERDICT_INDEX_ENABLED:
+            verdict_index.sync(statements, vector_db.snapshot.filter_index.searchable, rebuild=True)
+            verdict_index.save()
+            print(f"[OK] Keyed {verdict_index.get_stats()['statements']} statements")
+        contradiction_detector.sync(statements, rebuild=True)
+        contradiction_detector.save()
+        print(f"[OK] Extracted contradiction features for {contradiction_detector.size} facts")
         
         print("\n" + "=" * 60)
         print("[OK] Database build completed successfully!")
         print("=" * 60)
         print(f"\nStatistics:")
-        print(f"  - Total facts indexed: {len(statements)}")
+        print(f"  - Total facts indexed: {vector_db.index.ntotal} ({len(statements)} stored)")
+        print(f"  - Fact store: {fact_store.db_path}")
         print(f"  - Index location: {vector_db.index_path}")
+        if VERDICT_INDEX_ENABLED:
+            print(f"  - Verdict index: {verdict_index.path}")
+        print(f"  - Fact features: {contradiction_detector.path}")
+        if EXPORT_SHARED_INDEX:
+            print(f"  - Shared bundle: {SHARED_INDEX_DIR} (serve with INDEX_SERVING_MODE=shared)")
         print(f"  - Ready for queries!\n")
         
     except FileNotFoundError as e:
@@ -1,56 +1,192 @@
-# test_llm_service.py
-from pydantic import BaseModel, Field
-from langchain.prompts import PromptTemplate
-from langchain.output_parsers import PydanticOutputParser
-from langchain.chains import LLMChain
-from langchain_community.chat_models import HuggingFaceEndpoint
+# cli.py
+"""
+Bulk fact-checking from the command line.
+
+    python cli.py claims.jsonl -o verdicts.jsonl --workers 8
+    python cli.py claims.csv -o verdicts.jsonl --field text --last-days 365
+    python cli.py claims.jsonl -o verdicts.jsonl --workers 16 --bulk
+
+Input is JSONL (objects with a "claim" or "text" field, or bare strings)
+or CSV, streamed so the file never has to fit in memory. Verdicts are
+appended to the output as they complete, one JSON object per line, tagged
+with the input row "index" (and the input "id" when present). Every input
+row gets a line: rows without a claim are marked "skipped", and malformed
+JSONL lines get an "error" instead of stopping the run.
+
+With --bulk, claims that reach the LLM at the same time are packed into
+shared requests (up to BULK_MAX_BATCH_SIZE per request), so use enough
+workers to fill a batch.
+
+Progress is checkpointed next to the output (<output>.ckpt). Re-running
+the same command after a crash skips every row that already has a verdict.
+"""
+import argparse
+import json
+import logging
 import os
+import sys
+import time
+from pathlib import Path
+from typing import Set
+
+def count_rows(path: Path) -> int:
+    """Row count for the ETA (CSV header excluded)"""
+    with open(path, 'rb') as f:
+        lines = sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 20), b""))
+    return max(lines - 1, 0) if path.suffix.lower() == ".csv" else lines
+
+class Checkpoint:
+    """
+    Completed row indices as a contiguous watermark plus the sparse set done
+    above it, and how many output bytes were durable when it was saved.
+    Every row is marked (skipped ones too), so the sparse set never holds
+    more than the rows in flight.
+    """
+
+    def __init__(self, path: Path, input_path: Path):
+        self.path = path
+        self.input_path = str(input_path)
+        self.watermark = 0
+        self.done: Set[int] = set()
+        self.output_bytes = 0
+        self.completed = 0
+        self.errors = 0
+
+    def load(self):
+        if not self.path.exists():
+            return
+        with open(self.path) as f:
+            state = json.load(f)
+        if state.get("input") != self.input_path:
+            raise SystemExit(f"{self.path} belongs to {state.get('input')}; use another --output")
+        self.watermark = state["watermark"]
+        self.done = set(state["done"])
+        self.output_bytes = state["output_bytes"]
+        self.completed = state["completed"]
+        self.errors = state["errors"]
 
-class Verdict(BaseModel):
-    verdict: str = Field(description="Must be exactly: 'True', 'False', or 'Unverifiable'")
-    confidence: float = Field(description="Confidence score between 0.0 and 1.0")
-    reasoning: str = Field(description="Detailed explanation with evidence citations")
+    def mark(self, index: int, error: bool = False):
+        self.completed += 1
+        self.errors += error
+        self.done.add(index)
+        while self.watermark in self.done:
+            self.done.discard(self.watermark)
+            self.watermark += 1
 
-# --- Setup Hugging Face LLM ---
-LLM_REPO_ID = "mistralai/Mistral-7B-Instruct-v0.2"  # or Zephyr
-os.environ["HUGGINGFACEHUB_API_TOKEN"] = ""
+    def is_done(self, index: int) -> bool:
+        return index < self.watermark or index in self.done
 
-llm = HuggingFaceEndpoint(
-    repo_id=LLM_REPO_ID,
-    temperature=0.2,
-    max_new_tokens=150,
-    timeout=120
-)
+    def save(self, output_bytes: int):
+        self.output_bytes = output_bytes
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                "input": self.input_path,
+                "watermark": self.watermark,
+                "done": sorted(self.done),
+                "output_bytes": self.output_bytes,
+                "completed": self.completed,
+                "errors": self.errors,
+            }, f)
+        os.replace(tmp_path, self.path)
 
-# --- Setup prompt and parser ---
-parser = PydanticOutputParser(pydantic_object=Verdict)
+def recover(checkpoint: Checkpoint, output_path: Path):
+    """
+    Pick up verdicts written after the last checkpoint and cut a line left
+    half-written by a crash, so the output stays valid JSONL.
+    """
+    if not output_path.exists():
+        checkpoint.output_bytes = 0
+        return
+    with open(output_path, 'rb+') as f:
+        f.seek(min(checkpoint.output_bytes, os.path.getsize(output_path)))
+        good = f.tell()
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            if not line.endswith(b"\n"):
+                break
+            checkpoint.mark(record["index"], error="error" in record)
+            good += len(line)
+        f.truncate(good)
 
-template = """You are a precise fact-checking AI. Analyze claims against evidence strictly.
+def format_eta(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m{seconds % 60:02d}s"
 
-Claim: "{claim}"
+def main():
+    parser = argparse.ArgumentParser(description="Fact-check every claim in a JSONL or CSV file")
+    parser.add_argument("input", type=Path, help="JSONL or CSV file of claims")
+    parser.add_argument("-o", "--output", type=Path, required=True, help="Verdicts JSONL (appended)")
+    parser.add_argument("--field", help="Claim field/column (default: first of claim, text, statement)")
+    parser.add_argument("--workers", type=int, default=4, help="Claims checked concurrently")
+    parser.add_argument("--checkpoint-every", type=float, default=5.0, help="Seconds between checkpoints")
+    parser.add_argument("--source", action="append", help="Only use evidence from this source (repeatable)")
+    parser.add_argument("--category", action="append", help="Only use evidence from this category (repeatable)")
+    parser.add_argument("--last-days", type=int, help="Only use evidence published in the last N days")
+    parser.add_argument("--bulk", action="store_true", help="Pack concurrent claims into shared LLM requests")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start over")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
 
-Evidence:
-{evidence}
+    # Configure before the pipeline modules set up INFO logging
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    from core.fact_filters import FactFilter
+    from core.streaming import read_claims, check_stream
+    filters = FactFilter.create(sources=args.source, categories=args.category, last_days=args.last_days)
 
-{format_instructions}
+    checkpoint = Checkpoint(args.output.with_name(args.output.name + ".ckpt"), args.input.resolve())
+    if args.restart:
+        args.output.unlink(missing_ok=True)
+    else:
+        checkpoint.load()
+        recover(checkpoint, args.output)
+    resumed = checkpoint.completed
+    if resumed:
+        print(f"Resuming: {resumed} claims already checked", file=sys.stderr)
 
-Response (JSON only):"""
+    total = count_rows(args.input)
+    started = time.perf_counter()
+    last_report = last_checkpoint = started
 
-prompt = PromptTemplate(
-    template=template,
-    input_variables=["claim", "evidence"],
-    partial_variables={"format_instructions": parser.get_format_instructions()}
-)
+    # Every stage is a generator: rows are read only as worker slots free up
+    todo = (record for record in read_claims(args.input, args.field) if not checkpoint.is_done(record[0]))
+    with open(args.output, 'a', encoding='utf-8') as out:
+        for result in check_stream(todo, workers=args.workers, filters=filters, bulk=args.bulk):
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            checkpoint.mark(result["index"], error="error" in result)
 
-# --- Create LLMChain ---
-chain = LLMChain(llm=llm, prompt=prompt, output_parser=parser)
+            now = time.perf_counter()
+            if now - last_checkpoint >= args.checkpoint_every:
+                # Verdicts must be on disk before the checkpoint that covers them
+                out.flush()
+                os.fsync(out.fileno())
+                checkpoint.save(out.tell())
+                last_checkpoint = now
+            if now - last_report >= 2.0:
+                rate = (checkpoint.completed - resumed) / (now - started)
+                remaining = max(total - checkpoint.completed, 0)
+                eta = format_eta(remaining / rate) if rate > 0 else "?"
+                print(
+                    f"{checkpoint.completed}/{total} checked, {checkpoint.errors} errors, "
+                    f"{rate:.1f} claims/s, ETA {eta}",
+                    file=sys.stderr
+                )
+                last_report = now
 
-# --- Example claim and evidence ---
-claim = "The Eiffel Tower is in Berlin"
-evidence = ["The Eiffel Tower is located in Paris, France"]
+        out.flush()
+        os.fsync(out.fileno())
+        checkpoint.save(out.tell())
 
-# --- Run chain ---
-result = chain.run({"claim": claim, "evidence": "\n".join(evidence)})
+    elapsed = time.perf_counter() - started
+    checked = checkpoint.completed - resumed
+    print(
+        f"Done: {checked} claims in {elapsed:.1f}s ({checked / elapsed if elapsed else 0:.1f} claims/s), "
+        f"{checkpoint.errors} errors. Verdicts in {args.output}",
+        file=sys.stderr
+    )
 
-# --- Print result ---
-print(result)
+if __name__ == "__main__":
+    main()
@@ -10,11 +10,13 @@ load_dotenv()
 # --- Paths ---
 BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / "data"
-FACTS_CSV_PATH = DATA_DIR / "trusted_facts.csv"
+FACTS_CSV_PATH = DATA_DIR / "trusted_facts.csv"  # Import/export format; migrated into FACTS_DB_PATH on first use
+FACTS_DB_PATH = Path(os.getenv("FACTS_DB_PATH", DATA_DIR / "facts.db"))
 VECTOR_INDEX_PATH = DATA_DIR / "faiss_index.bin"
 BM25_INDEX_PATH = DATA_DIR / "bm25_index.pkl"
-METRICS_PATH = BASE_DIR / "metrics.jsonl"
-CACHE_PATH = DATA_DIR / "query_cache.json"
+SHARED_INDEX_DIR = Path(os.getenv("SHARED_INDEX_DIR", DATA_DIR / "shared_index"))  # Read-only bundles for multi-worker serving
+METRICS_PATH = Path(os.getenv("METRICS_PATH", BASE_DIR / "metrics.jsonl"))
+CACHE_PATH = Path(os.getenv("CACHE_PATH", DATA_DIR / "query_cache.json"))
 
 # --- Models ---
 EMBEDDING_MODEL = 'all-MiniLM-L6-v2'  # 384d, very fast
@@ -24,9 +26,58 @@ CROSS_ENCODER_MODEL = 'cross-encoder/ms-marco-MiniLM-L-6-v2' # For re-ranking
 GROQ_MODEL = "llama-3.1-8b-instant"  # Super fast Llama 3 on Groq
 SPACY_MODEL = "en_core_web_md"
 
+# LLM backend: "groq" (hosted), "local" (OpenAI-compatible server) or "stub" (offline)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq")
+LLM_CHEAP_BACKEND = os.getenv("LLM_CHEAP_BACKEND", "")  # Optional backend for small prompts
+CHEAP_CLAIM_MAX_PROMPT_TOKENS = 400  # Prompts at or below this go to LLM_CHEAP_BACKEND
+LOCAL_LLM_URL = os.getenv("LOCAL_LLM_URL", "http://127.0.0.1:8080/v1")
+LOCAL_LLM_MODEL = os.getenv("LOCAL_LLM_MODEL", "local-model")
+LOCAL_LLM_TIMEOUT = 60
+STUB_LLM_LATENCY_MS = float(os.getenv("STUB_LLM_LATENCY_MS", "0"))
+
+# --- LLM Prompt Settings ---
+LLM_PROMPT_VARIANT = os.getenv("LLM_PROMPT_VARIANT", "full")  # "full" (few-shot) or "compact"
+LLM_MAX_COMPLETION_TOKENS = 200  # verdict JSON is three short fields
+PROMPT_TOKEN_BUDGET = 1200       # Hard cap on estimated prompt tokens per verdict call
+EVIDENCE_MAX_TOKENS = 120        # Each evidence item is trimmed to this many tokens
+EVIDENCE_DEDUP_THRESHOLD = 0.9   # Token-set Jaccard above which evidence counts as a duplicate
+
+# --- Bulk Verification Settings ---
+BULK_TOKEN_BUDGET = 6000               # Prompt + expected completion tokens per bulk request
+BULK_MAX_BATCH_SIZE = 16               # Upper bound on claims packed into one request
+BULK_COMPLETION_TOKENS_PER_ITEM = 90   # Completion tokens reserved per packed verdict
+BULK_STREAM_WINDOW_PER_WORKER = 2      # Claims in flight per worker when streaming a file
+BULK_LINGER_MS = 50                    # Wait this long for more claims before sending a partial batch
+
 # --- RAG Pipeline Parameters ---
 TOP_K_RETRIEVE = 15     # Number of docs to fetch from Vector DB (FAISS) + BM25 combined
 TOP_K_RERANK_RESULTS = 3 # Number of top docs after re-ranking to send to LLM
+
+# Per-request latency budget. Stages check the time left before they start and degrade instead
+# of overrunning: fewer candidates, no rerank, a hedged LLM request, or a local verdict.
+PIPELINE_DEADLINE_MS = float(os.getenv("PIPELINE_DEADLINE_MS", "0"))  # 0 = no deadline
+DEADLINE_FEWER_CANDIDATES_MS = 3000  # Less than this left at retrieval: fetch DEADLINE_REDUCED_TOP_K
+DEADLINE_REDUCED_TOP_K = 5
+DEADLINE_SKIP_RERANK_MS = 2000       # Less than this left at rerank: keep the fused retrieval order
+DEADLINE_MIN_LLM_MS = 500            # Less than this left at the verdict: answer from retrieval locally
+LLM_HEDGE_AFTER_MS = float(os.getenv("LLM_HEDGE_AFTER_MS", "1500"))  # Send a second request if the first is still out (0 = never)
+LLM_HEDGE_BACKEND = os.getenv("LLM_HEDGE_BACKEND", "")  # Backend for the hedge ("" = same as the first request)
+LLM_CALL_THREADS = 32                # Threads for deadline-bound LLM calls (abandoned calls finish here)
+
+# Evidence ranking after rerank: CrossEncoder relevance x source weight x recency decay
+RANKING_ENABLED = os.getenv("ENABLE_EVIDENCE_RANKING", "true").lower() == "true"
+RANKING_RECENCY_HALF_LIFE_DAYS = 180    # A fact this old keeps half its recency score
+RANKING_RECENCY_WEIGHT = 0.4            # Share of the prior that depends on age (0 ignores dates)
+RANKING_UNDATED_RECENCY = 0.5           # Recency assumed when a fact has no parseable date
+RANKING_SOURCE_WEIGHTS = {              # Keys are lowercased source names
+    "pib india": 1.0,
+    "factly": 0.95,
+    "newschecker": 0.95,
+    "webqoof (the quint)": 0.9,
+}
+RANKING_DEFAULT_SOURCE_WEIGHT = 0.85
+RANKING_RELATIVE_CUTOFF = 0.5           # Drop evidence scoring below this fraction of the best
+RANKING_PRIOR_REFRESH_SECONDS = 3600    # Recompute recency as facts age
 CONFIDENCE_THRESHOLD = 0.50
 SIMILARITY_MATCH_THRESHOLD = 0.85
 
@@ -34,6 +85,96 @@ SIMILARITY_MATCH_THRESHOLD = 0.85
 CACHE_ENABLED = True
 CACHE_MAX_SIZE = 1000
 CACHE_TTL_SECONDS = 3600  # 1 hour
+EMBEDDING_CACHE_SIZE = 2000      # Query embeddings kept in memory (LRU)
+EMBEDDING_CACHE_PATH = DATA_DIR / "embedding_cache.npz"
+
+# --- Warm Restart ---
+# Hot caches and recent claims are snapshotted periodically and on shutdown, and restored on startup
+WARM_START_ENABLED = os.getenv("ENABLE_WARM_START", "true").lower() == "true"
+WARM_START_SNAPSHOT_SECONDS = int(os.getenv("WARM_START_SNAPSHOT_SECONDS", "300"))
+RECENT_CLAIMS_PATH = DATA_DIR / "recent_claims.json"
+RECENT_CLAIMS_MAX = 200          # Recent claims remembered across restarts
+WARMUP_ENABLED = os.getenv("ENABLE_WARMUP", "true").lower() == "true"
+WARMUP_CLAIMS = 20               # Top recent claims re-run through the models in the background
+
+# --- Metrics Settings ---
+# Latency histogram bucket upper bounds in seconds (Prometheus style)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 7.5, 10.0, 20.0, 30.0)
+
+METRICS_FORMAT = os.getenv("METRICS_FORMAT", "jsonl")  # "jsonl" (one row per line) or "columnar" (one batch per line)
+METRICS_WINDOW = 1000                  # Recent metric rows kept in memory
+METRICS_QUEUE_SIZE = 10000             # Pending rows before new ones are dropped
+METRICS_BATCH_SIZE = 200               # Rows written per flush
+METRICS_FLUSH_INTERVAL_SECONDS = 2.0   # Flush at least this often when rows are pending
+METRICS_MAX_BYTES = 50 * 1024 * 1024   # Rotate the metrics file past this size...
+METRICS_ROTATE_INTERVAL_HOURS = 24     # ...or after this long
+METRICS_BACKUP_COUNT = 7               # Rotated files to keep (metrics.jsonl.1 ... .N)
+METRICS_STATE_PATH = METRICS_PATH.with_suffix(".state.json")  # Persisted counters/histograms
+FRESHNESS_BUCKETS = (60, 300, 900, 1800, 3600, 3 * 3600, 6 * 3600, 12 * 3600, 86400, 3 * 86400, 7 * 86400)  # Publish -> searchable lag (seconds)
+
+# Analytics store: SQLite with incrementally maintained minute/hour rollups
+ANALYTICS_STORE_ENABLED = os.getenv("ENABLE_ANALYTICS_STORE", "true").lower() == "true"
+ANALYTICS_DB_PATH = Path(os.getenv("ANALYTICS_DB_PATH", METRICS_PATH.with_suffix(".analytics.db")))
+ANALYTICS_RAW_RETENTION_DAYS = 30      # Raw request rows kept for drill-down
+ANALYTICS_MINUTE_RETENTION_DAYS = 14   # Minute rollups; hour rollups are kept indefinitely
+
+# --- Tracing Settings ---
+TRACING_ENABLED = os.getenv("ENABLE_TRACING", "false").lower() == "true"  # Export spans to file
+TRACE_EXPORT_PATH = Path(os.getenv("TRACE_EXPORT_PATH", DATA_DIR / "traces" / "spans.otlp.jsonl"))
+
+# --- Profiling Settings ---
+# A sampled fraction of pipeline runs is profiled into PROFILES_DIR (0 = off, no per-request cost)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_MODE = os.getenv("PROFILE_MODE", "cpu")  # "cpu" (cProfile + stack samples) or "memory" (tracemalloc)
+PROFILE_REQUESTS_ALLOWED = os.getenv("ALLOW_PROFILE_REQUESTS", "false").lower() == "true"  # /verify?profile=
+PROFILES_DIR = Path(os.getenv("PROFILES_DIR", DATA_DIR / "profiles"))
+PROFILE_SAMPLE_INTERVAL_MS = 5     # Stack sampling period for collapsed (flamegraph) stacks
+PROFILE_TRACEMALLOC_FRAMES = 25    # Frames kept per allocation traceback
+PROFILE_TOP_N = 30                 # Functions/allocation sites listed in each summary
+PROFILE_MAX_RUNS = 200             # Oldest profiles are deleted beyond this many
+
+# --- Serving Settings ---
+# "private": each process loads its own index copy and can append to it.
+# "shared": workers map the read-only bundle in SHARED_INDEX_DIR (one copy in the page cache).
+INDEX_SERVING_MODE = os.getenv("INDEX_SERVING_MODE", "private")
+EXPORT_SHARED_INDEX = os.getenv("EXPORT_SHARED_INDEX", "false").lower() == "true"  # Writers publish a bundle on save
+SHARED_INDEX_CHECK_SECONDS = 5     # How often shared workers look for a newer bundle
+SHARED_INDEX_KEEP = 2              # Bundles kept on disk (workers re-attach within the check interval)
+
+# --- Inference Settings ---
+# "inline": every process loads the models. "server": embedding, rerank and claim extraction are
+# sent to the model server (python -m core.inference_server), which batches calls across callers.
+INFERENCE_MODE = os.getenv("INFERENCE_MODE", "inline")
+INFERENCE_SOCKET_PATH = Path(os.getenv("INFERENCE_SOCKET_PATH", DATA_DIR / "inference.sock"))
+# Shared secret for the model server sockets (payloads are pickled). Without INFERENCE_AUTHKEY the
+# server generates a random key into INFERENCE_AUTHKEY_PATH (mode 0600), which clients then read.
+INFERENCE_AUTHKEY = os.getenv("INFERENCE_AUTHKEY", "").encode()
+INFERENCE_AUTHKEY_PATH = Path(os.getenv("INFERENCE_AUTHKEY_PATH", DATA_DIR / "inference.key"))
+INFERENCE_AUTHKEY_MIN_BYTES = 16
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "1"))  # Model server processes, one socket each
+INFERENCE_TORCH_THREADS = int(os.getenv("INFERENCE_TORCH_THREADS", "0"))  # Per server process; 0 = its CPU share
+INFERENCE_MAX_BATCH = 64           # Items per model call
+INFERENCE_BATCH_WAIT_MS = 0        # Extra wait for more callers (queued requests always join the next batch)
+INFERENCE_TIMEOUT_SECONDS = 30
+
+# --- Admission Control (API) ---
+# /verify requests are rate limited per client, queued by priority and served by a fixed pool
+# of pipeline threads; requests whose estimated queue wait would break the SLO get an early 429.
+ADMISSION_ENABLED = os.getenv("ENABLE_ADMISSION_CONTROL", "true").lower() == "true"
+ADMISSION_WORKERS = int(os.getenv("ADMISSION_WORKERS", "4"))  # Pipeline threads per API process
+ADMISSION_PRIORITIES = ("interactive", "bulk")   # Served in this order
+ADMISSION_DEFAULT_PRIORITY = "bulk"              # When neither ?priority= nor X-Priority is sent
+# Trusted callers: "name:key,name:key". A request with a valid key (Authorization: Bearer or
+# X-API-Key) is rate limited as that name and may ask for interactive; others are keyed by peer address.
+ADMISSION_API_KEYS = dict(
+    entry.strip().split(":", 1) for entry in os.getenv("ADMISSION_API_KEYS", "").split(",") if ":" in entry
+)
+ADMISSION_TRUSTED_PRIORITIES = ("interactive",)  # Priorities only trusted callers may request
+ADMISSION_CLIENT_RATE = {"interactive": 1.0, "bulk": 10.0}   # Requests per second per client (token refill)
+ADMISSION_CLIENT_BURST = {"interactive": 5, "bulk": 50}      # Token bucket capacity
+ADMISSION_WAIT_SLO_SECONDS = {"interactive": 5.0, "bulk": 120.0}  # Max estimated queue wait
+ADMISSION_MAX_QUEUE = 1000       # Waiting requests across priorities
+ADMISSION_MAX_CLIENTS = 10000    # Token buckets kept (least recently seen dropped first)
 
 # --- App Settings ---
 APP_TITLE = "LLM-Powered Fact Checker"
@@ -49,3 +190,33 @@ NEWSCHECKER_RSS_URL = "https://newschecker.in/feed/"
 SCRAPE_ENABLED = os.getenv("ENABLE_SCRAPING", "false").lower() == "true"
 SCRAPE_INTERVAL_HOURS = 24
 SCRAPE_LIMIT_PER_SOURCE = 50
+SCRAPE_TIMEOUT_SECONDS = 15
+SCRAPE_MAX_CONNECTIONS = 8     # Pooled connections shared by all feeds
+SCRAPE_SEEN_LIMIT = 5000       # Entry ids remembered per source
+SCRAPE_STATE_PATH = DATA_DIR / "scrape_state.json"  # ETag/Last-Modified and seen ids
+
+# Continuous ingest: scrape -> clean -> dedupe -> embed -> append to the live index
+INGEST_ENABLED = os.getenv("ENABLE_CONTINUOUS_INGEST", "false").lower() == "true"
+INGEST_INTERVAL_SECONDS = int(os.getenv("INGEST_INTERVAL_SECONDS", "900"))
+INGEST_EMBED_BATCH_SIZE = 64   # Facts per embedding batch
+
+# Near-duplicate detection: reworded copies link to a canonical fact instead of being indexed
+DEDUP_ENABLED = os.getenv("ENABLE_NEAR_DEDUP", "true").lower() == "true"
+DEDUP_NUM_PERM = 128               # MinHash permutations
+DEDUP_BANDS = 32                   # LSH bands (32 x 4 rows: candidates from ~0.4 Jaccard)
+DEDUP_SHINGLE_SIZE = 2             # Word shingles
+DEDUP_JACCARD_THRESHOLD = 0.5      # Estimated Jaccard to count as a duplicate
+DEDUP_EMBEDDING_THRESHOLD = 0.92   # Cosine similarity to count as a duplicate (ingest only)
+DEDUP_SIGNATURES_PATH = DATA_DIR / "minhash_signatures.npy"
+
+# Precomputed verdicts: restatements of a trusted fact resolve to "True" before any model runs
+VERDICT_INDEX_ENABLED = os.getenv("ENABLE_VERDICT_INDEX", "true").lower() == "true"
+VERDICT_INDEX_PATH = DATA_DIR / "verdict_index.npz"
+PRECOMPUTED_CONFIDENCE = {"exact": 0.97, "signature": 0.93}  # By match kind
+
+# Contradiction detection: numeric/date/place mismatches against the best evidence resolve to "False"
+CONTRADICTION_FEATURES_PATH = DATA_DIR / "fact_features.npz"
+CONTRADICTION_MIN_OVERLAP = 0.7    # Share of the claim's content words the evidence must have
+CONTRADICTION_TOLERANCE = 0.005    # Relative difference below which two figures are the same
+CONTRADICTION_ROUNDING_TOLERANCE = 0.05  # Relative band in which a round claimed figure may be rounded (not percentages)
+CONTRADICTION_CONFIDENCE = 0.9
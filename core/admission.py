@@ -0,0 +1,181 @@
+# core/admission.py
+import asyncio
+import hmac
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from core.metrics import metrics_collector
+from config import (
+    ADMISSION_ENABLED, ADMISSION_WORKERS, ADMISSION_PRIORITIES,
+    ADMISSION_CLIENT_RATE, ADMISSION_CLIENT_BURST, ADMISSION_WAIT_SLO_SECONDS,
+    ADMISSION_MAX_QUEUE, ADMISSION_MAX_CLIENTS, ADMISSION_API_KEYS
+)
+
+logger = logging.getLogger(__name__)
+
+class Rejected(Exception):
+    """Request refused before it was queued; maps to HTTP 429"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"{reason}, retry after {retry_after:.1f}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+def authenticate(api_key: Optional[str]) -> Optional[str]:
+    """Name of the trusted caller holding this API key, or None"""
+    if not api_key:
+        return None
+    for name, key in ADMISSION_API_KEYS.items():
+        if hmac.compare_digest(api_key.encode(), key.encode()):
+            return name
+    return None
+
+class TokenBucket:
+    """Allows `rate` requests per second on average with bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Spend one token. Returns 0 on success, else seconds until one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+@dataclass
+class _Job:
+    priority: str
+    fn: Callable[..., Any]
+    args: Tuple
+    kwargs: Dict[str, Any]
+    enqueued_at: float = field(default_factory=time.monotonic)
+    future: Future = field(default_factory=Future)
+
+class AdmissionController:
+    """
+    Per-client token buckets in front of a priority queue. A fixed pool of
+    pipeline threads always takes interactive work before bulk work.
+    Queue wait is estimated from the depth ahead of a request and a moving
+    average of service time; a request that would miss its priority's SLO
+    is refused up front instead of timing out in the queue.
+    """
+
+    def __init__(self, workers: int = ADMISSION_WORKERS):
+        self.enabled = ADMISSION_ENABLED
+        self.workers = workers
+        self._buckets: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+        self._heap: List[Tuple[int, int, _Job]] = []
+        self._sequence = itertools.count()
+        self._depth = {priority: 0 for priority in ADMISSION_PRIORITIES}
+        self._in_flight = 0
+        self._service_seconds = 1.0  # Moving average, seeded pessimistically
+        self._cv = threading.Condition()
+        self._threads: List[threading.Thread] = []
+
+    def _ensure_started(self):
+        if not self._threads:
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"admission-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _bucket(self, client_id: str, priority: str) -> TokenBucket:
+        key = (client_id, priority)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(ADMISSION_CLIENT_RATE[priority], ADMISSION_CLIENT_BURST[priority])
+            self._buckets[key] = bucket
+            if len(self._buckets) > ADMISSION_MAX_CLIENTS:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def estimated_wait(self, priority: str) -> float:
+        """Seconds a new request of this priority would wait for a worker"""
+        rank = ADMISSION_PRIORITIES.index(priority)
+        ahead = sum(self._depth[p] for p in ADMISSION_PRIORITIES[:rank + 1])
+        # A saturated pool frees its next worker after about half a service time
+        busy = 0.5 if self._in_flight >= self.workers else 0.0
+        return (ahead / self.workers + busy) * self._service_seconds
+
+    def submit(self, client_id: str, priority: str, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Queue fn(*args, **kwargs) or raise Rejected"""
+        if priority not in ADMISSION_PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}'. Use one of: {', '.join(ADMISSION_PRIORITIES)}")
+
+        with self._cv:
+            retry_after = self._bucket(client_id, priority).take()
+            if retry_after:
+                reason = "rate_limited"
+            elif sum(self._depth.values()) >= ADMISSION_MAX_QUEUE:
+                reason, retry_after = "queue_full", self.estimated_wait(priority)
+            else:
+                wait = self.estimated_wait(priority)
+                reason = "over_slo" if wait > ADMISSION_WAIT_SLO_SECONDS[priority] else None
+                retry_after = wait - ADMISSION_WAIT_SLO_SECONDS[priority]
+
+            if reason:
+                metrics_collector.count_rejection(priority, reason)
+                raise Rejected(reason, max(retry_after, 1.0))
+
+            job = _Job(priority, fn, args, kwargs)
+            heapq.heappush(self._heap, (ADMISSION_PRIORITIES.index(priority), next(self._sequence), job))
+            self._depth[priority] += 1
+            metrics_collector.set_queue_depth(priority, self._depth[priority])
+            self._ensure_started()
+            self._cv.notify()
+        return job.future
+
+    async def run(self, client_id: str, priority: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Admit, wait for a worker and return fn's result. A cancelled request leaves the queue."""
+        return await asyncio.wrap_future(self.submit(client_id, priority, fn, *args, **kwargs))
+
+    def _work(self):
+        while True:
+            with self._cv:
+                while not self._heap:
+                    self._cv.wait()
+                _, _, job = heapq.heappop(self._heap)
+                self._depth[job.priority] -= 1
+                metrics_collector.set_queue_depth(job.priority, self._depth[job.priority])
+                # The client may have gone away while it waited
+                if not job.future.set_running_or_notify_cancel():
+                    continue
+                self._in_flight += 1
+
+            metrics_collector.observe_queue_wait(job.priority, time.monotonic() - job.enqueued_at)
+            started = time.monotonic()
+            try:
+                job.future.set_result(job.fn(*job.args, **job.kwargs))
+            except Exception as e:
+                job.future.set_exception(e)
+
+            with self._cv:
+                self._in_flight -= 1
+                self._service_seconds = 0.8 * self._service_seconds + 0.2 * (time.monotonic() - started)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cv:
+            return {
+                'queue_depth': dict(self._depth),
+                'in_flight': self._in_flight,
+                'workers': self.workers,
+                'service_seconds': round(self._service_seconds, 3),
+                'estimated_wait': {p: round(self.estimated_wait(p), 3) for p in ADMISSION_PRIORITIES},
+            }
+
+admission_controller = AdmissionController()
@@ -0,0 +1,297 @@
+# core/analytics_store.py
+import sqlite3
+import threading
+import time
+import json
+import logging
+from bisect import bisect_left
+from pathlib import Path
+from typing import List, Dict, Any, Tuple, Optional
+from config import (
+    ANALYTICS_DB_PATH, LATENCY_BUCKETS,
+    ANALYTICS_RAW_RETENTION_DAYS, ANALYTICS_MINUTE_RETENTION_DAYS
+)
+from core.metrics import Histogram, PipelineMetrics, columns_to_metrics
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = {'minute': 60, 'hour': 3600}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS requests (
+    ts INTEGER NOT NULL,
+    total_time REAL,
+    extraction_time REAL,
+    retrieval_time REAL,
+    llm_time REAL,
+    verdict TEXT,
+    confidence REAL,
+    cache_hit INTEGER,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_requests_ts ON requests(ts);
+
+CREATE TABLE IF NOT EXISTS rollups (
+    granularity TEXT NOT NULL,
+    bucket_start INTEGER NOT NULL,
+    requests INTEGER NOT NULL DEFAULT 0,
+    cache_hits INTEGER NOT NULL DEFAULT 0,
+    verdict_true INTEGER NOT NULL DEFAULT 0,
+    verdict_false INTEGER NOT NULL DEFAULT 0,
+    verdict_unverifiable INTEGER NOT NULL DEFAULT 0,
+    confidence_sum REAL NOT NULL DEFAULT 0,
+    total_time_sum REAL NOT NULL DEFAULT 0,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (granularity, bucket_start)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS rollup_latency (
+    granularity TEXT NOT NULL,
+    bucket_start INTEGER NOT NULL,
+    stage TEXT NOT NULL,
+    le_index INTEGER NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (granularity, stage, bucket_start, le_index)
+) WITHOUT ROWID;
+"""
+
+ROLLUP_COLUMNS = (
+    'requests', 'cache_hits', 'verdict_true', 'verdict_false', 'verdict_unverifiable',
+    'confidence_sum', 'total_time_sum', 'prompt_tokens', 'completion_tokens'
+)
+
+def _epoch(timestamp: str) -> int:
+    """PipelineMetrics timestamps are local '%Y-%m-%d %H:%M:%S' strings"""
+    return int(time.mktime(time.strptime(timestamp, "%Y-%m-%d %H:%M:%S")))
+
+class AnalyticsStore:
+    """
+    SQLite analytics store with minute/hour rollups maintained incrementally.
+    Dashboard queries read the rollups, so their cost depends on the number
+    of buckets in the time range, not on the number of requests.
+    """
+
+    def __init__(self, db_path: Path = ANALYTICS_DB_PATH):
+        self.db_path = db_path
+        self.buckets = tuple(sorted(LATENCY_BUCKETS))
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._last_prune = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def append(self, batch: List[PipelineMetrics]):
+        """Insert raw rows and fold them into the rollups in one transaction"""
+        if not batch:
+            return
+
+        raw_rows = []
+        rollups: Dict[Tuple[str, int], Dict[str, float]] = {}
+        latency: Dict[Tuple[str, int, str, int], int] = {}
+
+        for m in batch:
+            ts = _epoch(m.timestamp)
+            raw_rows.append((
+                ts, m.total_time, m.claim_extraction_time, m.retrieval_time, m.llm_time,
+                m.verdict, m.confidence, int(m.cache_hit), m.prompt_tokens, m.completion_tokens
+            ))
+            timings = m.stage_timings or {'pipeline': m.total_time}
+
+            for granularity, width in GRANULARITIES.items():
+                bucket_start = ts - ts % width
+                agg = rollups.setdefault((granularity, bucket_start), dict.fromkeys(ROLLUP_COLUMNS, 0))
+                agg['requests'] += 1
+                agg['cache_hits'] += int(m.cache_hit)
+                verdict_column = f"verdict_{m.verdict.lower()}"
+                if verdict_column in agg:
+                    agg[verdict_column] += 1
+                agg['confidence_sum'] += m.confidence
+                agg['total_time_sum'] += m.total_time
+                agg['prompt_tokens'] += m.prompt_tokens
+                agg['completion_tokens'] += m.completion_tokens
+
+                for stage, seconds in timings.items():
+                    key = (granularity, bucket_start, stage, bisect_left(self.buckets, seconds))
+                    latency[key] = latency.get(key, 0) + 1
+
+        columns = ", ".join(ROLLUP_COLUMNS)
+        placeholders = ", ".join("?" for _ in ROLLUP_COLUMNS)
+        updates = ", ".join(f"{c} = {c} + excluded.{c}" for c in ROLLUP_COLUMNS)
+
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT INTO requests VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", raw_rows
+                )
+                conn.executemany(
+                    f"INSERT INTO rollups (granularity, bucket_start, {columns}) "
+                    f"VALUES (?, ?, {placeholders}) "
+                    f"ON CONFLICT (granularity, bucket_start) DO UPDATE SET {updates}",
+                    [(g, b, *[agg[c] for c in ROLLUP_COLUMNS]) for (g, b), agg in rollups.items()]
+                )
+                conn.executemany(
+                    "INSERT INTO rollup_latency (granularity, bucket_start, stage, le_index, count) "
+                    "VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (granularity, stage, bucket_start, le_index) DO UPDATE SET count = count + excluded.count",
+                    [(g, b, stage, idx, count) for (g, b, stage, idx), count in latency.items()]
+                )
+
+            # Prune at most hourly so retention never costs more than the inserts
+            if time.time() - self._last_prune > 3600:
+                self._prune(conn)
+
+    def _prune(self, conn: sqlite3.Connection):
+        now = int(time.time())
+        raw_cutoff = now - ANALYTICS_RAW_RETENTION_DAYS * 86400
+        minute_cutoff = now - ANALYTICS_MINUTE_RETENTION_DAYS * 86400
+        with conn:
+            conn.execute("DELETE FROM requests WHERE ts < ?", (raw_cutoff,))
+            conn.execute("DELETE FROM rollups WHERE granularity = 'minute' AND bucket_start < ?", (minute_cutoff,))
+            conn.execute("DELETE FROM rollup_latency WHERE granularity = 'minute' AND bucket_start < ?", (minute_cutoff,))
+        self._last_prune = time.time()
+
+    def _granularity_for(self, start: int, end: int) -> str:
+        """Minute buckets for short ranges (within minute retention), hour buckets otherwise"""
+        minute_floor = time.time() - ANALYTICS_MINUTE_RETENTION_DAYS * 86400
+        if end - start <= 2 * 86400 and start >= minute_floor:
+            return 'minute'
+        return 'hour'
+
+    def _query(self, sql: str, params: tuple) -> List[tuple]:
+        with self._lock:
+            return self._connect().execute(sql, params).fetchall()
+
+    def summary(self, start: int, end: int) -> Dict[str, Any]:
+        """Totals, verdict mix and tail latency for [start, end) in epoch seconds"""
+        granularity = self._granularity_for(start, end)
+        row = self._query(
+            f"SELECT {', '.join(f'COALESCE(SUM({c}), 0)' for c in ROLLUP_COLUMNS)} FROM rollups "
+            "WHERE granularity = ? AND bucket_start >= ? AND bucket_start < ?",
+            (granularity, start, end)
+        )[0]
+        totals = dict(zip(ROLLUP_COLUMNS, row))
+        requests = totals['requests']
+        hist = self.latency_histogram(start, end, 'pipeline', granularity)
+
+        return {
+            'granularity': granularity,
+            'total_queries': requests,
+            'avg_total_time': totals['total_time_sum'] / requests if requests else 0.0,
+            'p50_total_time': hist.quantile(0.50),
+            'p95_total_time': hist.quantile(0.95),
+            'p99_total_time': hist.quantile(0.99),
+            'avg_confidence': totals['confidence_sum'] / requests if requests else 0.0,
+            'cache_hit_rate': totals['cache_hits'] / requests if requests else 0.0,
+            'verdict_distribution': {
+                'True': totals['verdict_true'],
+                'False': totals['verdict_false'],
+                'Unverifiable': totals['verdict_unverifiable'],
+            },
+            'prompt_tokens': totals['prompt_tokens'],
+            'completion_tokens': totals['completion_tokens'],
+        }
+
+    def latency_histogram(self, start: int, end: int, stage: str, granularity: Optional[str] = None) -> Histogram:
+        """Merge the per-bucket latency histograms of one stage over a time range"""
+        granularity = granularity or self._granularity_for(start, end)
+        hist = Histogram(self.buckets)
+        rows = self._query(
+            "SELECT le_index, SUM(count) FROM rollup_latency "
+            "WHERE granularity = ? AND stage = ? AND bucket_start >= ? AND bucket_start < ? "
+            "GROUP BY le_index",
+            (granularity, stage, start, end)
+        )
+        for le_index, count in rows:
+            if le_index < len(hist.counts):
+                hist.counts[le_index] += count
+                hist.count += count
+        return hist
+
+    def stage_percentiles(self, start: int, end: int) -> Dict[str, Dict[str, float]]:
+        """p50/p95/p99 (seconds) per traced stage over a time range"""
+        granularity = self._granularity_for(start, end)
+        stages = [row[0] for row in self._query(
+            "SELECT DISTINCT stage FROM rollup_latency "
+            "WHERE granularity = ? AND bucket_start >= ? AND bucket_start < ?",
+            (granularity, start, end)
+        )]
+        result = {}
+        for stage in sorted(stages):
+            hist = self.latency_histogram(start, end, stage, granularity)
+            result[stage] = {'p50': hist.quantile(0.50), 'p95': hist.quantile(0.95), 'p99': hist.quantile(0.99)}
+        return result
+
+    def timeseries(self, start: int, end: int) -> List[Dict[str, Any]]:
+        """Per-bucket request counts, verdict mix, average and p95 latency"""
+        granularity = self._granularity_for(start, end)
+        rows = self._query(
+            "SELECT bucket_start, requests, verdict_true, verdict_false, verdict_unverifiable, "
+            "total_time_sum, confidence_sum FROM rollups "
+            "WHERE granularity = ? AND bucket_start >= ? AND bucket_start < ? ORDER BY bucket_start",
+            (granularity, start, end)
+        )
+        p95_by_bucket: Dict[int, Histogram] = {}
+        for bucket_start, le_index, count in self._query(
+            "SELECT bucket_start, le_index, count FROM rollup_latency "
+            "WHERE granularity = ? AND stage = 'pipeline' AND bucket_start >= ? AND bucket_start < ?",
+            (granularity, start, end)
+        ):
+            hist = p95_by_bucket.setdefault(bucket_start, Histogram(self.buckets))
+            if le_index < len(hist.counts):
+                hist.counts[le_index] += count
+                hist.count += count
+
+        return [
+            {
+                'bucket_start': bucket_start,
+                'requests': requests,
+                'True': v_true,
+                'False': v_false,
+                'Unverifiable': v_unverifiable,
+                'avg_total_time': time_sum / requests if requests else 0.0,
+                'p95_total_time': p95_by_bucket[bucket_start].quantile(0.95) if bucket_start in p95_by_bucket else 0.0,
+                'avg_confidence': confidence_sum / requests if requests else 0.0,
+            }
+            for bucket_start, requests, v_true, v_false, v_unverifiable, time_sum, confidence_sum in rows
+        ]
+
+    def backfill(self, path: Path, batch_size: int = 5000) -> int:
+        """Stream an existing metrics log (jsonl or columnar) into the store"""
+        count = 0
+        batch: List[PipelineMetrics] = []
+        with open(path, 'r') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                batch.extend(columns_to_metrics(data) if 'columns' in data else [PipelineMetrics(**data)])
+                if len(batch) >= batch_size:
+                    self.append(batch)
+                    count += len(batch)
+                    batch = []
+        self.append(batch)
+        count += len(batch)
+        logger.info(f"Backfilled {count} metric rows from {path}")
+        return count
+
+analytics_store = AnalyticsStore()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Backfill the analytics store from metrics logs")
+    parser.add_argument("paths", nargs="+", help="metrics.jsonl files (oldest first)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    for metrics_file in args.paths:
+        analytics_store.backfill(Path(metrics_file))
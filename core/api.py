@@ -1,8 +1,111 @@
-from fastapi import FastAPI
+from datetime import datetime
+from typing import List, Optional
+import math
+from fastapi import FastAPI, Query, Request, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
 from pipeline import run_fact_checking_pipeline
+from core.metrics import metrics_collector
+from core.fact_filters import FactFilter
+from core.admission import admission_controller, authenticate, Rejected
+from core.deadline import Deadline
+from core.warm_start import warm_start
+from core.profiling import PROFILE_MODES
+from config import (
+    INGEST_ENABLED, INDEX_SERVING_MODE, ADMISSION_DEFAULT_PRIORITY, ADMISSION_PRIORITIES,
+    ADMISSION_TRUSTED_PRIORITIES,
+    PIPELINE_DEADLINE_MS, WARM_START_ENABLED, PROFILE_REQUESTS_ALLOWED
+)
 
 app = FastAPI()
 
 @app.post("/verify")
-async def verify_claim(text: str):
-    return run_fact_checking_pipeline(text)
\ No newline at end of file
+async def verify_claim(
+    request: Request,
+    text: str,
+    source: Optional[List[str]] = Query(None),
+    category: Optional[List[str]] = Query(None),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    last_days: Optional[int] = None,
+    priority: Optional[str] = None,
+    deadline_ms: Optional[float] = Query(None, gt=0),
+    profile: Optional[str] = None
+):
+    """
+    Trusted callers send an API key (Authorization: Bearer, or X-API-Key) and
+    are rate limited by its name; everyone else by their address. Callers pick
+    a queue with ?priority= or X-Priority: bulk (the default) | interactive,
+    which needs an API key.
+    deadline_ms (default PIPELINE_DEADLINE_MS) bounds the whole request,
+    including time spent queued; stages degrade to stay within it.
+    profile=cpu|memory profiles this request into data/profiles/ when
+    ALLOW_PROFILE_REQUESTS=true.
+    """
+    # Started on arrival so queue wait counts against the budget
+    deadline = Deadline(deadline_ms or PIPELINE_DEADLINE_MS)
+    filters = FactFilter.create(
+        sources=source, categories=category, since=since, until=until, last_days=last_days
+    )
+    if profile is not None:
+        if not PROFILE_REQUESTS_ALLOWED:
+            raise HTTPException(status_code=403, detail="Profiling requests is disabled (ALLOW_PROFILE_REQUESTS=false)")
+        if profile not in PROFILE_MODES:
+            raise HTTPException(status_code=400, detail=f"Unknown profile mode '{profile}'. Use one of: {', '.join(PROFILE_MODES)}")
+    if not admission_controller.enabled:
+        # Pipeline threads overlap while one waits on the LLM or the inference server
+        return await run_in_threadpool(
+            run_fact_checking_pipeline, text, filters=filters, deadline=deadline, profile=profile
+        )
+
+    # Buckets are keyed on who the caller provably is, never on a header it picks freely
+    authorization = request.headers.get("authorization", "")
+    api_key = authorization[7:] if authorization.lower().startswith("bearer ") else request.headers.get("x-api-key")
+    trusted = authenticate(api_key)
+    if api_key and trusted is None:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+    client_id = f"key:{trusted}" if trusted else f"addr:{request.client.host if request.client else 'unknown'}"
+
+    priority = (priority or request.headers.get("x-priority") or ADMISSION_DEFAULT_PRIORITY).lower()
+    if priority not in ADMISSION_PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"Unknown priority '{priority}'. Use one of: {', '.join(ADMISSION_PRIORITIES)}")
+    if priority in ADMISSION_TRUSTED_PRIORITIES and trusted is None:
+        raise HTTPException(status_code=403, detail=f"Priority '{priority}' needs an API key (ADMISSION_API_KEYS)")
+    try:
+        return await admission_controller.run(
+            client_id, priority, run_fact_checking_pipeline, text,
+            filters=filters, deadline=deadline, profile=profile
+        )
+    except Rejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))}
+        )
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(
+        metrics_collector.render_prometheus(),
+        media_type="text/plain; version=0.0.4"
+    )
+
+@app.on_event("startup")
+async def start_ingest():
+    """Keep the live index fresh when continuous ingest is enabled"""
+    # Shared-mode workers are read-only; a single private-mode ingest process publishes bundles
+    if INGEST_ENABLED and INDEX_SERVING_MODE != "shared":
+        from core.ingest import ingest_pipeline
+        ingest_pipeline.start_background()
+
+@app.on_event("startup")
+async def restore_warm_state():
+    """Restore cached verdicts/embeddings and warm the models in the background"""
+    if WARM_START_ENABLED:
+        warm_start.start()
+
+@app.on_event("shutdown")
+async def snapshot_warm_state():
+    if WARM_START_ENABLED:
+        warm_start.stop()
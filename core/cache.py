@@ -1,21 +1,32 @@
 # core/cache.py
 import json
 import hashlib
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 from pathlib import Path
 import logging
-from config import CACHE_PATH, CACHE_MAX_SIZE, CACHE_TTL_SECONDS
+import numpy as np
+from config import (
+    CACHE_PATH, CACHE_MAX_SIZE, CACHE_TTL_SECONDS,
+    EMBEDDING_CACHE_SIZE, EMBEDDING_CACHE_PATH, EMBEDDING_MODEL
+)
 
 logger = logging.getLogger(__name__)
 
 class QueryCache:
-    """LRU cache with TTL for query results"""
+    """
+    LRU cache with TTL for query results. An OrderedDict keeps entries in
+    recency order, so hits, inserts and evictions are O(1) and the cache
+    never holds more than max_size entries however many claims stream by.
+    """
     
     def __init__(self):
-        self.cache: Dict[str, Dict[str, Any]] = {}
+        self.cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
         self.max_size = CACHE_MAX_SIZE
         self.ttl_seconds = CACHE_TTL_SECONDS
+        self._lock = threading.Lock()
         self.load_from_disk()
     
     def get_cache_key(self, claim: str) -> str:
@@ -26,17 +37,20 @@ class QueryCache:
         """Retrieve cached result if exists and not expired"""
         key = self.get_cache_key(claim)
         
-        if key not in self.cache:
-            return None
-        
-        cached_item = self.cache[key]
-        cached_time = datetime.fromisoformat(cached_item['timestamp'])
-        
-        # Check if expired
-        if datetime.now() - cached_time > timedelta(seconds=self.ttl_seconds):
-            logger.info(f"Cache expired for key: {key[:8]}...")
-            del self.cache[key]
-            return None
+        with self._lock:
+            cached_item = self.cache.get(key)
+            if cached_item is None:
+                return None
+            
+            cached_time = datetime.fromisoformat(cached_item['timestamp'])
+            
+            # Check if expired
+            if datetime.now() - cached_time > timedelta(seconds=self.ttl_seconds):
+                logger.info(f"Cache expired for key: {key[:8]}...")
+                del self.cache[key]
+                return None
+            
+            self.cache.move_to_end(key)
         
         logger.info(f"Cache hit for key: {key[:8]}...")
         return cached_item['result']
@@ -45,33 +59,37 @@ class QueryCache:
         """Cache result with timestamp"""
         key = self.get_cache_key(claim)
         
-        # Evict oldest if at capacity
-        if len(self.cache) >= self.max_size:
-            oldest_key = min(
-                self.cache.keys(),
-                key=lambda k: self.cache[k]['timestamp']
-            )
-            del self.cache[oldest_key]
-            logger.info(f"Evicted oldest cache entry: {oldest_key[:8]}...")
-        
-        self.cache[key] = {
-            'result': result,
-            'timestamp': datetime.now().isoformat(),
-            'claim': claim[:100]  # Store truncated claim for debugging
-        }
+        with self._lock:
+            self.cache[key] = {
+                'result': result,
+                'timestamp': datetime.now().isoformat(),
+                'claim': claim[:100]  # Store truncated claim for debugging
+            }
+            self.cache.move_to_end(key)
+            
+            # Evict least recently used past capacity
+            while len(self.cache) > self.max_size:
+                oldest_key, _ = self.cache.popitem(last=False)
+                logger.info(f"Evicted least recently used cache entry: {oldest_key[:8]}...")
         logger.info(f"Cached result for key: {key[:8]}...")
     
     def clear(self):
         """Clear all cache"""
-        self.cache.clear()
+        with self._lock:
+            self.cache.clear()
         logger.info("Cache cleared")
     
     def save_to_disk(self):
         """Persist cache to disk"""
         try:
             CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
-            with open(CACHE_PATH, 'w') as f:
-                json.dump(self.cache, f, indent=2)
+            with self._lock:
+                snapshot = dict(self.cache)
+            # Written aside and swapped in, so a crash mid-write keeps the previous file
+            tmp_path = CACHE_PATH.with_name(CACHE_PATH.name + '.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(snapshot, f, indent=2)
+            tmp_path.replace(CACHE_PATH)
             logger.info(f"Cache saved to {CACHE_PATH}")
         except Exception as e:
             logger.error(f"Failed to save cache: {e}")
@@ -81,11 +99,14 @@ class QueryCache:
         try:
             if CACHE_PATH.exists():
                 with open(CACHE_PATH, 'r') as f:
-                    self.cache = json.load(f)
+                    entries = json.load(f)
+                # Oldest first, so the most recent max_size entries survive
+                newest = sorted(entries.items(), key=lambda item: item[1]['timestamp'])[-self.max_size:]
+                self.cache = OrderedDict(newest)
                 logger.info(f"Cache loaded from {CACHE_PATH} ({len(self.cache)} entries)")
         except Exception as e:
             logger.error(f"Failed to load cache: {e}")
-            self.cache = {}
+            self.cache = OrderedDict()
     
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
@@ -95,4 +116,86 @@ class QueryCache:
             'ttl_seconds': self.ttl_seconds
         }
 
-query_cache = QueryCache()
\ No newline at end of file
+class EmbeddingCache:
+    """
+    LRU cache of query embeddings, so repeated claims skip the embedding
+    model. Embeddings depend only on the model, not on the index, so
+    entries stay valid across index swaps; the file records the model
+    name and is ignored when it changes.
+    """
+    
+    def __init__(self, path: Path = EMBEDDING_CACHE_PATH, max_size: int = EMBEDDING_CACHE_SIZE):
+        self.path = path
+        self.max_size = max_size
+        self.cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+    
+    def get(self, text: str) -> Optional[np.ndarray]:
+        with self._lock:
+            vector = self.cache.get(text)
+            if vector is None:
+                self.misses += 1
+                return None
+            self.cache.move_to_end(text)
+            self.hits += 1
+        return vector
+    
+    def set(self, text: str, vector: np.ndarray):
+        with self._lock:
+            self.cache[text] = np.asarray(vector, dtype='float32').reshape(-1)
+            self.cache.move_to_end(text)
+            while len(self.cache) > self.max_size:
+                self.cache.popitem(last=False)
+    
+    def save_to_disk(self):
+        """Persist embeddings (least recently used first) to disk"""
+        with self._lock:
+            texts, vectors = list(self.cache.keys()), list(self.cache.values())
+        if not texts:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + '.tmp.npz')
+            np.savez(
+                tmp_path,
+                model=np.array(EMBEDDING_MODEL),
+                texts=np.array(json.dumps(texts)),
+                vectors=np.vstack(vectors)
+            )
+            tmp_path.replace(self.path)
+            logger.info(f"Embedding cache saved to {self.path} ({len(texts)} entries)")
+        except Exception as e:
+            logger.error(f"Failed to save embedding cache: {e}")
+    
+    def load_from_disk(self):
+        """Load embeddings from disk, unless they came from another model"""
+        try:
+            if self.path.exists():
+                with np.load(self.path) as data:
+                    if str(data['model']) != EMBEDDING_MODEL:
+                        logger.info(f"Ignoring embedding cache from model {data['model']}")
+                        return
+                    texts = json.loads(str(data['texts']))
+                    vectors = data['vectors']
+                newest = list(zip(texts, vectors))[-self.max_size:]
+                with self._lock:
+                    # Entries added since startup are newer than the snapshot
+                    restored = OrderedDict(newest)
+                    restored.update(self.cache)
+                    self.cache = restored
+                logger.info(f"Embedding cache loaded from {self.path} ({len(newest)} entries)")
+        except Exception as e:
+            logger.error(f"Failed to load embedding cache: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'size': len(self.cache),
+            'max_size': self.max_size,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0
+        }
+
+query_cache = QueryCache()
+embedding_cache = EmbeddingCache()
\ No newline at end of file
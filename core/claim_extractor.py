@@ -1,11 +1,11 @@
 # core/claim_extractor.py
-import spacy
 import logging
 import subprocess
 import sys
 import re
 from typing import List, Optional
-from config import SPACY_MODEL
+from core.inference import inference_client
+from config import SPACY_MODEL, INFERENCE_MODE
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -14,6 +14,14 @@ class ClaimExtractor:
     """Enhanced claim extraction with multiple strategies"""
     
     def __init__(self):
+        self.nlp = None
+        self.remote = INFERENCE_MODE == "server"  # Parse on the model server instead of in-process
+    
+    def _initialize_model(self):
+        """Lazy load SpaCy model (atomic claims never need it)"""
+        if self.nlp is not None:
+            return
+        import spacy
         logger.info(f"Loading SpaCy model '{SPACY_MODEL}'...")
         try:
             self.nlp = spacy.load(SPACY_MODEL)
@@ -27,17 +35,35 @@ class ClaimExtractor:
     
     def extract(self, text: str) -> str:
         """Extract main claim from text using multiple strategies"""
-        logger.info(f"Extracting claim from: {text[:100]}...")
-        
-        # Strategy 1: Clean and check if already atomic
-        cleaned = self._clean_text(text)
-        if self._is_atomic_claim(cleaned):
-            logger.info("Claim is already atomic, returning as-is")
-            return cleaned
+        if self.remote:
+            return inference_client.extract([text])[0]
+        return self.extract_batch([text])[0]
+    
+    def extract_batch(self, texts: List[str]) -> List[str]:
+        """Extract claims for many texts; those needing a parse go through nlp.pipe together"""
+        claims: List[Optional[str]] = [None] * len(texts)
+        to_parse = []
+        for i, text in enumerate(texts):
+            logger.info(f"Extracting claim from: {text[:100]}...")
+            
+            # Strategy 1: Clean and check if already atomic
+            cleaned = self._clean_text(text)
+            if self._is_atomic_claim(cleaned):
+                logger.info("Claim is already atomic, returning as-is")
+                claims[i] = cleaned
+            else:
+                to_parse.append((i, cleaned))
         
+        if to_parse:
+            self._initialize_model()
+            docs = self.nlp.pipe([cleaned for _, cleaned in to_parse])
+            for (i, cleaned), doc in zip(to_parse, docs):
+                claims[i] = self._extract_from_doc(doc, cleaned, texts[i])
+        return claims
+    
+    def _extract_from_doc(self, doc, cleaned: str, text: str) -> str:
+        """Strategies that need the parsed sentence"""
         # Strategy 2: Extract from complex sentence
-        doc = self.nlp(cleaned)
-        
         # Try dependency parsing
         claim = self._extract_via_dependency_parsing(doc)
         if claim:
@@ -0,0 +1,391 @@
+# core/contradiction.py
+"""
+Numeric and entity-aware contradiction detection.
+
+Each fact is parsed once, at index time, into structured features:
+quantities (value scaled to base units, unit or counted noun, currency),
+full dates, place names and whether the fact is itself a debunk
+("... is falsely shared as ..."). Features are stored as flat arrays
+aligned with fact ids. At query time only the claim is parsed, and the
+comparator flags a clear-cut mismatch against evidence about the same
+thing:
+
+    claim "241 GW of solar capacity"   vs  fact "250 GW of solar capacity"
+    claim "₹5 lakh"                    vs  fact "₹10 lakh"
+    claim "... held in Pakistan"       vs  fact "... held in India"
+    claim "... summit held in Pakistan" vs  fact "... summit held in India"
+
+Anything less certain (approximate or slightly rounded figures, several
+candidate values, bare years, places below country level, debunk articles,
+little shared context) is left to the LLM.
+
+    python -m core.contradiction     # rebuild features from the current index
+"""
+import json
+import logging
+import re
+import threading
+import zlib
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from core.verdict_index import STOPWORDS, normalize_text
+from config import (
+    CONTRADICTION_FEATURES_PATH, CONTRADICTION_MIN_OVERLAP, CONTRADICTION_TOLERANCE,
+    CONTRADICTION_ROUNDING_TOLERANCE
+)
+
+logger = logging.getLogger(__name__)
+
+# Words that never name what a number counts, and never count as shared context
+FUNCTION_WORDS = STOPWORDS | frozenset({
+    "is", "are", "was", "were", "be", "been", "has", "have", "had", "will", "from", "into",
+    "since", "than", "or", "over", "under", "about", "per", "more", "less", "i", "e", "up",
+    "during", "across", "after", "before", "till", "until", "this", "these", "those"
+})
+SCALES = {
+    "thousand": 1e3, "lakh": 1e5, "lakhs": 1e5, "million": 1e6, "crore": 1e7, "crores": 1e7,
+    "cr": 1e7, "billion": 1e9, "trillion": 1e12, "lakh crore": 1e12
+}
+UNITS = {  # unit word -> (dimension, factor to the base unit)
+    "gw": ("power", 1e9), "mw": ("power", 1e6), "kw": ("power", 1e3),
+    "gwh": ("energy", 1e9), "mwh": ("energy", 1e6), "kwh": ("energy", 1e3),
+    "km": ("length", 1e3), "kms": ("length", 1e3), "kilometres": ("length", 1e3), "kilometers": ("length", 1e3),
+    "tonnes": ("mass", 1e3), "tonne": ("mass", 1e3), "tons": ("mass", 1e3), "kg": ("mass", 1.0),
+    "hectares": ("area", 1.0), "hectare": ("area", 1.0),
+}
+CURRENCIES = {"₹": "inr", "rs": "inr", "inr": "inr", "rupees": "inr", "$": "usd", "usd": "usd", "dollars": "usd"}
+MONTHS = {m: i for i, m in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], start=1
+)}
+COUNTRIES = (
+    "india", "pakistan", "china", "bangladesh", "nepal", "sri lanka", "usa", "united states",
+    "england", "uk", "france", "germany", "japan", "russia", "iran", "israel", "qatar"
+)
+
+_MONTH = r'(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?'
+_DAY_FIRST = re.compile(r'\b(\d{1,2})(?:st|nd|rd|th)?\s+' + _MONTH + r',?\s+(\d{4})\b')
+_MONTH_FIRST = re.compile(r'\b' + _MONTH + r'\s+(\d{1,2})(?:st|nd|rd|th)?,?\s+(\d{4})\b')
+_UNIT_AHEAD = r'\s*(?:%|per\s*cent|percent|lakh|crore|cr\b|thousand|million|billion|trillion|gw|mw|kw|km|tonnes|kg)'
+_YEARS = re.compile(r'(?<![₹$\d,.])\b(?:fy\s*)?(?:19|20)\d{2}(?:\s*-\s*\d{2,4})?\b(?!' + _UNIT_AHEAD + ')')
+_QUANTITY = re.compile(
+    r'(₹|\brs\b\.?|\binr\b|\$|\busd\b)?\s*'
+    r'(\d+(?:,\d{2,3})*(?:\.\d+)?)(st|nd|rd|th)?\s*'
+    r'(%|per\s*cent\b|percent\b|lakh\s+crore\b|lakhs?\b|crores?\b|cr\b|thousand\b|million\b|billion\b|trillion\b)?'
+    r'(?:\s*(?:of\s+)?([a-z]+))?'
+)
+_APPROXIMATE = re.compile(
+    r'(more than|over|nearly|about|around|approximately|approx|at least|up to|upto|beyond|above|'
+    r'below|less than|almost|under|close to|~)\s*(₹|rs\.?|inr|\$|usd)?\s*$'
+)
+_PLACE = re.compile(r'\b(?:in|at|from|across)\s+((?:[A-Z][\w-]*)(?:\s+[A-Z][\w-]*)*)')
+_DEBUNK = re.compile(
+    r'\b(fake|false|falsely|deepfake|scripted|misleading|morphed|manipulated|doctored|hoax|'
+    r'not from|not show|old video|old photo|ai-generated|clipped)\b'
+)
+
+@dataclass
+class Quantity:
+    value: float
+    unit: str      # "power", "currency:inr", "percent", "count:<noun>", ...
+    approx: bool = False
+    step: float = 0.0  # Place value of the last significant digit, in base units ("250" -> 10); claims only
+    text: str = ""     # As written: "300 GW", "₹5 lakh"
+
+@dataclass
+class FactFeatures:
+    quantities: List[Quantity] = field(default_factory=list)
+    dates: List[int] = field(default_factory=list)  # Proleptic Gregorian ordinals
+    places: List[str] = field(default_factory=list)
+    debunk: bool = False
+
+@dataclass
+class Contradiction:
+    kind: str        # "quantity", "date" or "place"
+    claimed: str
+    found: str
+    evidence: str
+
+def _step(number: str) -> float:
+    """Place value of the last significant digit: "250" -> 10, "20,000" -> 1000, "2.45" -> 0.01"""
+    digits = number.replace(',', '')
+    if '.' in digits:
+        return 10.0 ** -len(digits.split('.')[1])
+    significant = digits.rstrip('0')
+    return 10.0 ** (len(digits) - len(significant)) if significant else 1.0
+
+def _to_date(day: str, month: str, year: str) -> Optional[int]:
+    try:
+        return date(int(year), MONTHS[month[:3]], int(day)).toordinal()
+    except (ValueError, KeyError):
+        return None
+
+def _unit_of(scale: Optional[str], word: Optional[str], currency: Optional[str]) -> Tuple[Optional[str], float]:
+    """(unit, factor) for the words around a number; unit None when it is unclear what is counted"""
+    if scale and (scale == '%' or scale.replace(' ', '') == 'percent'):
+        return "percent", 1.0
+    factor = SCALES.get(' '.join(scale.split()), 1.0) if scale else 1.0
+    if word in CURRENCIES:
+        currency = word
+    if currency:
+        return f"currency:{CURRENCIES[currency.rstrip('.')]}", factor
+    if word in UNITS:
+        dimension, unit_factor = UNITS[word]
+        return dimension, factor * unit_factor
+    if word and len(word) > 2 and word not in FUNCTION_WORDS and word not in SCALES:
+        # Counted noun: "219 advance pricing agreements" -> count:advance
+        return f"count:{word.rstrip('s') or word}", factor
+    return None, factor
+
+def extract_features(text: str) -> FactFeatures:
+    """Quantities, dates, places and the debunk flag of one statement"""
+    lowered = text.lower().replace('–', '-').replace('—', '-')
+    features = FactFeatures(debunk=bool(_DEBUNK.search(lowered)))
+
+    # Dates first; their numbers (and bare years) are not quantities
+    for match in _DAY_FIRST.finditer(lowered):
+        features.dates.append(_to_date(match.group(1), match.group(2), match.group(3)))
+    for match in _MONTH_FIRST.finditer(lowered):
+        features.dates.append(_to_date(match.group(2), match.group(1), match.group(3)))
+    features.dates = sorted({d for d in features.dates if d is not None})
+    # Masks keep offsets, so a quantity's span can be cut from the original text
+    mask = lambda m: ' ' + '§' * max(len(m.group(0)) - 2, 0) + ' '
+    masked = _MONTH_FIRST.sub(mask, _DAY_FIRST.sub(mask, lowered))
+    masked = _YEARS.sub(mask, masked)
+    written = text if len(text) == len(lowered) else lowered
+
+    for match in _QUANTITY.finditer(masked):
+        currency, number, ordinal, scale, word = match.groups()
+        if ordinal:
+            continue  # "14th conference", "16th to 31st"
+        try:
+            value = float(number.replace(',', ''))
+        except ValueError:
+            continue
+        unit, factor = _unit_of(scale, word, currency.strip() if currency else None)
+        if unit is None:
+            continue
+        approx = bool(_APPROXIMATE.search(masked[max(0, match.start(2) - 30):match.start(2)]))
+        # The trailing word belongs to the quantity only when it named the unit or counted noun
+        names_unit = word in CURRENCIES or unit != "percent" and not unit.startswith("currency:")
+        end = match.end(5) if word and names_unit else match.end(4) if scale else match.end(2)
+        features.quantities.append(Quantity(
+            value * factor, unit, approx, _step(number) * factor, written[match.start():end].strip()
+        ))
+
+    places = set()
+    for match in _PLACE.finditer(text):
+        # Title-case headlines run on past the name: "in Gandhinagar On the occasion"
+        words = []
+        for word in match.group(1).lower().split()[:2]:
+            if word in FUNCTION_WORDS:
+                break
+            words.append(word)
+        if words and words[0][:3] not in MONTHS:
+            places.add(' '.join(words))
+    places.update(c for c in COUNTRIES if re.search(rf'\b{c}\b', lowered))
+    features.places = sorted(p for p in places if len(p) > 2)
+    return features
+
+def _context_words(text: str, exclude: Sequence[str] = ()) -> set:
+    """Content words as 4-letter stems, so 'signs' and 'signed' share context"""
+    excluded = {w for phrase in exclude for w in phrase.split()}
+    return {
+        w[:4] for w in normalize_text(text).split()
+        if w not in FUNCTION_WORDS and w not in excluded and not any(ch.isdigit() for ch in w)
+    }
+
+def _same(a: float, b: float) -> bool:
+    return abs(a - b) <= CONTRADICTION_TOLERANCE * max(abs(a), abs(b), 1e-9)
+
+def _rounded(q: Quantity, value: float) -> bool:
+    """
+    Whether the claimed figure could be value rounded at its last significant
+    digit ("2,450 crore" for 2,447), within a small relative band, so "100"
+    never passes for 60. Percentages are never rounded: "10 percent" vs "14".
+    """
+    if q.unit == "percent":
+        return False
+    difference = abs(q.value - value)
+    return difference < q.step / 2 and difference <= CONTRADICTION_ROUNDING_TOLERANCE * abs(value)
+
+def _format(q: Quantity) -> str:
+    """The figure as written; features saved before spans were kept fall back to the scaled value"""
+    return q.text or f"{q.value:,.6g} ({q.unit.split(':')[-1]})"
+
+def context_overlap(claim: str, claim_features: FactFeatures, evidence: str, evidence_features: FactFeatures) -> float:
+    """
+    Share of the claim's content words (places and numbers aside) that the
+    evidence also has; 0 when the evidence lacks one of the claim's named
+    entities, since "inauguration of Kaynes Semicon Plant" and "inauguration
+    of Samrat Samprati Museum" are different events however many words they share.
+    """
+    claim_context = _context_words(claim, claim_features.places)
+    if not claim_context:
+        return 0.0
+    evidence_context = _context_words(evidence, evidence_features.places)
+    entities = _context_words(' '.join(re.findall(r'\b[A-Z][\w-]*', claim)), claim_features.places)
+    if not entities <= evidence_context:
+        return 0.0
+    return len(claim_context & evidence_context) / len(claim_context)
+
+def compare(claim: str, claim_features: FactFeatures, evidence: str, evidence_features: FactFeatures) -> Optional[Contradiction]:
+    """A clear-cut mismatch between the claim and one evidence item about the same thing, or None"""
+    if claim_features.debunk or evidence_features.debunk:
+        return None  # Debunks quote the false claim; leave those to the LLM
+
+    for q in claim_features.quantities:
+        if q.approx:
+            continue
+        candidates = [e for e in evidence_features.quantities if e.unit == q.unit]
+        if any(_same(q.value, e.value) or _rounded(q, e.value) for e in candidates):
+            continue
+        # Exactly one exact figure for the same unit, and it differs
+        if len(candidates) == 1 and not candidates[0].approx:
+            return Contradiction("quantity", _format(q), _format(candidates[0]), evidence)
+
+    if len(claim_features.dates) == 1 and len(evidence_features.dates) == 1:
+        if claim_features.dates[0] != evidence_features.dates[0]:
+            claimed, found = (date.fromordinal(d).isoformat() for d in (claim_features.dates[0], evidence_features.dates[0]))
+            return Contradiction("date", claimed, found, evidence)
+
+    # Only countries are compared: without a gazetteer of which place lies in
+    # which, "Gujarat" or "Ahmedabad district" vs "Sanand" is left to the LLM
+    evidence_lowered, claim_lowered = evidence.lower(), claim.lower()
+    claimed = [p for p in claim_features.places if p in COUNTRIES]
+    found = [p for p in evidence_features.places if p in COUNTRIES]
+    if claimed and found and not any(p in evidence_lowered for p in claimed) \
+            and not any(p in claim_lowered for p in found):
+        return Contradiction("place", ", ".join(claimed), ", ".join(found), evidence)
+    return None
+
+class ContradictionDetector:
+    """
+    Fact features persisted as flat arrays aligned with fact ids (quantities
+    and dates in CSR layout, units and places as codes into a small
+    vocabulary), so a sync only parses facts added since the last one.
+    """
+
+    def __init__(self):
+        self.path = CONTRADICTION_FEATURES_PATH
+        self.features: List[FactFeatures] = []
+        self.checksums: List[int] = []  # crc32 of each fact, so a rebuilt store never serves stale features
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return len(self.features)
+
+    def _load(self):
+        try:
+            if self.path.exists():
+                with np.load(self.path) as data:
+                    vocab = json.loads(str(data['vocab']))
+                    q_ptr, q_values, q_units, q_approx = data['q_ptr'], data['q_values'], data['q_units'], data['q_approx']
+                    q_text = data['q_text'] if 'q_text' in data.files else np.full(len(q_values), "")
+                    d_ptr, d_values = data['d_ptr'], data['d_values']
+                    p_ptr, p_codes = data['p_ptr'], data['p_codes']
+                    debunk = data['debunk']
+                    self.checksums = [int(c) for c in data['checksums']]
+                self.features = [
+                    FactFeatures(
+                        quantities=[
+                            Quantity(float(q_values[j]), vocab[q_units[j]], bool(q_approx[j]), text=str(q_text[j]))
+                            for j in range(q_ptr[i], q_ptr[i + 1])
+                        ],
+                        dates=[int(d) for d in d_values[d_ptr[i]:d_ptr[i + 1]]],
+                        places=[vocab[c] for c in p_codes[p_ptr[i]:p_ptr[i + 1]]],
+                        debunk=bool(debunk[i]),
+                    )
+                    for i in range(len(debunk))
+                ]
+                logger.info(f"Loaded contradiction features for {self.size} facts")
+        except Exception as e:
+            logger.error(f"Failed to load contradiction features: {e}")
+        self._loaded = True
+
+    def save(self):
+        vocab: Dict[str, int] = {}
+        code = lambda s: vocab.setdefault(s, len(vocab))
+        with self._lock:
+            features, checksums = list(self.features), list(self.checksums)
+        q_units = [code(q.unit) for f in features for q in f.quantities]
+        p_codes = [code(p) for f in features for p in f.places]
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + '.tmp.npz')
+            np.savez(
+                tmp_path,
+                vocab=np.array(json.dumps(list(vocab))),
+                q_ptr=np.cumsum([0] + [len(f.quantities) for f in features]).astype(np.int64),
+                q_values=np.array([q.value for f in features for q in f.quantities], dtype=np.float64),
+                q_units=np.array(q_units, dtype=np.int32),
+                q_approx=np.array([q.approx for f in features for q in f.quantities], dtype=bool),
+                q_text=np.array([q.text for f in features for q in f.quantities], dtype=str),
+                d_ptr=np.cumsum([0] + [len(f.dates) for f in features]).astype(np.int64),
+                d_values=np.array([d for f in features for d in f.dates], dtype=np.int32),
+                p_ptr=np.cumsum([0] + [len(f.places) for f in features]).astype(np.int64),
+                p_codes=np.array(p_codes, dtype=np.int32),
+                debunk=np.array([f.debunk for f in features], dtype=bool),
+                checksums=np.array(checksums, dtype=np.uint32),
+            )
+            tmp_path.replace(self.path)
+        except Exception as e:
+            logger.error(f"Failed to save contradiction features: {e}")
+
+    def sync(self, facts: Sequence[str], rebuild: bool = False):
+        """Parse the facts not seen yet (all of them with rebuild=True)"""
+        with self._lock:
+            if not self._loaded and not rebuild:
+                self._load()
+            self._loaded = True
+            if rebuild or self.size > len(facts):
+                self.features, self.checksums = [], []
+            known = self.size
+            if known < len(facts):
+                new = [facts[i] for i in range(known, len(facts))]
+                self.features.extend(extract_features(fact) for fact in new)
+                self.checksums.extend(zlib.crc32(fact.encode('utf-8')) for fact in new)
+                logger.info(f"Extracted contradiction features for {len(facts) - known} facts")
+
+    def features_of(self, fact_id: Optional[int], text: str) -> FactFeatures:
+        """Stored features when the id is known and current, else parsed now"""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._load()
+        if fact_id is not None and fact_id < self.size and self.checksums[fact_id] == zlib.crc32(text.encode('utf-8')):
+            return self.features[fact_id]
+        return extract_features(text)
+
+    def check(self, claim: str, evidence: List[str], evidence_ids: Optional[List[int]] = None) -> Optional[Contradiction]:
+        """
+        Compare the claim with the evidence item that shares the most context
+        with it (earlier items win ties). Other items may describe similar
+        events, so they never produce a contradiction on their own.
+        """
+        claim_features = extract_features(claim)
+        if not (claim_features.quantities or claim_features.dates or claim_features.places):
+            return None
+
+        best, best_overlap = None, CONTRADICTION_MIN_OVERLAP
+        for i, item in enumerate(evidence):
+            fact_id = evidence_ids[i] if evidence_ids and i < len(evidence_ids) else None
+            features = self.features_of(fact_id, item)
+            overlap = context_overlap(claim, claim_features, item, features)
+            if overlap > best_overlap or best is None and overlap >= best_overlap:
+                best, best_overlap = (item, features), overlap
+        if best is None:
+            return None  # No evidence is about the same thing
+        return compare(claim, claim_features, best[0], best[1])
+
+contradiction_detector = ContradictionDetector()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    from core.vector_db import vector_db
+    contradiction_detector.sync(vector_db.snapshot.facts, rebuild=True)
+    contradiction_detector.save()
+    print(f"Contradiction features for {contradiction_detector.size} facts -> {contradiction_detector.path}")
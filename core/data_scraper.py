@@ -1,80 +1,159 @@
 # core/data_scraper.py
-import requests
+import asyncio
+import copy
+import json
+import httpx
 from bs4 import BeautifulSoup
 import feedparser
 import pandas as pd
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional, Any
 import logging
 from config import (
     PIB_RSS_URL, FACTLY_RSS_URL, WEBQOOF_RSS_URL, 
-    NEWSCHECKER_RSS_URL, FACTS_CSV_PATH, SCRAPE_LIMIT_PER_SOURCE
+    NEWSCHECKER_RSS_URL, SCRAPE_LIMIT_PER_SOURCE,
+    SCRAPE_STATE_PATH, SCRAPE_TIMEOUT_SECONDS, SCRAPE_MAX_CONNECTIONS,
+    SCRAPE_SEEN_LIMIT, DEDUP_ENABLED
 )
+from core.dedup import near_duplicate_detector
+from core.fact_store import fact_store
 
 logger = logging.getLogger(__name__)
 
+# Use custom headers to avoid bot-blocking
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
 class DataScraper:
     """Scrapes verified facts from trusted sources"""
     
-    def __init__(self):
-        self.sources = {
+    def __init__(self, sources: Optional[Dict[str, str]] = None):
+        self.sources = sources or {
             'PIB India': PIB_RSS_URL,
             'Factly': FACTLY_RSS_URL,
             'WebQoof (The Quint)': WEBQOOF_RSS_URL,
             'Newschecker': NEWSCHECKER_RSS_URL
         }
+        self.state_path = SCRAPE_STATE_PATH
+        self.state: Dict[str, Dict[str, Any]] = self._load_state()
+        # State advanced by the latest scrape; becomes self.state once its facts are stored
+        self.pending_state: Optional[Dict[str, Dict[str, Any]]] = None
+    
+    def _load_state(self) -> Dict[str, Dict[str, Any]]:
+        """Per-source ETag/Last-Modified and recently seen entry ids"""
+        try:
+            if self.state_path.exists():
+                with open(self.state_path, 'r') as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to load scrape state: {e}")
+        return {}
+    
+    def commit_state(self):
+        """
+        Keep the ETags and seen ids of the latest scrape. Call only after its
+        facts are stored and indexed; until then a failed pass re-fetches them.
+        """
+        if self.pending_state is None:
+            return
+        self.state, self.pending_state = self.pending_state, None
+        self.save_state()
     
-    def _scrape_rss(self, source_name: str, url: str) -> List[Dict[str, str]]:
-        """Generic RSS scraper for fact-checking sources"""
+    def save_state(self):
+        try:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.state_path, 'w') as f:
+                json.dump(self.state, f)
+        except Exception as e:
+            logger.error(f"Failed to save scrape state: {e}")
+    
+    def _parse_entries(self, source_name: str, content: bytes) -> List[Dict[str, str]]:
+        """Turn a feed body into fact rows, skipping entries seen in earlier scrapes"""
+        feed = feedparser.parse(content)
+        source_state = self.pending_state.setdefault(source_name, {})
+        seen = source_state.get('seen', [])
+        seen_set = set(seen)
+        
+        facts = []
+        skipped = 0
+        
+        # Use limit from config
+        entries = feed.entries[:SCRAPE_LIMIT_PER_SOURCE]
+        
+        for entry in entries:
+            # Skip known entries before paying for the HTML cleanup
+            entry_id = entry.get('id') or entry.get('guid') or entry.get('link', '')
+            if entry_id and entry_id in seen_set:
+                skipped += 1
+                continue
+            if entry_id:
+                seen.append(entry_id)
+                seen_set.add(entry_id)
+            
+            # More robust content extraction
+            content = entry.get('summary', 
+                               entry.get('description', 
+                                        entry.get('content', [{'value': ''}])[0].get('value', '')))
+            
+            # Clean HTML if present
+            clean_content = BeautifulSoup(content, "html.parser").get_text()
+            
+            # Title often contains the core claim in fact-check feeds
+            title = entry.get('title', '')
+            
+            # Heuristic: Prefer the title for government releases, 
+            # but the summary/description for factcheckers (which often debunk the title)
+            if source_name == 'PIB India':
+                statement = title
+            else:
+                # For fact checkers, the title is usually "Fact Check: [Claim]"
+                # We want to extract the claim part
+                statement = title.replace("Fact Check:", "").replace("FACT CHECK:", "").strip()
+                if len(statement.split()) < 4:
+                    statement = clean_content
+            
+            statement = self._clean_text(statement)
+            
+            # Lower the threshold slightly to accept more facts
+            if len(statement.split()) > 4:
+                facts.append({
+                    'statement': statement,
+                    'source': source_name,
+                    'url': entry.get('link', ''),
+                    'date': entry.get('published', datetime.now().isoformat()),
+                    'category': 'fact_check' if source_name != 'PIB India' else 'government_announcement'
+                })
+        
+        # Keep the seen list bounded; feeds only ever show their latest entries
+        source_state['seen'] = seen[-SCRAPE_SEEN_LIMIT:]
+        if skipped:
+            logger.info(f"Skipped {skipped} already-seen entries from {source_name}")
+        return facts
+    
+    async def _scrape_rss(self, client: httpx.AsyncClient, source_name: str, url: str) -> List[Dict[str, str]]:
+        """Conditionally fetch one RSS feed; unchanged feeds answer 304 and yield nothing"""
         try:
             logger.info(f"Scraping {source_name} from {url}...")
             
-            # Use custom headers to avoid bot-blocking
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            response = requests.get(url, headers=headers, timeout=15)
-            feed = feedparser.parse(response.content)
+            source_state = self.pending_state.setdefault(source_name, {})
+            headers = {}
+            if source_state.get('etag'):
+                headers['If-None-Match'] = source_state['etag']
+            if source_state.get('last_modified'):
+                headers['If-Modified-Since'] = source_state['last_modified']
             
-            facts = []
+            response = await client.get(url, headers=headers)
+            if response.status_code == 304:
+                logger.info(f"✓ {source_name} unchanged since last scrape (304)")
+                return []
+            response.raise_for_status()
             
-            # Use limit from config
-            entries = feed.entries[:SCRAPE_LIMIT_PER_SOURCE]
+            if response.headers.get('ETag'):
+                source_state['etag'] = response.headers['ETag']
+            if response.headers.get('Last-Modified'):
+                source_state['last_modified'] = response.headers['Last-Modified']
             
-            for entry in entries:
-                # More robust content extraction
-                content = entry.get('summary', 
-                                   entry.get('description', 
-                                            entry.get('content', [{'value': ''}])[0].get('value', '')))
-                
-                # Clean HTML if present
-                clean_content = BeautifulSoup(content, "html.parser").get_text()
-                
-                # Title often contains the core claim in fact-check feeds
-                title = entry.get('title', '')
-                
-                # Heuristic: Prefer the title for government releases, 
-                # but the summary/description for factcheckers (which often debunk the title)
-                if source_name == 'PIB India':
-                    statement = title
-                else:
-                    # For fact checkers, the title is usually "Fact Check: [Claim]"
-                    # We want to extract the claim part
-                    statement = title.replace("Fact Check:", "").replace("FACT CHECK:", "").strip()
-                    if len(statement.split()) < 4:
-                        statement = clean_content
-                
-                statement = self._clean_text(statement)
-                
-                # Lower the threshold slightly to accept more facts
-                if len(statement.split()) > 4:
-                    facts.append({
-                        'statement': statement,
-                        'source': source_name,
-                        'url': entry.get('link', ''),
-                        'date': entry.get('published', datetime.now().isoformat()),
-                        'category': 'fact_check' if source_name != 'PIB India' else 'government_announcement'
-                    })
+            # Parsing is CPU-bound; keep it off the event loop
+            facts = await asyncio.to_thread(self._parse_entries, source_name, response.content)
             
             logger.info(f"✓ Successfully scraped {len(facts)} facts from {source_name}")
             return facts
@@ -83,6 +162,20 @@ class DataScraper:
             logger.error(f"Error scraping {source_name}: {e}")
             return []
     
+    async def _scrape_all_async(self) -> List[Dict[str, str]]:
+        """Fetch every source concurrently over one pooled client"""
+        limits = httpx.Limits(max_connections=SCRAPE_MAX_CONNECTIONS)
+        async with httpx.AsyncClient(
+            headers={'User-Agent': USER_AGENT},
+            timeout=SCRAPE_TIMEOUT_SECONDS,
+            limits=limits,
+            follow_redirects=True
+        ) as client:
+            results = await asyncio.gather(*[
+                self._scrape_rss(client, name, url) for name, url in self.sources.items()
+            ])
+        return [fact for source_facts in results for fact in source_facts]
+    
     
     def _clean_text(self, text: str) -> str:
         """Clean scraped text"""
@@ -96,49 +189,42 @@ class DataScraper:
         return text
     
     def scrape_all_sources(self) -> pd.DataFrame:
-        """Scrape all configured sources and return DataFrame"""
-        all_facts = []
-        
-        for name, url in self.sources.items():
-            source_facts = self._scrape_rss(name, url)
-            all_facts.extend(source_facts)
+        """
+        Scrape all configured sources and return DataFrame of new entries.
+        The feed state is only persisted by commit_state().
+        """
+        self.pending_state = copy.deepcopy(self.state)
+        all_facts = asyncio.run(self._scrape_all_async())
         
         if len(all_facts) == 0:
-            logger.error("No facts scraped from any source!")
+            logger.warning("No new facts scraped from any source")
             return pd.DataFrame(columns=['statement', 'source', 'url', 'date', 'category'])
         
         df = pd.DataFrame(all_facts)
         return df
     
-    def upsert_to_csv(self, new_df: pd.DataFrame) -> pd.DataFrame:
-        """Merge new facts with existing ones, deduplicating by statement and URL"""
-        if FACTS_CSV_PATH.exists():
-            try:
-                existing_df = pd.read_csv(FACTS_CSV_PATH)
-                logger.info(f"Loaded {len(existing_df)} existing facts from storage")
-                
-                # Combine and deduplicate
-                combined_df = pd.concat([existing_df, new_df], ignore_index=True)
-                
-                # Deduplicate based on statement (semantic) and URL (source-level)
-                initial_count = len(combined_df)
-                combined_df.drop_duplicates(subset=['statement'], keep='first', inplace=True)
-                combined_df.drop_duplicates(subset=['url'], keep='first', inplace=True, ignore_index=True)
-                
-                new_added = len(combined_df) - len(existing_df)
-                logger.info(f"Added {new_added} unique new facts. Total in storage: {len(combined_df)}")
-                
-                df_to_save = combined_df
-            except Exception as e:
-                logger.error(f"Error merging with existing CSV: {e}. Overwriting with new data.")
-                df_to_save = new_df
-        else:
-            logger.info("No existing storage found. Creating new fact database.")
-            df_to_save = new_df
+    def upsert_facts(self, new_df: pd.DataFrame) -> List[Dict[str, Any]]:
+        """
+        Store new facts; the fact store's unique indexes drop exact statement/URL
+        duplicates and near-duplicates are linked to their canonical fact.
+        Returns: the newly stored rows with their fact ids
+        """
+        inserted = fact_store.upsert(new_df.to_dict('records'))
+        if inserted and DEDUP_ENABLED:
+            start_id = inserted[0]['fact_id']
+            # Only rows the detector has not seen yet (all of them once per process)
+            synced = near_duplicate_detector.synced
+            existing = fact_store.since(synced)[:start_id - synced]
+            near_duplicate_detector.sync([r['statement'] for r in existing], existing, start=synced)
+            links = near_duplicate_detector.assign([r['statement'] for r in inserted], start_id=start_id)
+            for row, link in zip(inserted, links):
+                row['canonical_id'] = link
+            fact_store.set_canonical({
+                row['fact_id']: row['canonical_id'] for row in inserted if row['canonical_id'] is not None
+            })
+            near_duplicate_detector.save()
         
-        # Save to CSV
-        df_to_save.to_csv(FACTS_CSV_PATH, index=False)
-        logger.info(f"Successfully saved {len(df_to_save)} facts to {FACTS_CSV_PATH}")
-        return df_to_save
+        logger.info(f"Stored {len(inserted)} new facts. Total in storage: {fact_store.count()}")
+        return inserted
 
 data_scraper = DataScraper()
@@ -0,0 +1,37 @@
+# core/deadline.py
+import logging
+import math
+import time
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+class Deadline:
+    """
+    Time budget for one request. Created when the request arrives and passed
+    down the pipeline; each stage checks what is left before it starts and
+    records the degradation it chose instead of overrunning.
+    """
+
+    def __init__(self, budget_ms: Optional[float] = None):
+        self.budget_ms = budget_ms or None
+        self.expires_at = time.monotonic() + self.budget_ms / 1000 if self.budget_ms else None
+        self.degradations: List[str] = []
+
+    @property
+    def bounded(self) -> bool:
+        return self.expires_at is not None
+
+    def remaining_ms(self) -> float:
+        if self.expires_at is None:
+            return math.inf
+        return max((self.expires_at - time.monotonic()) * 1000, 0.0)
+
+    def below(self, ms: float) -> bool:
+        """True when less than ms of the budget is left"""
+        return self.remaining_ms() < ms
+
+    def degrade(self, name: str):
+        if name not in self.degradations:
+            self.degradations.append(name)
+            logger.info(f"Degraded: {name} ({self.remaining_ms():.0f}ms left)")
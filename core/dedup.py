@@ -0,0 +1,200 @@
+# core/dedup.py
+import logging
+import re
+import threading
+import zlib
+from typing import List, Dict, Optional, Any
+import numpy as np
+import pandas as pd
+from config import (
+    DEDUP_NUM_PERM, DEDUP_BANDS, DEDUP_SHINGLE_SIZE,
+    DEDUP_JACCARD_THRESHOLD, DEDUP_SIGNATURES_PATH
+)
+
+logger = logging.getLogger(__name__)
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_MONTH = r'(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)'
+# Numbers, and month names written next to one ("March 2023", "5th March")
+_FIGURE = re.compile(
+    r'(\d+(?:[.,]\d+)*)|\b' + _MONTH + r'\b(?=\.?,?\s+\d)|(?<=\d)(?:st|nd|rd|th)?\s+' + _MONTH + r'\b',
+    re.IGNORECASE
+)
+
+def canonical_id_of(meta: Optional[Dict[str, Any]]) -> Optional[int]:
+    """The fact this row duplicates, or None when the row is itself canonical"""
+    if not meta:
+        return None
+    value = meta.get('canonical_id')
+    if value is None or pd.isna(value):
+        return None
+    return int(value)
+
+def figures_of(text: str) -> str:
+    """
+    The numbers and month names in a statement, as a comparable key. Updated
+    figures ("241 GW ... 2023" vs "250 GW ... 2024") read almost the same, so
+    two statements are only ever duplicates when these match exactly.
+    """
+    found = set()
+    for number, month, month_after_day in _FIGURE.findall(text):
+        if number:
+            found.add(number.replace(',', ''))
+        else:
+            found.add((month or month_after_day).lower()[:3])  # "March" and "Mar" are one month
+    return ' '.join(sorted(found))
+
+def searchable_mask(metadata: Optional[List[Dict]], size: int) -> np.ndarray:
+    """Rows that get indexed; near-duplicates stay in the store but point at their canonical fact"""
+    if not metadata:
+        return np.ones(size, dtype=bool)
+    return np.array([canonical_id_of(m) is None for m in metadata], dtype=bool)
+
+class NearDuplicateDetector:
+    """
+    MinHash LSH over word shingles. Only canonical facts are bucketed, so a
+    match is always the canonical row. Signatures are persisted aligned with
+    fact ids, so each sync only hashes rows added since the last one.
+    """
+
+    def __init__(
+        self,
+        num_perm: int = DEDUP_NUM_PERM,
+        bands: int = DEDUP_BANDS,
+        threshold: float = DEDUP_JACCARD_THRESHOLD
+    ):
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.path = DEDUP_SIGNATURES_PATH
+
+        rng = np.random.RandomState(1)
+        self._a = rng.randint(1, 1 << 31, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, 1 << 31, size=num_perm).astype(np.uint64)
+
+        self.signatures = np.empty((0, num_perm), dtype=np.uint32)
+        self.figures: List[str] = []  # figures_of() per fact id; cheap, so kept in memory only
+        self.synced = 0  # Fact ids below this are bucketed and have figures
+        self.buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _shingles(self, text: str) -> List[str]:
+        tokens = re.findall(r'\w+', text.lower())
+        if len(tokens) <= DEDUP_SHINGLE_SIZE:
+            return [' '.join(tokens)]
+        return [' '.join(tokens[i:i + DEDUP_SHINGLE_SIZE]) for i in range(len(tokens) - DEDUP_SHINGLE_SIZE + 1)]
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature: per permutation, the minimum hash over all shingles"""
+        hashes = np.array([zlib.crc32(s.encode('utf-8')) for s in self._shingles(text)], dtype=np.uint64)
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def _band_keys(self, sig: np.ndarray) -> List[bytes]:
+        return [sig[b * self.rows:(b + 1) * self.rows].tobytes() for b in range(self.bands)]
+
+    def _insert(self, fact_id: int, sig: np.ndarray):
+        for band, key in zip(self.buckets, self._band_keys(sig)):
+            band.setdefault(key, []).append(fact_id)
+
+    def _find(self, sig: np.ndarray, figures: str) -> Optional[int]:
+        """Best canonical candidate with the same figures whose estimated Jaccard clears the threshold"""
+        candidates = set()
+        for band, key in zip(self.buckets, self._band_keys(sig)):
+            candidates.update(band.get(key, ()))
+        candidates = {c for c in candidates if self.figures[c] == figures}
+        if not candidates:
+            return None
+
+        ids = np.fromiter(candidates, dtype=np.int64)
+        similarity = (self.signatures[ids] == sig).mean(axis=1)
+        best = int(similarity.argmax())
+        return int(ids[best]) if similarity[best] >= self.threshold else None
+
+    def _load(self):
+        try:
+            if self.path.exists():
+                signatures = np.load(self.path)
+                if signatures.shape[1:] == (self.num_perm,):
+                    self.signatures = signatures
+        except Exception as e:
+            logger.error(f"Failed to load MinHash signatures: {e}")
+        self._loaded = True
+
+    def save(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + '.tmp.npy')
+            np.save(tmp_path, self.signatures)
+            tmp_path.replace(self.path)
+        except Exception as e:
+            logger.error(f"Failed to save MinHash signatures: {e}")
+
+    def sync(self, statements: List[str], metadata: Optional[List[Dict]] = None, start: int = 0):
+        """
+        Bring signatures and buckets in line with the stored facts (hashing only
+        unseen rows). statements[i] and metadata[i] are fact id start + i, so
+        callers can pass only the rows from self.synced on; buckets live in
+        memory, so a fresh detector needs every row once.
+        """
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if start > self.synced:
+                raise ValueError(f"Fact ids {self.synced}-{start - 1} were never synced")
+
+            total = start + len(statements)
+            if len(self.signatures) > total:
+                # The store was rebuilt underneath us; start over
+                if start:
+                    raise ValueError("The fact store shrank; sync from fact id 0")
+                self.signatures = self.signatures[:0]
+                self.figures = []
+                self.buckets = [{} for _ in range(self.bands)]
+                self.synced = 0
+            known = len(self.signatures)
+            if known < total:
+                new_sigs = np.array([self.signature(s) for s in statements[known - start:]], dtype=np.uint32)
+                self.signatures = np.vstack([self.signatures, new_sigs])
+                logger.info(f"Hashed {len(new_sigs)} facts for near-duplicate detection")
+
+            for fact_id in range(self.synced, total):
+                meta = metadata[fact_id - start] if metadata and fact_id - start < len(metadata) else None
+                self.figures.append(figures_of(statements[fact_id - start]))
+                if canonical_id_of(meta) is None:
+                    self._insert(fact_id, self.signatures[fact_id])
+            self.synced = max(self.synced, total)
+
+    def assign(self, statements: List[str], start_id: int) -> List[Optional[int]]:
+        """
+        Link new rows (fact ids start_id, start_id+1, ...) to existing canonical
+        facts. Rows are indexed as they go, so duplicates inside the batch are
+        caught too. Call sync() first.
+        Returns: canonical fact id per row, or None for new canonical facts
+        """
+        with self._lock:
+            links = []
+            for offset, statement in enumerate(statements):
+                fact_id = start_id + offset
+                sig = self.signature(statement)
+                figures = figures_of(statement)
+                canonical = self._find(sig, figures)
+
+                if fact_id == len(self.signatures):
+                    self.signatures = np.vstack([self.signatures, sig[None, :]])
+                if fact_id == self.synced:
+                    self.figures.append(figures)
+                    if canonical is None:
+                        self._insert(fact_id, sig)
+                    self.synced += 1
+                links.append(canonical)
+
+            found = sum(link is not None for link in links)
+            if found:
+                logger.info(f"Linked {found}/{len(statements)} new facts to existing canonical facts")
+            return links
+
+near_duplicate_detector = NearDuplicateDetector()
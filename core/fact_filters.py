@@ -0,0 +1,154 @@
+# core/fact_filters.py
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+import numpy as np
+from core.dedup import searchable_mask
+
+def parse_published(value: Any) -> Optional[datetime]:
+    """Parse a feed date (RFC 822 from RSS or ISO 8601) into an aware UTC datetime"""
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+def _normalize(values: Optional[Iterable[str]]) -> Optional[Tuple[str, ...]]:
+    if not values:
+        return None
+    return tuple(sorted({v.strip().lower() for v in values if v and v.strip()})) or None
+
+@dataclass(frozen=True)
+class FactFilter:
+    """Restricts retrieval to facts matching every given attribute (values within one attribute are OR-ed)"""
+    sources: Optional[Tuple[str, ...]] = None
+    categories: Optional[Tuple[str, ...]] = None
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+
+    @classmethod
+    def create(
+        cls,
+        sources: Optional[Iterable[str]] = None,
+        categories: Optional[Iterable[str]] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        last_days: Optional[int] = None
+    ) -> Optional['FactFilter']:
+        """Build a filter from loose inputs. Returns None when nothing is restricted."""
+        if last_days:
+            since = datetime.now(timezone.utc) - timedelta(days=last_days)
+        # Naive bounds are taken as UTC, like undated-timezone feed entries
+        since = since.replace(tzinfo=timezone.utc) if since and since.tzinfo is None else since
+        until = until.replace(tzinfo=timezone.utc) if until and until.tzinfo is None else until
+        filters = cls(
+            sources=_normalize(sources),
+            categories=_normalize(categories),
+            since=since,
+            until=until
+        )
+        return None if filters.is_empty() else filters
+
+    def is_empty(self) -> bool:
+        return not (self.sources or self.categories or self.since or self.until)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'sources': list(self.sources) if self.sources else None,
+            'categories': list(self.categories) if self.categories else None,
+            'since': self.since.isoformat() if self.since else None,
+            'until': self.until.isoformat() if self.until else None,
+        }
+
+class FilterIndex:
+    """
+    Per-attribute id bitmaps (bool arrays indexed by fact id) and a publish
+    timestamp array, built once per snapshot. A filter resolves to one
+    vectorized AND/OR over these arrays.
+    """
+
+    def __init__(
+        self,
+        by_source: Dict[str, np.ndarray],
+        by_category: Dict[str, np.ndarray],
+        timestamps: np.ndarray,
+        searchable: np.ndarray
+    ):
+        self.by_source = by_source
+        self.by_category = by_category
+        self.timestamps = timestamps  # Unix seconds, NaN when the date is unknown
+        self.searchable = searchable
+        self.size = len(searchable)
+
+    @staticmethod
+    def _columns(metadata: List[Dict]) -> Tuple[List[str], List[str], np.ndarray, np.ndarray]:
+        sources = [str(m.get('source') or '').strip().lower() for m in metadata]
+        categories = [str(m.get('category') or '').strip().lower() for m in metadata]
+        timestamps = np.full(len(metadata), np.nan)
+        for i, m in enumerate(metadata):
+            published = parse_published(m.get('date'))
+            if published is not None:
+                timestamps[i] = published.timestamp()
+        searchable = searchable_mask(metadata, len(metadata))
+        return sources, categories, timestamps, searchable
+
+    @staticmethod
+    def _bitmaps(
+        values: List[str], existing: Dict[str, np.ndarray], offset: int
+    ) -> Dict[str, np.ndarray]:
+        size = offset + len(values)
+        bitmaps = {}
+        for key in set(existing) | set(values):
+            bitmap = np.zeros(size, dtype=bool)
+            if key in existing:
+                bitmap[:offset] = existing[key]
+            bitmaps[key] = bitmap
+        for i, value in enumerate(values):
+            bitmaps[value][offset + i] = True
+        return bitmaps
+
+    @classmethod
+    def from_metadata(cls, metadata: Optional[List[Dict]], size: int) -> 'FilterIndex':
+        if not metadata:
+            return cls({}, {}, np.full(size, np.nan), searchable_mask(None, size))
+        sources, categories, timestamps, searchable = cls._columns(metadata)
+        return cls(cls._bitmaps(sources, {}, 0), cls._bitmaps(categories, {}, 0), timestamps, searchable)
+
+    def extend(self, metadata: List[Dict]) -> 'FilterIndex':
+        """A new index covering the extra rows; the current one is left untouched for readers"""
+        sources, categories, timestamps, searchable = self._columns(metadata)
+        return FilterIndex(
+            self._bitmaps(sources, self.by_source, self.size),
+            self._bitmaps(categories, self.by_category, self.size),
+            np.concatenate([self.timestamps, timestamps]),
+            np.concatenate([self.searchable, searchable])
+        )
+
+    def _any_of(self, bitmaps: Dict[str, np.ndarray], keys: Tuple[str, ...]) -> np.ndarray:
+        mask = np.zeros(self.size, dtype=bool)
+        for key in keys:
+            if key in bitmaps:
+                mask |= bitmaps[key]
+        return mask
+
+    def mask(self, filters: FactFilter) -> np.ndarray:
+        """Bool array over fact ids: searchable facts that pass the filter"""
+        mask = self.searchable.copy()
+        if filters.sources:
+            mask &= self._any_of(self.by_source, filters.sources)
+        if filters.categories:
+            mask &= self._any_of(self.by_category, filters.categories)
+        # NaN comparisons are False, so undated facts drop out of date-bounded queries
+        if filters.since:
+            mask &= self.timestamps >= filters.since.timestamp()
+        if filters.until:
+            mask &= self.timestamps <= filters.until.timestamp()
+        return mask
@@ -0,0 +1,210 @@
+# core/fact_store.py
+import argparse
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+import pandas as pd
+from config import FACTS_DB_PATH, FACTS_CSV_PATH
+
+logger = logging.getLogger(__name__)
+
+FACT_COLUMNS = ('statement', 'source', 'url', 'date', 'category')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS facts (
+    fact_id INTEGER PRIMARY KEY,
+    statement TEXT NOT NULL,
+    statement_hash TEXT NOT NULL,
+    source TEXT,
+    url TEXT,
+    date TEXT,
+    category TEXT,
+    canonical_id INTEGER,
+    added_at INTEGER NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_facts_statement_hash ON facts(statement_hash);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_facts_url ON facts(url) WHERE url IS NOT NULL;
+"""
+
+def statement_hash(statement: str) -> str:
+    """Hash of the whitespace/case-normalized statement"""
+    normalized = ' '.join(statement.split()).lower()
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+def _clean(value: Any) -> Optional[str]:
+    """Empty strings and NaN from pandas become NULL (NULL urls are exempt from the unique index)"""
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return None
+    value = str(value).strip()
+    return value or None
+
+class FactStore:
+    """
+    System of record for trusted facts: SQLite in WAL mode. fact_id is
+    assigned contiguously from 0 and is used directly as the FAISS id, so
+    an upsert only writes the rows that are actually new.
+    """
+
+    def __init__(self, db_path: Path = FACTS_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            # Autocommit mode so writes can take the lock up front with BEGIN IMMEDIATE
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+
+            # One-off migration from the CSV that used to be the system of record
+            empty = conn.execute("SELECT COUNT(*) FROM facts").fetchone()[0] == 0
+            if empty and FACTS_CSV_PATH.exists():
+                imported = self._import_csv(FACTS_CSV_PATH)
+                logger.info(f"Migrated {imported} facts from {FACTS_CSV_PATH} into {self.db_path}")
+        return self._conn
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM facts").fetchone()[0]
+
+    def _insert(self, conn: sqlite3.Connection, records: List[Dict[str, Any]]) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        Insert rows inside an open transaction, skipping unique-index conflicts.
+        Returns: (input position, inserted row with fact_id) pairs
+        """
+        inserted = []
+        now = int(time.time())
+        next_id = conn.execute("SELECT COALESCE(MAX(fact_id) + 1, 0) FROM facts").fetchone()[0]
+        for position, record in enumerate(records):
+            row = {column: _clean(record.get(column)) for column in FACT_COLUMNS}
+            if row['statement'] is None:
+                continue
+            canonical_id = record.get('canonical_id')
+            canonical_id = None if canonical_id is None or pd.isna(canonical_id) else int(canonical_id)
+
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO facts "
+                "(fact_id, statement, statement_hash, source, url, date, category, canonical_id, added_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (next_id, row['statement'], statement_hash(row['statement']), row['source'], row['url'],
+                 row['date'], row['category'], canonical_id, now)
+            )
+            if cursor.rowcount == 1:
+                inserted.append((position, {'fact_id': next_id, **row, 'canonical_id': canonical_id}))
+                next_id += 1
+        return inserted
+
+    def upsert(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Insert records whose statement hash and URL are both unseen.
+        Returns: the inserted rows with their new fact_id, in input order
+        """
+        if not records:
+            return []
+
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                inserted = [row for _, row in self._insert(conn, records)]
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        logger.info(f"Fact store: {len(inserted)} of {len(records)} records were new")
+        return inserted
+
+    def set_canonical(self, links: Dict[int, int]):
+        """Record near-duplicate links (fact_id -> canonical fact_id)"""
+        if not links:
+            return
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "UPDATE facts SET canonical_id = ? WHERE fact_id = ?",
+                [(canonical, fact_id) for fact_id, canonical in links.items()]
+            )
+            conn.execute("COMMIT")
+
+    def since(self, fact_id: int = 0) -> List[Dict[str, Any]]:
+        """Rows with fact_id >= the given id, ordered by fact_id"""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT fact_id, statement, source, url, date, category, canonical_id "
+                "FROM facts WHERE fact_id >= ? ORDER BY fact_id",
+                (fact_id,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def all(self) -> List[Dict[str, Any]]:
+        return self.since(0)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        records = self.all()
+        columns = ['fact_id', *FACT_COLUMNS, 'canonical_id']
+        df = pd.DataFrame(records, columns=columns)
+        df['canonical_id'] = df['canonical_id'].astype('Int64')
+        return df
+
+    def _import_csv(self, path: Path) -> int:
+        """Upsert CSV rows; canonical_id columns refer to CSV row numbers and are remapped"""
+        df = pd.read_csv(path)
+        if 'statement' not in df.columns:
+            raise ValueError("CSV must contain a 'statement' column.")
+
+        records = df.to_dict('records')
+        links = {row: record.pop('canonical_id', None) for row, record in enumerate(records)}
+
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row_to_id = {position: row['fact_id'] for position, row in self._insert(conn, records)}
+            remapped = [
+                (row_to_id[int(target)], fact_id)
+                for row, fact_id in row_to_id.items()
+                if (target := links[row]) is not None and not pd.isna(target) and int(target) in row_to_id
+            ]
+            conn.executemany("UPDATE facts SET canonical_id = ? WHERE fact_id = ?", remapped)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(row_to_id)
+
+    def import_csv(self, path: Path) -> int:
+        """Import facts from a CSV file. Returns: number of new facts"""
+        with self._lock:
+            self._connect()
+            return self._import_csv(path)
+
+    def export_csv(self, path: Path) -> int:
+        """Write all facts, ordered by fact_id, to a CSV file"""
+        df = self.to_dataframe()
+        df.to_csv(path, index=False)
+        return len(df)
+
+fact_store = FactStore()
+
+if __name__ == "__main__":
+    # Usage: python -m core.fact_store import|export path/to/facts.csv
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Import or export the fact store as CSV")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("path", type=Path)
+    args = parser.parse_args()
+
+    if args.action == "import":
+        print(f"Imported {fact_store.import_csv(args.path)} new facts into {fact_store.db_path}")
+    else:
+        print(f"Exported {fact_store.export_csv(args.path)} facts to {args.path}")
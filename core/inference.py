@@ -0,0 +1,125 @@
+# core/inference.py
+import itertools
+import logging
+import os
+import secrets
+import threading
+from multiprocessing.connection import Client
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+import numpy as np
+from config import (
+    INFERENCE_SOCKET_PATH, INFERENCE_AUTHKEY, INFERENCE_AUTHKEY_PATH, INFERENCE_AUTHKEY_MIN_BYTES,
+    INFERENCE_WORKERS, INFERENCE_MAX_BATCH, INFERENCE_TIMEOUT_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+def socket_addresses(socket_path: Path = INFERENCE_SOCKET_PATH, workers: int = INFERENCE_WORKERS) -> List[str]:
+    """One Unix socket per model server process"""
+    if workers <= 1:
+        return [str(socket_path)]
+    return [f"{socket_path}.{i}" for i in range(workers)]
+
+def load_authkey(create: bool = False) -> bytes:
+    """
+    Secret the model server and its clients authenticate with: INFERENCE_AUTHKEY,
+    else the owner-only key file. create=True (the server) writes a random key
+    file when there is none. There is no built-in default: anyone holding the
+    key can send pickles to the server.
+    """
+    if INFERENCE_AUTHKEY:
+        key = INFERENCE_AUTHKEY
+    else:
+        path = INFERENCE_AUTHKEY_PATH
+        if create and not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(secrets.token_hex(32).encode())
+            logger.info(f"Generated inference authkey in {path}")
+        if not path.exists():
+            raise RuntimeError(
+                f"No inference authkey: set INFERENCE_AUTHKEY or start the model server once to create {path}"
+            )
+        if path.stat().st_mode & 0o077:
+            raise RuntimeError(f"Inference authkey file {path} is readable by other users; chmod 600 it")
+        key = path.read_bytes().strip()
+    if len(key) < INFERENCE_AUTHKEY_MIN_BYTES:
+        raise RuntimeError(f"Inference authkey must be at least {INFERENCE_AUTHKEY_MIN_BYTES} bytes")
+    return key
+
+class InferenceClient:
+    """
+    Client for the model server (core.inference_server). Each calling thread
+    keeps its own connection, and threads are spread round-robin over the
+    server processes. Waiting on the socket releases the GIL, so other
+    requests keep running meanwhile.
+    """
+
+    def __init__(self, socket_path: Path = INFERENCE_SOCKET_PATH, workers: int = INFERENCE_WORKERS):
+        self.addresses = socket_addresses(socket_path, workers)
+        self._local = threading.local()
+        self._next = itertools.count()
+        self._authkey: Optional[bytes] = None  # Read on first connect, so inline mode never needs one
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            address = self.addresses[next(self._next) % len(self.addresses)]
+            self._authkey = self._authkey or load_authkey()
+            conn = Client(address, family='AF_UNIX', authkey=self._authkey)
+            self._local.conn = conn
+        return conn
+
+    def _drop(self):
+        conn = getattr(self._local, 'conn', None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def call(self, op: str, items: Any) -> Any:
+        for attempt in range(2):
+            try:
+                conn = self._connection()
+                conn.send((op, items))
+                if not conn.poll(INFERENCE_TIMEOUT_SECONDS):
+                    # The late reply would desync this connection, so it is discarded
+                    self._drop()
+                    raise TimeoutError(f"Inference server did not answer '{op}' within {INFERENCE_TIMEOUT_SECONDS}s")
+                status, result = conn.recv()
+                break
+            except TimeoutError:
+                raise
+            except (EOFError, OSError) as e:
+                # Server restarted: reconnect once
+                self._drop()
+                if attempt:
+                    raise ConnectionError(f"Inference server unavailable at {self.addresses}: {e}") from e
+
+        if status != 'ok':
+            raise RuntimeError(f"Inference server error in '{op}': {result}")
+        return result
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Sentence embeddings, sent in chunks so bulk indexing does not starve queries"""
+        chunks = [
+            self.call('embed', texts[i:i + INFERENCE_MAX_BATCH])
+            for i in range(0, len(texts), INFERENCE_MAX_BATCH)
+        ]
+        return np.vstack(chunks).astype('float32')
+
+    def score(self, pairs: List[List[str]]) -> np.ndarray:
+        """CrossEncoder scores for (query, document) pairs"""
+        return np.asarray(self.call('score', pairs), dtype=np.float32)
+
+    def extract(self, texts: List[str]) -> List[str]:
+        return self.call('extract', texts)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.call('stats', None)
+
+inference_client = InferenceClient()
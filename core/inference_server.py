@@ -0,0 +1,216 @@
+# core/inference_server.py
+"""
+Model server: owns the embedding model, the CrossEncoder and the spaCy
+pipeline, and serves them over Unix sockets to API processes running with
+INFERENCE_MODE=server. Calls from all API workers and threads are queued per
+model and run as one batch, so concurrent requests share a forward pass
+and models are loaded once instead of once per worker.
+
+    python -m core.inference_server                       # INFERENCE_WORKERS processes
+    python -m core.inference_server --workers 2 --threads 4
+
+Each server process is pinned to its own slice of the CPUs, and torch is
+limited to that many threads so processes do not oversubscribe cores.
+"""
+import argparse
+import logging
+import multiprocessing as mp
+import os
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing.connection import Listener
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+from core.inference import socket_addresses, load_authkey
+from config import (
+    EMBEDDING_MODEL, INFERENCE_SOCKET_PATH, INFERENCE_WORKERS,
+    INFERENCE_TORCH_THREADS, INFERENCE_MAX_BATCH, INFERENCE_BATCH_WAIT_MS
+)
+
+logger = logging.getLogger(__name__)
+
+class _Batcher:
+    """Collects items from concurrent callers and runs them through fn as one batch"""
+
+    def __init__(self, name: str, fn: Callable[[List[Any]], Any]):
+        self.name = name
+        self.fn = fn
+        self.batches = 0
+        self.items = 0
+        self._queue: queue.Queue = queue.Queue()
+        threading.Thread(target=self._run, name=f"batch-{name}", daemon=True).start()
+
+    def submit(self, items: List[Any]) -> Future:
+        future = Future()
+        self._queue.put((items, future))
+        return future
+
+    def _collect(self) -> List[tuple]:
+        """
+        First request blocks; everything queued meanwhile (plus anything arriving
+        within INFERENCE_BATCH_WAIT_MS) joins it, up to INFERENCE_MAX_BATCH items.
+        Requests that arrive while a batch runs form the next one.
+        """
+        pending = [self._queue.get()]
+        size = len(pending[0][0])
+        deadline = time.monotonic() + INFERENCE_BATCH_WAIT_MS / 1000
+        while size < INFERENCE_MAX_BATCH:
+            remaining = deadline - time.monotonic()
+            try:
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            pending.append(request)
+            size += len(request[0])
+        return pending
+
+    def _run(self):
+        while True:
+            pending = self._collect()
+            items = [item for batch, _ in pending for item in batch]
+            try:
+                results = self.fn(items) if items else []
+            except Exception as e:
+                logger.error(f"{self.name} batch of {len(items)} failed: {e}")
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(items)
+            offset = 0
+            for batch, future in pending:
+                future.set_result(results[offset:offset + len(batch)])
+                offset += len(batch)
+
+class InferenceServer:
+    """Serves embed/score/extract requests on one Unix socket"""
+
+    def __init__(self, address: str, threads: int):
+        self.address = address
+        self.threads = threads
+        self.batchers: Dict[str, _Batcher] = {}
+
+    def _pin_threads(self):
+        try:
+            import torch
+            torch.set_num_threads(self.threads)
+            torch.set_num_interop_threads(1)
+        except ImportError:
+            pass
+        except RuntimeError as e:
+            # Interop threads can only be set before any parallel work
+            logger.warning(f"Could not pin torch threads: {e}")
+
+    def _load_models(self):
+        self._pin_threads()
+        # Imported here so the models load in the server, in inline mode
+        from sentence_transformers import SentenceTransformer
+        from core.re_ranker import re_ranker
+        from core.claim_extractor import claim_extractor
+        re_ranker.remote = claim_extractor.remote = False
+
+        logger.info(f"Loading embedding model: {EMBEDDING_MODEL}")
+        embedding_model = SentenceTransformer(EMBEDDING_MODEL)
+        re_ranker._initialize_model()
+        claim_extractor._initialize_model()
+
+        self.batchers = {
+            'embed': _Batcher('embed', lambda texts: embedding_model.encode(
+                texts, convert_to_numpy=True, batch_size=INFERENCE_MAX_BATCH
+            ).astype('float32')),
+            'score': _Batcher('score', lambda pairs: np.asarray(
+                re_ranker.model.predict(pairs, batch_size=INFERENCE_MAX_BATCH), dtype=np.float32
+            )),
+            'extract': _Batcher('extract', claim_extractor.extract_batch),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            name: {
+                'batches': b.batches,
+                'items': b.items,
+                'mean_batch': round(b.items / b.batches, 2) if b.batches else 0.0,
+            }
+            for name, b in self.batchers.items()
+        }
+
+    def _serve_connection(self, conn):
+        with conn:
+            while True:
+                try:
+                    op, items = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    if op == 'stats':
+                        result = self.stats()
+                    else:
+                        result = self.batchers[op].submit(items).result()
+                    reply = ('ok', result)
+                except Exception as e:
+                    reply = ('error', f"{type(e).__name__}: {e}")
+                try:
+                    conn.send(reply)
+                except (EOFError, OSError):
+                    return  # The client timed out and dropped the connection
+
+    def serve_forever(self):
+        authkey = load_authkey()  # Refuse to start without a secret key
+        self._load_models()
+        if os.path.exists(self.address):
+            os.unlink(self.address)  # Stale socket from a previous run
+        listener = Listener(self.address, family='AF_UNIX', authkey=authkey)
+        os.chmod(self.address, 0o600)
+        logger.info(f"Inference server listening on {self.address} ({self.threads} torch threads)")
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:
+                logger.warning(f"Rejected inference connection: {e}")
+                continue
+            threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+
+def serve(address: str, cpus: List[int], threads: Optional[int] = None):
+    """Run one server process on the given CPUs"""
+    logging.basicConfig(level=logging.INFO)
+    if cpus and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cpus)
+    threads = threads or INFERENCE_TORCH_THREADS or max(len(cpus), 1)
+    # Must be set before torch is imported
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    InferenceServer(address, threads).serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve model inference to API workers")
+    parser.add_argument("--workers", type=int, default=INFERENCE_WORKERS, help="Server processes (match INFERENCE_WORKERS)")
+    parser.add_argument("--threads", type=int, default=INFERENCE_TORCH_THREADS, help="Torch threads per process")
+    args = parser.parse_args()
+
+    INFERENCE_SOCKET_PATH.parent.mkdir(parents=True, exist_ok=True)
+    load_authkey(create=True)  # Before the workers start, so they all read the same key
+    addresses = socket_addresses(INFERENCE_SOCKET_PATH, args.workers)
+    available = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else list(range(os.cpu_count() or 1))
+    cpu_slices = [list(map(int, s)) for s in np.array_split(available, args.workers)]
+
+    if args.workers == 1:
+        serve(addresses[0], cpu_slices[0], args.threads)
+        return
+
+    ctx = mp.get_context("spawn")
+    procs = [
+        ctx.Process(target=serve, args=(address, cpus, args.threads), name=f"inference-{i}")
+        for i, (address, cpus) in enumerate(zip(addresses, cpu_slices))
+    ]
+    for p in procs:
+        p.start()
+    # Stopping the parent stops the pool
+    signal.signal(signal.SIGTERM, lambda *_: [p.terminate() for p in procs])
+    for p in procs:
+        p.join()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+# core/ingest.py
+"""
+Continuous ingest: scraped entries flow clean -> dedupe -> embed -> append
+into the live index, so new facts become searchable without a rebuild or
+a process restart.
+
+    python -m core.ingest              # one pass
+    python -m core.ingest --forever    # poll every INGEST_INTERVAL_SECONDS
+"""
+import argparse
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional
+import numpy as np
+from core.vector_db import vector_db, VectorDB
+from core.data_scraper import data_scraper, DataScraper
+from core.fact_filters import parse_published
+from core.metrics import metrics_collector
+from core.dedup import near_duplicate_detector, canonical_id_of, figures_of
+from core.fact_store import fact_store
+from core.verdict_index import verdict_index
+from core.contradiction import contradiction_detector
+from config import (
+    INGEST_INTERVAL_SECONDS, INGEST_EMBED_BATCH_SIZE,
+    DEDUP_ENABLED, DEDUP_EMBEDDING_THRESHOLD, VERDICT_INDEX_ENABLED
+)
+
+logger = logging.getLogger(__name__)
+
+class IngestPipeline:
+    """Moves newly scraped facts into the serving index"""
+
+    def __init__(self, db: VectorDB = vector_db, scraper: DataScraper = data_scraper):
+        self.db = db
+        self.scraper = scraper
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _embed(self, statements: List[str]) -> np.ndarray:
+        """Embed in fixed-size batches so one large scrape does not spike memory"""
+        batches = [
+            self.db.encode_facts(statements[i:i + INGEST_EMBED_BATCH_SIZE], batch_size=INGEST_EMBED_BATCH_SIZE)
+            for i in range(0, len(statements), INGEST_EMBED_BATCH_SIZE)
+        ]
+        return np.vstack(batches)
+
+    def _link_near_duplicates(self, records: List[Dict[str, Any]], embeddings: np.ndarray):
+        """
+        Set canonical_id on reworded copies: MinHash LSH first, then embedding
+        similarity. Statements whose numbers or dates differ are never linked.
+        """
+        snapshot = self.db.snapshot
+        start_id = records[0]['fact_id']
+        statements = [r['statement'] for r in records]
+        figures = [figures_of(s) for s in statements]
+        near_duplicate_detector.sync(snapshot.facts, snapshot.metadata)
+        links = near_duplicate_detector.assign(statements, start_id=start_id)
+        # Rows linked when they were stored (build_database, upsert_facts) keep that link
+        links = [canonical_id_of(r) if canonical_id_of(r) is not None else link for r, link in zip(records, links)]
+
+        # Embeddings are normalized, so squared L2 distance d gives cosine 1 - d/2
+        unlinked = [i for i, link in enumerate(links) if link is None]
+        if unlinked and snapshot.index is not None and snapshot.index.ntotal:
+            distances, ids = snapshot.index.search(embeddings[unlinked], 1)
+            for row, distance, fact_id in zip(unlinked, distances[:, 0], ids[:, 0]):
+                if (fact_id != -1 and 1 - distance / 2 >= DEDUP_EMBEDDING_THRESHOLD
+                        and figures_of(snapshot.facts[fact_id]) == figures[row]):
+                    links[row] = int(fact_id)
+
+        # Reworded copies inside this batch
+        canonical_rows: List[int] = []
+        for row in range(len(records)):
+            if links[row] is None and canonical_rows:
+                candidates = [c for c in canonical_rows if figures[c] == figures[row]]
+                if candidates:
+                    similarity = embeddings[candidates] @ embeddings[row]
+                    best = int(similarity.argmax())
+                    if similarity[best] >= DEDUP_EMBEDDING_THRESHOLD:
+                        links[row] = start_id + candidates[best]
+            if links[row] is None:
+                canonical_rows.append(row)
+
+        for record, link in zip(records, links):
+            record['canonical_id'] = link
+        fact_store.set_canonical({r['fact_id']: r['canonical_id'] for r in records if r['canonical_id'] is not None})
+
+    def _report_freshness(self, records: List[Dict[str, Any]]):
+        now = datetime.now(timezone.utc)
+        lags = []
+        for record in records:
+            published = parse_published(record.get('date'))
+            if published is not None:
+                lag = (now - published).total_seconds()
+                metrics_collector.observe_freshness(lag)
+                lags.append(lag)
+        if lags:
+            logger.info(
+                f"Freshness lag (publish -> searchable): "
+                f"median {np.median(lags):.0f}s, max {max(lags):.0f}s over {len(lags)} facts"
+            )
+
+    def ingest(self, records: List[Dict[str, Any]]) -> int:
+        """Add scraped records to the live index. Returns: number of facts added"""
+        with self._run_lock:
+            # Stage 1: Clean
+            cleaned = []
+            for record in records:
+                statement = self.scraper._clean_text(str(record.get('statement', '')))
+                if len(statement.split()) > 4:
+                    cleaned.append({**record, 'statement': statement})
+
+            # Stage 2: Store; unique statement-hash/URL indexes drop exact duplicates
+            indexed = len(self.db.snapshot.facts)
+            new_records = fact_store.upsert(cleaned)
+            if not new_records:
+                logger.info("Ingest: no new facts")
+                return 0
+
+            # The index must end where the store's previous rows end, or ids would shift
+            if new_records[0]['fact_id'] != indexed:
+                logger.warning("Index is behind the fact store; reloading to catch up")
+                self.db.load()
+                return len(new_records)
+
+            self.index_stored(new_records)
+            linked = sum(canonical_id_of(r) is not None for r in new_records)
+            logger.info(
+                f"Ingest: {len(new_records) - linked} new facts searchable, {linked} linked as near-duplicates, "
+                f"{len(records) - len(new_records)} dropped"
+            )
+            return len(new_records)
+
+    def index_stored(self, records: List[Dict[str, Any]]):
+        """
+        Embed, link and append rows already in the fact store whose fact ids
+        continue the index, then persist every index. Also used by
+        VectorDB.load() to index rows stored after the indexes were saved.
+        """
+        # Stage 3: Embed (batched) and link near-duplicates to their canonical fact
+        statements = [r['statement'] for r in records]
+        embeddings = self._embed(statements)
+        if DEDUP_ENABLED:
+            self._link_near_duplicates(records, embeddings)
+
+        # Stage 4: Append; readers keep the old snapshot until the swap
+        self.db.append(statements, metadata=records, embeddings=embeddings)
+        self._report_freshness([r for r in records if canonical_id_of(r) is None])
+
+        # Stage 5: Persist the indexes so a restart serves the same facts
+        self.db.save()
+        if DEDUP_ENABLED:
+            near_duplicate_detector.save()
+        snapshot = self.db.snapshot
+        if VERDICT_INDEX_ENABLED:
+            verdict_index.sync(snapshot.facts, snapshot.filter_index.searchable)
+            verdict_index.save()
+        contradiction_detector.sync(snapshot.facts)
+        contradiction_detector.save()
+
+    def run_once(self) -> int:
+        """Scrape every source once and ingest whatever is new"""
+        df = self.scraper.scrape_all_sources()
+        added = self.ingest(df.to_dict('records')) if not df.empty else 0
+        # Only now are the scraped entries indexed; a failed pass leaves them unseen
+        self.scraper.commit_state()
+        return added
+
+    def run_forever(self, interval: float = INGEST_INTERVAL_SECONDS):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Ingest pass failed: {e}")
+            self._stop.wait(interval)
+
+    def start_background(self, interval: float = INGEST_INTERVAL_SECONDS):
+        """Run ingest passes on a daemon thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, args=(interval,), name="ingest", daemon=True)
+        self._thread.start()
+        logger.info(f"Continuous ingest started (every {interval}s)")
+
+    def stop(self):
+        self._stop.set()
+
+ingest_pipeline = IngestPipeline()
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest freshly scraped facts into the index")
+    parser.add_argument("--forever", action="store_true", help="Keep polling the sources")
+    parser.add_argument("--interval", type=float, default=INGEST_INTERVAL_SECONDS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.forever:
+        ingest_pipeline.run_forever(args.interval)
+    else:
+        added = ingest_pipeline.run_once()
+        print(f"Ingested {added} new facts")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+# core/llm_backends.py
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+import requests
+from dotenv import load_dotenv
+from config import (
+    GROQ_MODEL, LOCAL_LLM_URL, LOCAL_LLM_MODEL,
+    LOCAL_LLM_TIMEOUT, STUB_LLM_LATENCY_MS
+)
+from core.prompt_builder import count_tokens
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Completion:
+    content: str
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+
+class LLMBackend(ABC):
+    """Interface for the chat-completion providers behind LLMService"""
+
+    name = "base"
+
+    @abstractmethod
+    def complete(self, user_message: str, max_tokens: int, temperature: float = 0.2) -> Completion:
+        """Send one JSON-mode user message and return the raw completion"""
+
+class GroqBackend(LLMBackend):
+    """Hosted Groq API"""
+
+    name = "groq"
+
+    def __init__(self):
+        load_dotenv()
+        if "GROQ_API_KEY" not in os.environ:
+            raise ValueError(
+                "Groq API key not found. "
+                "Set GROQ_API_KEY in environment or .env file."
+            )
+        from groq import Groq
+
+        logger.info("Initializing Groq LLM client...")
+        self.client = Groq(
+            api_key=os.environ.get("GROQ_API_KEY")
+        )
+
+    def complete(self, user_message: str, max_tokens: int, temperature: float = 0.2) -> Completion:
+        response = self.client.chat.completions.create(
+            model=GROQ_MODEL,
+            messages=[{"role": "user", "content": user_message}],
+            max_tokens=max_tokens,
+            temperature=temperature,
+            response_format={"type": "json_object"}
+        )
+        usage = getattr(response, "usage", None)
+        return Completion(
+            content=response.choices[0].message.content,
+            prompt_tokens=getattr(usage, "prompt_tokens", None),
+            completion_tokens=getattr(usage, "completion_tokens", None)
+        )
+
+class OpenAICompatibleBackend(LLMBackend):
+    """Local OpenAI-compatible HTTP server (llama.cpp server, vLLM, Ollama, ...)"""
+
+    name = "local"
+
+    def __init__(self, base_url: str = LOCAL_LLM_URL, model: str = LOCAL_LLM_MODEL):
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.model = model
+        self.session = requests.Session()
+        logger.info(f"Using local LLM server at {self.url} (model: {model})")
+
+    def complete(self, user_message: str, max_tokens: int, temperature: float = 0.2) -> Completion:
+        response = self.session.post(
+            self.url,
+            json={
+                "model": self.model,
+                "messages": [{"role": "user", "content": user_message}],
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+                "response_format": {"type": "json_object"}
+            },
+            timeout=LOCAL_LLM_TIMEOUT
+        )
+        response.raise_for_status()
+        data = response.json()
+        usage = data.get("usage") or {}
+        return Completion(
+            content=data["choices"][0]["message"]["content"],
+            prompt_tokens=usage.get("prompt_tokens"),
+            completion_tokens=usage.get("completion_tokens")
+        )
+
+class StubBackend(LLMBackend):
+    """
+    In-process deterministic stand-in for offline runs and load tests.
+    Judges each claim in the prompt by word overlap with its evidence and
+    sleeps for a fixed latency to mimic a remote call.
+    """
+
+    name = "stub"
+
+    _CLAIM_PATTERN = re.compile(r'^Claim: "(.*)"$', re.MULTILINE)
+    _BULK_ITEM_PATTERN = re.compile(r'^\[(\d+)\] Claim: "(.*)"$', re.MULTILINE)
+    _EVIDENCE_PATTERN = re.compile(r'^\s*\d+\. (.*)$', re.MULTILINE)
+
+    def __init__(self, latency_ms: float = STUB_LLM_LATENCY_MS):
+        self.latency_ms = latency_ms
+
+    def _judge(self, claim: str, evidence: List[str]) -> dict:
+        claim_words = set(re.findall(r'\w+', claim.lower()))
+        best = 0.0
+        for item in evidence:
+            item_words = set(re.findall(r'\w+', item.lower()))
+            if claim_words:
+                best = max(best, len(claim_words & item_words) / len(claim_words))
+
+        # Deterministic jitter so repeated claims always get the same confidence
+        digest = int(hashlib.md5(claim.encode()).hexdigest()[:4], 16) / 0xFFFF
+        return {
+            "verdict": "True" if best >= 0.6 else "Unverifiable",
+            "confidence": round(0.5 + 0.4 * best + 0.05 * digest, 2),
+            "reasoning": f"Stub verdict from {best:.0%} word overlap with evidence."
+        }
+
+    def _split_items(self, text: str) -> List[Tuple[int, str, List[str]]]:
+        bulk_items = list(self._BULK_ITEM_PATTERN.finditer(text))
+        if bulk_items:
+            items = []
+            for i, match in enumerate(bulk_items):
+                end = bulk_items[i + 1].start() if i + 1 < len(bulk_items) else len(text)
+                block = text[match.end():end]
+                items.append((int(match.group(1)), match.group(2), self._EVIDENCE_PATTERN.findall(block)))
+            return items
+
+        # Single prompt: the last quoted claim follows any few-shot examples
+        claims = list(self._CLAIM_PATTERN.finditer(text))
+        if not claims:
+            return []
+        last = claims[-1]
+        return [(0, last.group(1), self._EVIDENCE_PATTERN.findall(text[last.end():]))]
+
+    def complete(self, user_message: str, max_tokens: int, temperature: float = 0.2) -> Completion:
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms / 1000)
+
+        items = self._split_items(user_message)
+        if len(items) == 1 and items[0][0] == 0:
+            payload = self._judge(items[0][1], items[0][2])
+        else:
+            payload = {"verdicts": [{"id": item_id, **self._judge(claim, evidence)} for item_id, claim, evidence in items]}
+
+        content = json.dumps(payload)
+        return Completion(
+            content=content,
+            prompt_tokens=count_tokens(user_message),
+            completion_tokens=count_tokens(content)
+        )
+
+BACKENDS = {
+    "groq": GroqBackend,
+    "local": OpenAICompatibleBackend,
+    "stub": StubBackend,
+}
+
+def create_backend(name: str) -> LLMBackend:
+    """Instantiate an LLM backend by its config name"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown LLM backend '{name}'. Choose from: {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
@@ -1,15 +1,24 @@
 # core/llm_service.py
-import os
 import logging
-import re
-from typing import List, Tuple, Optional
-from langchain_core.prompts import PromptTemplate
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Tuple, Optional, Dict
 from pydantic import BaseModel, Field
-from groq import Groq
 import json
-from dotenv import load_dotenv
-from config import GROQ_MODEL
+from config import (
+    LLM_BACKEND, LLM_CHEAP_BACKEND, CHEAP_CLAIM_MAX_PROMPT_TOKENS,
+    LLM_MAX_COMPLETION_TOKENS, BULK_COMPLETION_TOKENS_PER_ITEM,
+    DEADLINE_MIN_LLM_MS, LLM_HEDGE_AFTER_MS, LLM_HEDGE_BACKEND, LLM_CALL_THREADS,
+    CONTRADICTION_CONFIDENCE, BULK_MAX_BATCH_SIZE, BULK_LINGER_MS
+)
+from core.llm_backends import LLMBackend, Completion, create_backend
 from core.cache import query_cache
+from core.prompt_builder import prompt_builder
+from core.tracing import tracer
+from core.deadline import Deadline
+from core.verdict_index import normalize_text
+from core.contradiction import contradiction_detector
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -18,84 +27,42 @@ class Verdict(BaseModel):
     verdict: str = Field(description="Must be exactly: 'True', 'False', or 'Unverifiable'")
     confidence: float = Field(description="Confidence score between 0.0 and 1.0")
     reasoning: str = Field(description="Detailed explanation with evidence citations")
+    prompt_tokens: int = Field(default=0, description="Prompt tokens billed for this verdict (0 when no LLM call was made)")
+    completion_tokens: int = Field(default=0, description="Completion tokens billed for this verdict")
+
+# Token usage is per call, so it is never stored alongside cached verdicts
+USAGE_FIELDS = {"prompt_tokens", "completion_tokens"}
+VALID_VERDICTS = ("True", "False", "Unverifiable")
 
 class LLMService:
     """Enhanced LLM service with caching and better prompting"""
     
-    def __init__(self):
-        load_dotenv()
-        if "GROQ_API_KEY" not in os.environ:
-            raise ValueError(
-                "Groq API key not found. "
-                "Set GROQ_API_KEY in environment or .env file."
-            )
-        
-        logger.info("Initializing Groq LLM client...")
-        self.client = Groq(
-            api_key=os.environ.get("GROQ_API_KEY")
-        )
-        self.prompt = self._create_enhanced_prompt()
+    def __init__(self, backend: Optional[LLMBackend] = None, cheap_backend: Optional[LLMBackend] = None):
+        # Backends are created on first use so that importing the service
+        # never requires credentials for a backend that is not used.
+        self.backend = backend
+        self.cheap_backend = cheap_backend
+        self.hedge_backend: Optional[LLMBackend] = None
+        self.prompt_builder = prompt_builder
+        # Deadline-bound calls run here so the caller can stop waiting
+        self._call_pool = ThreadPoolExecutor(LLM_CALL_THREADS, thread_name_prefix="llm-call")
 
         logger.info("LLM service initialized")
     
-    def _create_enhanced_prompt(self) -> str:
-        """Create enhanced prompt with few-shot examples"""
-        template = """You are a precise fact-checking AI. Analyze claims against evidence strictly.
-
-RULES:
-1. 'True' - Evidence explicitly confirms ALL key facts in the claim
-2. 'False' - Evidence explicitly contradicts ANY key fact in the claim  
-3. 'Unverifiable' - Evidence is insufficient or ambiguous
-
-EXAMPLES:
-
-Claim: "India has 28 states"
-Evidence: "India consists of 28 states and 8 union territories"
-Verdict: True (exact match)
-
-Claim: "The Eiffel Tower is in Berlin"
-Evidence: "The Eiffel Tower is located in Paris, France"
-Verdict: False (contradicts location)
-
-Claim: "Apple will launch new product tomorrow"
-Evidence: "Apple announced an event next week"
-Verdict: Unverifiable (timing doesn't match exactly)
-
-NOW ANALYZE:
-
-Claim: "{claim}"
-
-Evidence:
-{evidence}
-
-Apply normalization:
-- Ignore case, punctuation, number formats
-- "2005 crore" = "₹2,005 cr" = "Rs. 2005 crores"
-- "IREDA" = "India Renewable Energy Development Agency"
-
-Return a JSON with these fields: verdict, confidence, reasoning. The output MUST ONLY be the valid JSON string."""
+    def _get_backend(self, estimated_tokens: int) -> LLMBackend:
+        """Pick the backend for a prompt, routing small prompts to the cheap backend"""
+        if LLM_CHEAP_BACKEND and estimated_tokens <= CHEAP_CLAIM_MAX_PROMPT_TOKENS:
+            if self.cheap_backend is None:
+                self.cheap_backend = create_backend(LLM_CHEAP_BACKEND)
+            return self.cheap_backend
         
-        return PromptTemplate(
-            template=template,
-            input_variables=["claim", "evidence"]
-        )
-
+        if self.backend is None:
+            self.backend = create_backend(LLM_BACKEND)
+        return self.backend
     
     def _normalize_text(self, text: str) -> str:
-        """Normalize text for comparison"""
-        text = text.lower()
-        # Remove currency symbols and commas
-        text = re.sub(r'rs\.|₹|,', '', text)
-        # Standardize number formats
-        text = re.sub(r'(\d+)\s*(crore|cr|crores|billion|million)', r'\1 \2', text)
-        text = re.sub(r'(\d+)\s*lakh', r'\1 lakh', text)
-        # Remove punctuation
-        text = re.sub(r'[^\w\s]', ' ', text)
-        # Normalize common entities
-        text = re.sub(r'\bireda\b', 'india renewable energy development agency', text)
-        # Remove extra spaces
-        text = ' '.join(text.split())
-        return text
+        """Normalize text for comparison (shared with the precomputed verdict index)"""
+        return normalize_text(text)
     
     def _check_exact_match(self, claim: str, evidence: List[str]) -> Tuple[bool, List[str]]:
         """Check for normalized exact matches"""
@@ -110,20 +77,28 @@ Return a JSON with these fields: verdict, confidence, reasoning. The output MUST
         
         return (len(matches) > 0, matches)
     
-    def get_verdict(self, claim: str, evidence: List[str]) -> Verdict:
-        """Get fact-checking verdict with caching and robust error handling"""
-        
+    def _resolve_locally(
+        self, claim: str, evidence: List[str], evidence_ids: Optional[List[int]] = None
+    ) -> Tuple[str, Optional[Verdict]]:
+        """
+        Try the cache, exact-match and contradiction shortcuts.
+        evidence_ids (fact ids aligned with evidence) let the contradiction
+        check reuse features extracted at index time.
+        Returns: (cache key, verdict or None if the LLM is needed)
+        """
         # Check cache first
         cache_key = f"{claim}|{str(sorted(evidence))}"
-        cached_result = query_cache.get(cache_key)
+        with tracer.span("cache.lookup") as span:
+            cached_result = query_cache.get(cache_key)
+            if span:
+                span.set_attribute("hit", cached_result is not None)
         if cached_result:
             logger.info("Returning cached verdict")
-            return Verdict(**cached_result)
-        
-        logger.info(f"Processing claim: {claim[:100]}...")
+            return cache_key, Verdict(**cached_result)
         
         # Quick exact match check
-        has_match, matches = self._check_exact_match(claim, evidence)
+        with tracer.span("exact-match"):
+            has_match, matches = self._check_exact_match(claim, evidence)
         
         if has_match:
             logger.info(f"Exact match found in {len(matches)} evidence items")
@@ -132,43 +107,111 @@ Return a JSON with these fields: verdict, confidence, reasoning. The output MUST
                 confidence=0.95,
                 reasoning=f"The claim directly matches verified evidence: '{matches[0][:200]}...'"
             )
-            query_cache.set(cache_key, result.dict())
-            return result
+            query_cache.set(cache_key, result.dict(exclude=USAGE_FIELDS))
+            return cache_key, result
         
         # Check for clear contradictions
-        contradiction_result = self._check_contradiction(claim, evidence)
+        with tracer.span("contradiction"):
+            contradiction_result = self._check_contradiction(claim, evidence, evidence_ids)
         if contradiction_result:
             logger.info("Clear contradiction detected")
-            query_cache.set(cache_key, contradiction_result.dict())
-            return contradiction_result
+            query_cache.set(cache_key, contradiction_result.dict(exclude=USAGE_FIELDS))
+            return cache_key, contradiction_result
+        
+        return cache_key, None
+    
+    def _complete(
+        self,
+        user_message: str,
+        max_tokens: int,
+        estimated_tokens: int,
+        deadline: Optional[Deadline] = None
+    ) -> Completion:
+        """Send a single JSON-mode request to the selected LLM backend"""
+        backend = self._get_backend(estimated_tokens)
+        with tracer.span("llm", backend=backend.name, estimated_prompt_tokens=estimated_tokens) as span:
+            if deadline is None or not deadline.bounded:
+                return backend.complete(user_message, max_tokens=max_tokens, temperature=0.2)
+            return self._complete_hedged(backend, user_message, max_tokens, deadline, span)
+    
+    def _complete_hedged(self, backend: LLMBackend, user_message: str, max_tokens: int, deadline: Deadline, span) -> Completion:
+        """
+        Wait for the request at most until the deadline. If it is still out after
+        LLM_HEDGE_AFTER_MS (or half the time left), send a second copy and take
+        whichever answers first. Raises TimeoutError when neither answers in time.
+        """
+        pending = {self._call_pool.submit(backend.complete, user_message, max_tokens, 0.2)}
+        hedge_after_ms = min(LLM_HEDGE_AFTER_MS, deadline.remaining_ms() / 2)
+        if LLM_HEDGE_AFTER_MS > 0 and not wait(pending, timeout=hedge_after_ms / 1000).done:
+            if LLM_HEDGE_BACKEND and self.hedge_backend is None:
+                self.hedge_backend = create_backend(LLM_HEDGE_BACKEND)
+            hedge_backend = self.hedge_backend or backend
+            deadline.degrade("hedged_llm")
+            if span:
+                span.set_attribute("hedged", True)
+            pending.add(self._call_pool.submit(hedge_backend.complete, user_message, max_tokens, 0.2))
+        
+        error: Optional[Exception] = None
+        while pending:
+            done, pending = wait(pending, timeout=deadline.remaining_ms() / 1000, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = error or future.exception()
+        if error and not pending:
+            raise error
+        # Calls still running finish in the pool; their answers are dropped
+        raise TimeoutError(f"LLM did not answer within the {deadline.budget_ms:.0f}ms deadline")
+    
+    def get_verdict(
+        self,
+        claim: str,
+        evidence: List[str],
+        deadline: Optional[Deadline] = None,
+        evidence_ids: Optional[List[int]] = None
+    ) -> Verdict:
+        """
+        Get fact-checking verdict with caching and robust error handling.
+        With a deadline, the LLM call is hedged and bounded, and a local verdict
+        is returned when too little time is left to call it at all.
+        """
+        cache_key, local_result = self._resolve_locally(claim, evidence, evidence_ids)
+        if local_result:
+            return local_result
+        
+        if deadline is not None and deadline.below(DEADLINE_MIN_LLM_MS):
+            deadline.degrade("local_verdict")
+            return self._fallback_verification(claim, evidence, note="deadline too close for the LLM")
+        
+        logger.info(f"Processing claim: {claim[:100]}...")
         
         # Use LLM for nuanced verification
-        evidence_str = "\n".join([f"{i+1}. {e}" for i, e in enumerate(evidence)])
         try:
-            # Prepare messages
-            user_message = self.prompt.format(claim=claim, evidence=evidence_str)
-            messages = [{"role": "user", "content": user_message}]
-            
-            response = self.client.chat.completions.create(
-                model=GROQ_MODEL,
-                messages=messages,
-                max_tokens=512,
-                temperature=0.2,
-                response_format={"type": "json_object"}
-            )
+            # Prepare messages within the prompt token budget
+            user_message, estimated_tokens = self.prompt_builder.build(claim, evidence)
+            completion = self._complete(user_message, LLM_MAX_COMPLETION_TOKENS, estimated_tokens, deadline)
             
             # Parse JSON output
-            content = response.choices[0].message.content
-            result_dict = json.loads(content)
+            result_dict = json.loads(completion.content)
             result = Verdict(**result_dict)
             
+            # Record billed token usage (fall back to the local estimate)
+            result.prompt_tokens = completion.prompt_tokens or estimated_tokens
+            result.completion_tokens = completion.completion_tokens or 0
+            logger.info(
+                f"LLM usage: {result.prompt_tokens} prompt tokens "
+                f"(estimated {estimated_tokens}), {result.completion_tokens} completion tokens"
+            )
+            
             # Validate confidence
             result.confidence = max(0.0, min(1.0, result.confidence))
             
             logger.info(f"LLM verdict: {result.verdict} (confidence: {result.confidence:.2f})")
             
             # Cache result
-            query_cache.set(cache_key, result.dict())
+            query_cache.set(cache_key, result.dict(exclude=USAGE_FIELDS))
             
             return result
 
@@ -177,36 +220,112 @@ Return a JSON with these fields: verdict, confidence, reasoning. The output MUST
             logger.error(f"LLM service error: {e}")
             
             # Fallback to rule-based verification
-            return self._fallback_verification(claim, evidence, str(e))
+            if isinstance(e, TimeoutError) and deadline is not None:
+                deadline.degrade("local_verdict")
+                return self._fallback_verification(claim, evidence, note="LLM missed the deadline")
+            return self._fallback_verification(claim, evidence)
     
-    def _check_contradiction(self, claim: str, evidence: List[str]) -> Optional[Verdict]:
-        """Check for obvious contradictions (e.g., different countries/entities)"""
-        norm_claim = self._normalize_text(claim)
+    def get_verdicts_bulk(
+        self,
+        items: List[Tuple[str, List[str]]],
+        evidence_ids: Optional[List[Optional[List[int]]]] = None
+    ) -> List[Verdict]:
+        """
+        Verify many (claim, evidence) pairs, packing the ones that need the LLM
+        into shared JSON-mode requests sized to the bulk token budget.
+        Entries the LLM leaves out or returns malformed are re-issued singly.
+        Returns: verdicts in the same order as items
+        """
+        results: List[Optional[Verdict]] = [None] * len(items)
+        cache_keys = {}
+        pending = []
         
-        # Extract key entities from claim (simple approach)
-        claim_entities = set(re.findall(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b', claim))
+        for i, (claim, evidence) in enumerate(items):
+            ids = evidence_ids[i] if evidence_ids else None
+            cache_key, local_result = self._resolve_locally(claim, evidence, ids)
+            if local_result:
+                results[i] = local_result
+            else:
+                cache_keys[i] = cache_key
+                pending.append((i, claim, evidence))
         
-        for item in evidence:
-            norm_item = self._normalize_text(item)
-            item_entities = set(re.findall(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b', item))
+        logger.info(f"Bulk verification: {len(items) - len(pending)} resolved locally, {len(pending)} need the LLM")
+        
+        retry = []
+        batches = self.prompt_builder.build_bulk_batches(pending)
+        for batch_ids, user_message, estimated_tokens in batches:
+            completion = Completion(content="")
+            try:
+                completion = self._complete(
+                    user_message,
+                    BULK_COMPLETION_TOKENS_PER_ITEM * len(batch_ids),
+                    estimated_tokens
+                )
+                parsed = self._parse_bulk_response(completion.content, len(batch_ids))
+            except Exception as e:
+                logger.error(f"Bulk LLM request failed for {len(batch_ids)} claims: {e}")
+                parsed = {}
             
-            # Check if claim mentions one country but evidence mentions another
-            countries = ['india', 'china', 'usa', 'england', 'france', 'germany', 'japan']
-            claim_countries = [c for c in countries if c in norm_claim]
-            item_countries = [c for c in countries if c in norm_item]
+            # Split billed usage evenly across the entries of the batch
+            prompt_share = (completion.prompt_tokens or estimated_tokens) // len(batch_ids)
+            completion_share = (completion.completion_tokens or 0) // len(batch_ids)
             
-            if claim_countries and item_countries:
-                if claim_countries[0] != item_countries[0]:
-                    return Verdict(
-                        verdict="False",
-                        confidence=0.90,
-                        reasoning=f"The claim refers to {claim_countries[0].title()} but the evidence discusses {item_countries[0].title()}. This is a clear contradiction."
-                    )
-        
-        return None
-    
-    def _fallback_verification(self, claim: str, evidence: List[str], error_msg: str) -> Verdict:
-        """Fallback rule-based verification when LLM fails"""
+            for position, i in enumerate(batch_ids, start=1):
+                result = parsed.get(position)
+                if result is None:
+                    retry.append(i)
+                    continue
+                result.prompt_tokens = prompt_share
+                result.completion_tokens = completion_share
+                query_cache.set(cache_keys[i], result.dict(exclude=USAGE_FIELDS))
+                results[i] = result
+        
+        if retry:
+            logger.info(f"Re-issuing {len(retry)} malformed bulk entries singly")
+        for i in retry:
+            claim, evidence = items[i]
+            results[i] = self.get_verdict(claim, evidence, evidence_ids=evidence_ids[i] if evidence_ids else None)
+        
+        return results
+    
+    def _parse_bulk_response(self, content: str, batch_size: int) -> Dict[int, Verdict]:
+        """Validate each entry of a bulk response; malformed entries are left out"""
+        data = json.loads(content)
+        entries = data.get("verdicts", []) if isinstance(data, dict) else data
+        
+        parsed = {}
+        for entry in entries:
+            try:
+                position = int(entry.pop("id"))
+                result = Verdict(**entry)
+            except Exception as e:
+                logger.warning(f"Skipping malformed bulk entry: {e}")
+                continue
+            if not 1 <= position <= batch_size or result.verdict not in VALID_VERDICTS:
+                logger.warning(f"Skipping invalid bulk entry {position}: {result.verdict}")
+                continue
+            result.confidence = max(0.0, min(1.0, result.confidence))
+            parsed[position] = result
+        return parsed
+    
+    def _check_contradiction(
+        self, claim: str, evidence: List[str], evidence_ids: Optional[List[int]] = None
+    ) -> Optional[Verdict]:
+        """Check for a clear numeric, date or place mismatch with the best-matching evidence"""
+        found = contradiction_detector.check(claim, evidence, evidence_ids)
+        if found is None:
+            return None
+        return Verdict(
+            verdict="False",
+            confidence=CONTRADICTION_CONFIDENCE,
+            reasoning=(
+                f"The claim states {found.kind} {found.claimed}, but the evidence states {found.found}: "
+                f"'{found.evidence[:200]}'. This is a clear contradiction."
+            )
+        )
+    
+    def _fallback_verification(self, claim: str, evidence: List[str], note: str = "LLM unavailable") -> Verdict:
+        """Rule-based verification from the retrieved evidence when the LLM fails or there is no time for it"""
         logger.info("Using fallback rule-based verification")
         
         norm_claim = self._normalize_text(claim)
@@ -247,7 +366,64 @@ Return a JSON with these fields: verdict, confidence, reasoning. The output MUST
         return Verdict(
             verdict=verdict,
             confidence=confidence,
-            reasoning=f"{reasoning} (Note: LLM unavailable, using rule-based verification)"
+            reasoning=f"{reasoning} (Note: {note}, using rule-based verification)"
         )
 
-llm_service = LLMService()
\ No newline at end of file
+class VerdictBatcher:
+    """
+    Collects verdict requests from concurrent pipeline runs and verifies them
+    together with get_verdicts_bulk. A batch is sent once BULK_MAX_BATCH_SIZE
+    claims are waiting or BULK_LINGER_MS after the first one arrived; batches
+    run on the service's call pool, so several can be in flight.
+    """
+    
+    def __init__(self, service: LLMService, max_batch: int = BULK_MAX_BATCH_SIZE, linger_ms: float = BULK_LINGER_MS):
+        self.service = service
+        self.max_batch = max_batch
+        self.linger = linger_ms / 1000
+        self.batches = 0
+        self._queue: List[Tuple[str, List[str], Optional[List[int]], Future]] = []
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+    
+    def get_verdict(self, claim: str, evidence: List[str], evidence_ids: Optional[List[int]] = None) -> Verdict:
+        """Blocks until the batch holding this claim has been verified"""
+        future: Future = Future()
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="verdict-batcher", daemon=True)
+                self._thread.start()
+            self._queue.append((claim, evidence, evidence_ids, future))
+            self._cond.notify()
+        return future.result()
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                flush_at = time.monotonic() + self.linger
+                while len(self._queue) < self.max_batch:
+                    remaining = flush_at - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch, self._queue = self._queue[:self.max_batch], self._queue[self.max_batch:]
+            self.batches += 1
+            self.service._call_pool.submit(self._verify, batch)
+    
+    def _verify(self, batch):
+        try:
+            verdicts = self.service.get_verdicts_bulk(
+                [(claim, evidence) for claim, evidence, _, _ in batch],
+                evidence_ids=[ids for _, _, ids, _ in batch]
+            )
+            for (_, _, _, future), verdict in zip(batch, verdicts):
+                future.set_result(verdict)
+        except Exception as e:
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+llm_service = LLMService()
+verdict_batcher = VerdictBatcher(llm_service)
\ No newline at end of file
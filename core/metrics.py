@@ -1,13 +1,28 @@
 # core/metrics.py
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field, fields
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple, Callable, Optional
+from bisect import bisect_left
+from collections import deque
+from pathlib import Path
+import atexit
 import json
 import logging
-from config import METRICS_PATH
+import os
+import queue
+import threading
+import time
+from config import (
+    METRICS_PATH, LATENCY_BUCKETS, METRICS_FORMAT, METRICS_WINDOW,
+    METRICS_QUEUE_SIZE, METRICS_BATCH_SIZE, METRICS_FLUSH_INTERVAL_SECONDS,
+    METRICS_MAX_BYTES, METRICS_ROTATE_INTERVAL_HOURS, METRICS_BACKUP_COUNT,
+    METRICS_STATE_PATH, ANALYTICS_STORE_ENABLED, FRESHNESS_BUCKETS
+)
 
 logger = logging.getLogger(__name__)
 
+VERDICTS = ('True', 'False', 'Unverifiable')
+
 @dataclass
 class PipelineMetrics:
     timestamp: str
@@ -20,60 +35,489 @@ class PipelineMetrics:
     num_evidence_retrieved: int
     cache_hit: bool
     input_length: int
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    stage_timings: Dict[str, float] = field(default_factory=dict)  # Seconds per traced span
+    degradations: List[str] = field(default_factory=list)  # Deadline degradations applied
+
+class Histogram:
+    """Fixed-bucket histogram (Prometheus style); observe() is O(1) for a fixed bucket count"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by linear interpolation inside its bucket"""
+        if self.count == 0:
+            return 0.0
+
+        rank = q * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= rank and bucket_count > 0:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                if i == len(self.buckets):
+                    return lower  # +Inf bucket: best estimate is its lower edge
+                upper = self.buckets[i]
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+    def cumulative_counts(self) -> List[Tuple[str, int]]:
+        """(le label, cumulative count) pairs as exposed by Prometheus"""
+        result = []
+        running = 0
+        for upper, bucket_count in zip(list(self.buckets) + [float('inf')], self.counts):
+            running += bucket_count
+            result.append(("+Inf" if upper == float('inf') else f"{upper:g}", running))
+        return result
+
+    def to_state(self) -> Dict[str, Any]:
+        return {'buckets': list(self.buckets), 'counts': self.counts, 'sum': self.sum, 'count': self.count}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'Histogram':
+        hist = cls(tuple(state['buckets']))
+        if len(state['counts']) == len(hist.counts):
+            hist.counts = list(state['counts'])
+            hist.sum = state['sum']
+            hist.count = state['count']
+        return hist
+
+def metrics_to_columns(batch: List[PipelineMetrics]) -> Dict[str, Any]:
+    """Pack a batch of rows column-wise: one list per field, names written once"""
+    columns = {f.name: [getattr(m, f.name) for m in batch] for f in fields(PipelineMetrics)}
+    return {'n': len(batch), 'columns': columns}
+
+def columns_to_metrics(record: Dict[str, Any]) -> List[PipelineMetrics]:
+    columns = record['columns']
+    return [
+        PipelineMetrics(**{name: values[i] for name, values in columns.items()})
+        for i in range(record['n'])
+    ]
+
+class MetricsWriter:
+    """
+    Background metrics writer. Requests only enqueue rows (never block on
+    disk); a daemon thread writes them in batches and rotates the file by
+    size or age. When the bounded queue is full, rows are dropped and counted.
+    """
+
+    _STOP = object()
+
+    def __init__(self, path: Path = METRICS_PATH, fmt: str = METRICS_FORMAT):
+        if fmt not in ('jsonl', 'columnar'):
+            raise ValueError(f"Unknown metrics format '{fmt}'. Use 'jsonl' or 'columnar'.")
+        self.path = path
+        self.format = fmt
+        self.queue: queue.Queue = queue.Queue(maxsize=METRICS_QUEUE_SIZE)
+        self.dropped = 0
+        self.batch_listeners: List[Callable[[List[PipelineMetrics]], None]] = []
+        self._opened_at = time.time()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="metrics-writer", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.close)
+
+    def submit(self, metric: PipelineMetrics) -> bool:
+        """Queue a row for writing. Returns False if it had to be dropped."""
+        self._ensure_started()
+        try:
+            self.queue.put_nowait(metric)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning(f"Metrics queue full; dropped {self.dropped} rows so far")
+            return False
+
+    def _run(self):
+        batch: List[PipelineMetrics] = []
+        last_flush = time.monotonic()
+        while True:
+            timeout = max(0.0, METRICS_FLUSH_INTERVAL_SECONDS - (time.monotonic() - last_flush))
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is self._STOP:
+                self._flush(batch)
+                return
+            if item is not None:
+                batch.append(item)
+
+            if len(batch) >= METRICS_BATCH_SIZE or (
+                batch and time.monotonic() - last_flush >= METRICS_FLUSH_INTERVAL_SECONDS
+            ):
+                self._flush(batch)
+                batch = []
+                last_flush = time.monotonic()
+
+    def _flush(self, batch: List[PipelineMetrics]):
+        if not batch:
+            return
+        try:
+            self._maybe_rotate()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a') as f:
+                if self.format == 'columnar':
+                    f.write(json.dumps(metrics_to_columns(batch)) + '\n')
+                else:
+                    f.writelines(json.dumps(asdict(m)) + '\n' for m in batch)
+        except Exception as e:
+            logger.error(f"Failed to write {len(batch)} metrics: {e}")
+
+        for listener in self.batch_listeners:
+            try:
+                listener(batch)
+            except Exception as e:
+                logger.error(f"Metrics batch listener failed: {e}")
+
+    def rotated_path(self, n: int) -> Path:
+        return self.path.with_name(f"{self.path.name}.{n}")
+
+    def _maybe_rotate(self):
+        """Shift metrics.jsonl -> .1 -> .2 ... once the file is too big or too old"""
+        if not self.path.exists():
+            self._opened_at = time.time()
+            return
+        too_big = self.path.stat().st_size >= METRICS_MAX_BYTES
+        too_old = time.time() - self._opened_at >= METRICS_ROTATE_INTERVAL_HOURS * 3600
+        if not (too_big or too_old):
+            return
+
+        oldest = self.rotated_path(METRICS_BACKUP_COUNT)
+        if oldest.exists():
+            oldest.unlink()
+        for n in range(METRICS_BACKUP_COUNT - 1, 0, -1):
+            if self.rotated_path(n).exists():
+                os.replace(self.rotated_path(n), self.rotated_path(n + 1))
+        os.replace(self.path, self.rotated_path(1))
+        self._opened_at = time.time()
+        logger.info(f"Rotated metrics file ({'size' if too_big else 'age'} limit)")
+
+    def close(self):
+        """Flush pending rows and stop the writer thread"""
+        if self._thread is not None and self._thread.is_alive():
+            self.queue.put(self._STOP)
+            self._thread.join(timeout=10)
 
 class MetricsCollector:
     """Collect and analyze pipeline performance metrics"""
-    
+
     def __init__(self):
-        self.metrics: List[PipelineMetrics] = []
+        # Bounded window of recent rows; older history lives on disk
+        self.metrics: deque = deque(maxlen=METRICS_WINDOW)
+        self._lock = threading.Lock()
+
+        # Running aggregates, updated in O(1) per request
+        self.total_queries = 0
+        self.cache_hits = 0
+        self.confidence_sum = 0.0
+        self.evidence_sum = 0
+        self.prompt_tokens_total = 0
+        self.completion_tokens_total = 0
+        self.verdict_counts = {verdict: 0 for verdict in VERDICTS}
+        self.degraded_requests = 0
+        self.degradation_counts: Dict[str, int] = {}
+        self.stage_histograms: Dict[str, Histogram] = {}
+        self.freshness = Histogram(FRESHNESS_BUCKETS)  # Ingest lag, not persisted
+        # Admission control (API), not persisted
+        self.queue_wait: Dict[str, Histogram] = {}
+        self.queue_depth: Dict[str, int] = {}
+        self.rejections: Dict[Tuple[str, str], int] = {}
+
+        self.writer = MetricsWriter()
+        self.writer.batch_listeners.append(lambda batch: self.save_state())
+        if ANALYTICS_STORE_ENABLED:
+            self.writer.batch_listeners.append(self._append_to_analytics)
+
         self.load_from_disk()
-    
+
+    def _observe(self, metric: PipelineMetrics):
+        """Fold one request into the counters and per-stage histograms"""
+        self.total_queries += 1
+        self.cache_hits += int(metric.cache_hit)
+        self.confidence_sum += metric.confidence
+        self.evidence_sum += metric.num_evidence_retrieved
+        self.prompt_tokens_total += metric.prompt_tokens
+        self.completion_tokens_total += metric.completion_tokens
+        self.verdict_counts[metric.verdict] = self.verdict_counts.get(metric.verdict, 0) + 1
+        self.degraded_requests += int(bool(metric.degradations))
+        for name in metric.degradations:
+            self.degradation_counts[name] = self.degradation_counts.get(name, 0) + 1
+
+        # Metrics written before tracing only carry the coarse stage times
+        timings = metric.stage_timings or {
+            'extract': metric.claim_extraction_time,
+            'retrieve': metric.retrieval_time,
+            'verdict': metric.llm_time,
+            'pipeline': metric.total_time,
+        }
+        for stage, seconds in timings.items():
+            if stage not in self.stage_histograms:
+                self.stage_histograms[stage] = Histogram()
+            self.stage_histograms[stage].observe(seconds)
+
     def log_metric(self, metric: PipelineMetrics):
-        """Log a metric entry"""
-        self.metrics.append(metric)
-        
-        # Write to disk (append mode)
+        """Log a metric entry (disk writes happen on the background writer)"""
+        with self._lock:
+            self.metrics.append(metric)
+            self._observe(metric)
+        self.writer.submit(metric)
+
+    def observe_freshness(self, seconds: float):
+        """Record how long an ingested fact took from publication to being searchable"""
+        with self._lock:
+            self.freshness.observe(max(seconds, 0.0))
+
+    def observe_queue_wait(self, priority: str, seconds: float):
+        """Time an admitted request waited for a pipeline worker"""
+        with self._lock:
+            if priority not in self.queue_wait:
+                self.queue_wait[priority] = Histogram()
+            self.queue_wait[priority].observe(seconds)
+
+    def set_queue_depth(self, priority: str, depth: int):
+        self.queue_depth[priority] = depth
+
+    def count_rejection(self, priority: str, reason: str):
+        with self._lock:
+            key = (priority, reason)
+            self.rejections[key] = self.rejections.get(key, 0) + 1
+
+    def _append_to_analytics(self, batch: List[PipelineMetrics]):
+        # Imported on the writer thread: analytics_store itself imports this module
+        from core.analytics_store import analytics_store
+        analytics_store.append(batch)
+
+    def recent(self, n: int = 100) -> List[PipelineMetrics]:
+        """The last n metric rows still held in memory"""
+        with self._lock:
+            return list(self.metrics)[-n:]
+
+    def save_state(self):
+        """Persist counters and histograms so restarts need not replay the log"""
+        with self._lock:
+            state = {
+                'total_queries': self.total_queries,
+                'cache_hits': self.cache_hits,
+                'confidence_sum': self.confidence_sum,
+                'evidence_sum': self.evidence_sum,
+                'prompt_tokens_total': self.prompt_tokens_total,
+                'completion_tokens_total': self.completion_tokens_total,
+                'verdict_counts': dict(self.verdict_counts),
+                'degraded_requests': self.degraded_requests,
+                'degradation_counts': dict(self.degradation_counts),
+                'stage_histograms': {stage: h.to_state() for stage, h in self.stage_histograms.items()},
+            }
         try:
-            METRICS_PATH.parent.mkdir(parents=True, exist_ok=True)
-            with open(METRICS_PATH, 'a') as f:
-                f.write(json.dumps(asdict(metric)) + '\n')
+            tmp_path = METRICS_STATE_PATH.with_name(METRICS_STATE_PATH.name + '.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, METRICS_STATE_PATH)
         except Exception as e:
-            logger.error(f"Failed to write metric: {e}")
-    
+            logger.error(f"Failed to save metrics state: {e}")
+
+    def _load_state(self) -> bool:
+        if not METRICS_STATE_PATH.exists():
+            return False
+        with open(METRICS_STATE_PATH, 'r') as f:
+            state = json.load(f)
+        self.total_queries = state['total_queries']
+        self.cache_hits = state['cache_hits']
+        self.confidence_sum = state['confidence_sum']
+        self.evidence_sum = state['evidence_sum']
+        self.prompt_tokens_total = state['prompt_tokens_total']
+        self.completion_tokens_total = state['completion_tokens_total']
+        self.verdict_counts.update(state['verdict_counts'])
+        # Absent from state files written before deadlines existed
+        self.degraded_requests = state.get('degraded_requests', 0)
+        self.degradation_counts = dict(state.get('degradation_counts', {}))
+        self.stage_histograms = {
+            stage: Histogram.from_state(h) for stage, h in state['stage_histograms'].items()
+        }
+        return True
+
+    def _read_tail(self, path: Path, max_lines: int, block_size: int = 64 * 1024) -> List[str]:
+        """Read the last max_lines lines of a file without scanning it from the start"""
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            data = b''
+            while position > 0 and data.count(b'\n') <= max_lines:
+                read_size = min(block_size, position)
+                position -= read_size
+                f.seek(position)
+                data = f.read(read_size) + data
+        lines = data.decode('utf-8', errors='ignore').splitlines()
+        # The first line may be partial unless we reached the start of the file
+        if position > 0:
+            lines = lines[1:]
+        return [line for line in lines[-max_lines:] if line.strip()]
+
+    def _parse_line(self, line: str) -> List[PipelineMetrics]:
+        data = json.loads(line)
+        if 'columns' in data:
+            return columns_to_metrics(data)
+        return [PipelineMetrics(**data)]
+
     def load_from_disk(self):
-        """Load metrics from disk"""
+        """Restore aggregates from the state file and the recent window from the log tail"""
         try:
-            if METRICS_PATH.exists():
-                with open(METRICS_PATH, 'r') as f:
-                    for line in f:
-                        data = json.loads(line.strip())
-                        self.metrics.append(PipelineMetrics(**data))
-                logger.info(f"Loaded {len(self.metrics)} metrics from disk")
+            has_state = self._load_state()
+
+            # Newest rows live in the current file, older ones in .1, .2, ...
+            paths = [METRICS_PATH] + [self.writer.rotated_path(n) for n in range(1, METRICS_BACKUP_COUNT + 1)]
+            window: List[PipelineMetrics] = []
+            for path in paths:
+                if len(window) >= METRICS_WINDOW or not path.exists():
+                    continue
+                rows = []
+                for line in self._read_tail(path, METRICS_WINDOW):
+                    rows.extend(self._parse_line(line))
+                window = rows[-(METRICS_WINDOW - len(window)):] + window
+
+            self.metrics.extend(window)
+            if not has_state:
+                # First start after upgrading: seed the aggregates from the window
+                for metric in window:
+                    self._observe(metric)
+            logger.info(f"Loaded {len(self.metrics)} recent metrics ({self.total_queries} total) from disk")
         except Exception as e:
             logger.error(f"Failed to load metrics: {e}")
-    
+
+    def get_latency_percentiles(self) -> Dict[str, Dict[str, float]]:
+        """p50/p95/p99 (seconds) and request count for every traced stage"""
+        with self._lock:
+            return {
+                stage: {
+                    'p50': hist.quantile(0.50),
+                    'p95': hist.quantile(0.95),
+                    'p99': hist.quantile(0.99),
+                    'count': hist.count,
+                }
+                for stage, hist in sorted(self.stage_histograms.items())
+            }
+
     def get_summary(self) -> Dict[str, Any]:
         """Get summary statistics"""
-        if not self.metrics:
+        if self.total_queries == 0:
             return {
                 'total_queries': 0,
                 'message': 'No metrics collected yet'
             }
-        
-        recent = self.metrics[-100:]  # Last 100 queries
-        
+
+        total = self.total_queries
+        pipeline_hist = self.stage_histograms.get('pipeline', Histogram())
+
         return {
-            'total_queries': len(self.metrics),
-            'recent_queries': len(recent),
-            'avg_total_time': sum(m.total_time for m in recent) / len(recent),
-            'avg_confidence': sum(m.confidence for m in recent) / len(recent),
-            'cache_hit_rate': sum(1 for m in recent if m.cache_hit) / len(recent),
-            'verdict_distribution': {
-                'True': sum(1 for m in recent if m.verdict == 'True'),
-                'False': sum(1 for m in recent if m.verdict == 'False'),
-                'Unverifiable': sum(1 for m in recent if m.verdict == 'Unverifiable'),
-            },
-            'avg_evidence_count': sum(m.num_evidence_retrieved for m in recent) / len(recent)
+            'total_queries': total,
+            'avg_total_time': pipeline_hist.sum / max(pipeline_hist.count, 1),
+            'p50_total_time': pipeline_hist.quantile(0.50),
+            'p95_total_time': pipeline_hist.quantile(0.95),
+            'p99_total_time': pipeline_hist.quantile(0.99),
+            'avg_confidence': self.confidence_sum / total,
+            'cache_hit_rate': self.cache_hits / total,
+            'verdict_distribution': {verdict: self.verdict_counts.get(verdict, 0) for verdict in VERDICTS},
+            'avg_evidence_count': self.evidence_sum / total,
+            'degraded_rate': self.degraded_requests / total,
+            'degradations': dict(self.degradation_counts),
+            'avg_prompt_tokens': self.prompt_tokens_total / total,
+            'avg_completion_tokens': self.completion_tokens_total / total
         }
 
+    def render_prometheus(self) -> str:
+        """Render counters and histograms in the Prometheus text exposition format"""
+        lines = [
+            "# HELP factcheck_requests_total Fact-checking requests completed.",
+            "# TYPE factcheck_requests_total counter",
+            f"factcheck_requests_total {self.total_queries}",
+            "# HELP factcheck_cache_hits_total Requests whose verdict came from the cache.",
+            "# TYPE factcheck_cache_hits_total counter",
+            f"factcheck_cache_hits_total {self.cache_hits}",
+            "# HELP factcheck_metrics_dropped_total Metric rows dropped because the writer queue was full.",
+            "# TYPE factcheck_metrics_dropped_total counter",
+            f"factcheck_metrics_dropped_total {self.writer.dropped}",
+            "# HELP factcheck_verdicts_total Verdicts returned, by verdict.",
+            "# TYPE factcheck_verdicts_total counter",
+        ]
+        with self._lock:
+            for verdict, count in sorted(self.verdict_counts.items()):
+                lines.append(f'factcheck_verdicts_total{{verdict="{verdict}"}} {count}')
+
+            lines += [
+                "# HELP factcheck_degraded_requests_total Requests that degraded to meet their deadline.",
+                "# TYPE factcheck_degraded_requests_total counter",
+                f"factcheck_degraded_requests_total {self.degraded_requests}",
+                "# HELP factcheck_degradations_total Deadline degradations applied, by kind.",
+                "# TYPE factcheck_degradations_total counter",
+            ]
+            for name, count in sorted(self.degradation_counts.items()):
+                lines.append(f'factcheck_degradations_total{{degradation="{name}"}} {count}')
+
+            lines += [
+                "# HELP factcheck_llm_tokens_total LLM tokens billed, by type.",
+                "# TYPE factcheck_llm_tokens_total counter",
+                f'factcheck_llm_tokens_total{{type="prompt"}} {self.prompt_tokens_total}',
+                f'factcheck_llm_tokens_total{{type="completion"}} {self.completion_tokens_total}',
+                "# HELP factcheck_stage_latency_seconds Latency of each pipeline stage.",
+                "# TYPE factcheck_stage_latency_seconds histogram",
+            ]
+            for stage, hist in sorted(self.stage_histograms.items()):
+                for le, count in hist.cumulative_counts():
+                    lines.append(f'factcheck_stage_latency_seconds_bucket{{stage="{stage}",le="{le}"}} {count}')
+                lines.append(f'factcheck_stage_latency_seconds_sum{{stage="{stage}"}} {hist.sum}')
+                lines.append(f'factcheck_stage_latency_seconds_count{{stage="{stage}"}} {hist.count}')
+
+            if self.freshness.count:
+                lines += [
+                    "# HELP factcheck_ingest_freshness_seconds Lag from publication to searchable for ingested facts.",
+                    "# TYPE factcheck_ingest_freshness_seconds histogram",
+                ]
+                for le, count in self.freshness.cumulative_counts():
+                    lines.append(f'factcheck_ingest_freshness_seconds_bucket{{le="{le}"}} {count}')
+                lines.append(f'factcheck_ingest_freshness_seconds_sum {self.freshness.sum}')
+                lines.append(f'factcheck_ingest_freshness_seconds_count {self.freshness.count}')
+
+            if self.queue_depth or self.rejections:
+                lines += [
+                    "# HELP factcheck_queue_depth Requests waiting for a pipeline worker, by priority.",
+                    "# TYPE factcheck_queue_depth gauge",
+                ]
+                for priority, depth in sorted(self.queue_depth.items()):
+                    lines.append(f'factcheck_queue_depth{{priority="{priority}"}} {depth}')
+                lines += [
+                    "# HELP factcheck_queue_wait_seconds Time admitted requests waited for a worker.",
+                    "# TYPE factcheck_queue_wait_seconds histogram",
+                ]
+                for priority, hist in sorted(self.queue_wait.items()):
+                    for le, count in hist.cumulative_counts():
+                        lines.append(f'factcheck_queue_wait_seconds_bucket{{priority="{priority}",le="{le}"}} {count}')
+                    lines.append(f'factcheck_queue_wait_seconds_sum{{priority="{priority}"}} {hist.sum}')
+                    lines.append(f'factcheck_queue_wait_seconds_count{{priority="{priority}"}} {hist.count}')
+                lines += [
+                    "# HELP factcheck_rejected_total Requests refused with 429, by priority and reason.",
+                    "# TYPE factcheck_rejected_total counter",
+                ]
+                for (priority, reason), count in sorted(self.rejections.items()):
+                    lines.append(f'factcheck_rejected_total{{priority="{priority}",reason="{reason}"}} {count}')
+
+        return "\n".join(lines) + "\n"
+
 metrics_collector = MetricsCollector()
\ No newline at end of file
@@ -0,0 +1,314 @@
+# core/profiling.py
+"""
+On-demand profiling of live pipeline runs.
+
+A PROFILE_SAMPLE_RATE fraction of runs (or a run asked for with
+/verify?profile=cpu|memory when ALLOW_PROFILE_REQUESTS=true) is profiled
+into PROFILES_DIR, one file set per run:
+
+  cpu     <run>.pstats     cProfile stats (python -m pstats, snakeviz)
+          <run>.collapsed  stack samples every PROFILE_SAMPLE_INTERVAL_MS,
+                           one "frame;frame;frame count" line per stack
+                           (flamegraph.pl, speedscope, inferno)
+  memory  <run>.tracemalloc        tracemalloc snapshot (Snapshot.load)
+          <run>.alloc.collapsed    memory the run left allocated, by stack
+  both    <run>.json       summary: time or retained bytes by package (torch,
+                           tokenizers, pandas, json, core, ...) and the top
+                           functions or allocation sites
+
+Only one run is profiled at a time (cProfile and tracemalloc are
+process-wide); runs that would overlap are served unprofiled. With the
+rate at 0 and no flag, the cost per run is one comparison.
+
+    python -m core.profiling            # summaries of the latest runs
+"""
+import argparse
+import cProfile
+import itertools
+import json
+import logging
+import os
+import pstats
+import random
+import sys
+import sysconfig
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from config import (
+    PROFILE_SAMPLE_RATE, PROFILE_MODE, PROFILES_DIR, PROFILE_SAMPLE_INTERVAL_MS,
+    PROFILE_TRACEMALLOC_FRAMES, PROFILE_TOP_N, PROFILE_MAX_RUNS
+)
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("cpu", "memory")
+
+_ROOTS = [str(Path(__file__).resolve().parent.parent), sysconfig.get_paths()["stdlib"]]
+
+@lru_cache(maxsize=8192)
+def _short_path(filename: str) -> str:
+    """Path relative to site-packages, the repo, the stdlib or sys.path ("torch/nn/modules/module.py")"""
+    path = filename.replace("\\", "/")
+    for marker in ("/site-packages/", "/dist-packages/"):
+        if marker in path:
+            return path.split(marker, 1)[1]
+    for root in _ROOTS + sorted((p for p in sys.path if p), key=len, reverse=True):
+        if path.startswith(root.rstrip("/") + "/"):
+            return path[len(root.rstrip("/")) + 1:]
+    return path.lstrip("/")
+
+def _format_bytes(size: float) -> str:
+    return f"{size / 1e6:.1f}MB" if abs(size) >= 1e6 else f"{size / 1e3:.0f}KB"
+
+@lru_cache(maxsize=8192)
+def package_of(filename: str) -> str:
+    """Top-level package a file belongs to ("torch", "json", "core", "pipeline", ...)"""
+    if filename.startswith("<"):
+        return "python"  # <frozen ...>, <string>
+    top = _short_path(filename).split("/", 1)[0]
+    return top[:-3] if top.endswith(".py") else top
+
+def _frame_label(code) -> str:
+    return f"{_short_path(code.co_filename)}:{code.co_name}"
+
+class StackSampler:
+    """
+    Samples one thread's Python stack on a timer (py-spy style, in-process).
+    Native code shows up as time in the Python frame that called it.
+    """
+
+    def __init__(self, thread_id: int, interval: float, root=None):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.root = root  # Frame of the profiled call; frames below it are not recorded
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                if frame is self.root:
+                    break
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+@dataclass
+class ProfileRun:
+    name: str
+    mode: str
+    label: str
+    summary: Dict[str, Any] = field(default_factory=dict)
+
+class Profiler:
+    """Decides which runs to profile and writes their profiles"""
+
+    def __init__(self):
+        self.dir = PROFILES_DIR
+        self.sample_rate = PROFILE_SAMPLE_RATE
+        self.mode = PROFILE_MODE
+        self.runs = 0
+        self.skipped_busy = 0
+        self._seq = itertools.count()
+        self._busy = threading.Lock()
+
+    def choose(self, requested: Optional[str] = None) -> Optional[str]:
+        """Mode to profile this run in, or None (the common case)"""
+        if requested:
+            return requested
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return self.mode
+        return None
+
+    @contextmanager
+    def profile(self, mode: str, label: str = ""):
+        """Profile the block; yields the ProfileRun, or None when another run is being profiled"""
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode '{mode}'. Use one of: {', '.join(PROFILE_MODES)}")
+        if not self._busy.acquire(blocking=False):
+            self.skipped_busy += 1
+            yield None
+            return
+        try:
+            run = ProfileRun(f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(self._seq)}", mode, label[:100])
+            # Frame of the function using this context manager (this generator <- __enter__ <- caller)
+            root = sys._getframe(2)
+            with (self._cpu(run, root) if mode == "cpu" else self._memory(run)):
+                yield run
+            self.runs += 1
+        finally:
+            self._busy.release()
+
+    @contextmanager
+    def _cpu(self, run: ProfileRun, root):
+        sampler = StackSampler(threading.get_ident(), PROFILE_SAMPLE_INTERVAL_MS / 1000, root=root)
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        sampler.start()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            sampler.stop()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            try:
+                self._write_cpu(run, profile, sampler.stacks, elapsed_ms)
+            except Exception as e:
+                logger.error(f"Failed to write CPU profile {run.name}: {e}")
+
+    def _write_cpu(self, run: ProfileRun, profile: cProfile.Profile, stacks: Counter, elapsed_ms: float):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        profile.dump_stats(str(self.dir / f"{run.name}.pstats"))
+
+        by_package: Counter = Counter()
+        with open(self.dir / f"{run.name}.collapsed", "w") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{';'.join(_frame_label(code) for code in stack)} {count}\n")
+                # Self time goes to the package of the innermost frame
+                by_package[package_of(stack[-1].co_filename)] += count
+        samples = sum(stacks.values())
+
+        stats = pstats.Stats(profile).stats
+        top = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:PROFILE_TOP_N]
+        run.summary = {
+            "name": run.name,
+            "mode": run.mode,
+            "label": run.label,
+            "elapsed_ms": round(elapsed_ms, 2),
+            "samples": samples,
+            "by_package": {
+                package: round(count / samples, 4) for package, count in by_package.most_common()
+            } if samples else {},
+            "top_functions": [
+                {
+                    "function": f"{_short_path(filename)}:{line}:{name}",
+                    "calls": calls,
+                    "self_ms": round(self_time * 1000, 3),
+                    "cumulative_ms": round(cumulative * 1000, 3),
+                }
+                for (filename, line, name), (_, calls, self_time, cumulative, _) in top
+            ],
+        }
+        self._write_summary(run)
+
+    @contextmanager
+    def _memory(self, run: ProfileRun):
+        started_here = not tracemalloc.is_tracing()
+        if started_here:
+            tracemalloc.start(PROFILE_TRACEMALLOC_FRAMES)
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            after = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if started_here:
+                tracemalloc.stop()
+            try:
+                self._write_memory(run, before, after, peak, elapsed_ms)
+            except Exception as e:
+                logger.error(f"Failed to write memory profile {run.name}: {e}")
+
+    def _write_memory(self, run: ProfileRun, before, after, peak: int, elapsed_ms: float):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        ignore = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ]
+        before, after = before.filter_traces(ignore), after.filter_traces(ignore)
+        after.dump(str(self.dir / f"{run.name}.tracemalloc"))
+
+        by_package: Counter = Counter()
+        with open(self.dir / f"{run.name}.alloc.collapsed", "w") as f:
+            for stat in after.compare_to(before, "traceback"):
+                if stat.size_diff <= 0:
+                    continue
+                frames = stat.traceback  # Oldest frame first
+                f.write(f"{';'.join(f'{_short_path(fr.filename)}:{fr.lineno}' for fr in frames)} {stat.size_diff}\n")
+                by_package[package_of(frames[-1].filename)] += stat.size_diff
+
+        top = [s for s in after.compare_to(before, "lineno") if s.size_diff > 0][:PROFILE_TOP_N]
+        run.summary = {
+            "name": run.name,
+            "mode": run.mode,
+            "label": run.label,
+            "elapsed_ms": round(elapsed_ms, 2),
+            "peak_bytes": peak,
+            "retained_bytes": sum(by_package.values()),
+            "by_package": dict(by_package.most_common()),
+            "top_allocations": [
+                {
+                    "site": f"{_short_path(s.traceback[-1].filename)}:{s.traceback[-1].lineno}",
+                    "bytes": s.size_diff,
+                    "blocks": s.count_diff,
+                }
+                for s in top
+            ],
+        }
+        self._write_summary(run)
+
+    def _write_summary(self, run: ProfileRun):
+        with open(self.dir / f"{run.name}.json", "w") as f:
+            json.dump(run.summary, f, indent=2)
+        packages = ", ".join(f"{p} {v:.0%}" if run.mode == "cpu" else f"{p} {_format_bytes(v)}"
+                             for p, v in list(run.summary["by_package"].items())[:5])
+        logger.info(f"Profiled run {run.name} ({run.mode}, {run.summary['elapsed_ms']:.0f}ms): {packages}")
+        self._prune()
+
+    def _prune(self):
+        """Keep the newest PROFILE_MAX_RUNS runs"""
+        summaries = sorted(self.dir.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        for old in summaries[:-PROFILE_MAX_RUNS]:
+            run_name = old.name[:-len(".json")]
+            for path in self.dir.glob(f"{run_name}.*"):
+                path.unlink(missing_ok=True)
+
+    def latest(self, n: int = 10) -> List[Dict[str, Any]]:
+        """Summaries of the newest runs, newest first"""
+        if not self.dir.exists():
+            return []
+        summaries = sorted(self.dir.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)[:n]
+        return [json.loads(path.read_text()) for path in summaries]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'sample_rate': self.sample_rate,
+            'mode': self.mode,
+            'runs': self.runs,
+            'skipped_busy': self.skipped_busy,
+        }
+
+profiler = Profiler()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show summaries of the latest profiled runs")
+    parser.add_argument("--last", type=int, default=10, help="Number of runs to show")
+    args = parser.parse_args()
+    for summary in profiler.latest(args.last):
+        print(f"{summary['name']}  {summary['mode']:<6} {summary['elapsed_ms']:>9.1f}ms  {summary['label'][:60]}")
+        for package, share in list(summary["by_package"].items())[:8]:
+            value = f"{share:>7.1%}" if summary["mode"] == "cpu" else f"{_format_bytes(share):>7}"
+            print(f"    {package:<24}{value}")
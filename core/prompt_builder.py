@@ -0,0 +1,203 @@
+# core/prompt_builder.py
+import re
+import logging
+from typing import List, Set, Tuple
+from langchain_core.prompts import PromptTemplate
+from config import (
+    LLM_PROMPT_VARIANT, PROMPT_TOKEN_BUDGET,
+    EVIDENCE_MAX_TOKENS, EVIDENCE_DEDUP_THRESHOLD,
+    BULK_TOKEN_BUDGET, BULK_MAX_BATCH_SIZE, BULK_COMPLETION_TOKENS_PER_ITEM
+)
+
+logger = logging.getLogger(__name__)
+
+# Rough BPE approximation: words, 1-3 digit number chunks and single symbols.
+# Long words are split roughly every 6 characters, so the estimate errs high.
+_TOKEN_PATTERN = re.compile(r"[^\W\d_]+|\d{1,3}|[^\w\s]")
+_WORD_PATTERN = re.compile(r"\w+")
+
+FULL_TEMPLATE = """You are a precise fact-checking AI. Analyze claims against evidence strictly.
+
+RULES:
+1. 'True' - Evidence explicitly confirms ALL key facts in the claim
+2. 'False' - Evidence explicitly contradicts ANY key fact in the claim
+3. 'Unverifiable' - Evidence is insufficient or ambiguous
+
+EXAMPLES:
+
+Claim: "India has 28 states"
+Evidence: "India consists of 28 states and 8 union territories"
+Verdict: True (exact match)
+
+Claim: "The Eiffel Tower is in Berlin"
+Evidence: "The Eiffel Tower is located in Paris, France"
+Verdict: False (contradicts location)
+
+Claim: "Apple will launch new product tomorrow"
+Evidence: "Apple announced an event next week"
+Verdict: Unverifiable (timing doesn't match exactly)
+
+NOW ANALYZE:
+
+Claim: "{claim}"
+
+Evidence:
+{evidence}
+
+Apply normalization:
+- Ignore case, punctuation, number formats
+- "2005 crore" = "₹2,005 cr" = "Rs. 2005 crores"
+- "IREDA" = "India Renewable Energy Development Agency"
+
+Return a JSON with these fields: verdict, confidence, reasoning. The output MUST ONLY be the valid JSON string."""
+
+COMPACT_TEMPLATE = """Fact-check the claim using only the evidence.
+'True': evidence confirms all key facts. 'False': evidence contradicts any key fact. 'Unverifiable': otherwise.
+Ignore case, punctuation and number formats (2005 crore = ₹2,005 cr).
+
+Claim: "{claim}"
+
+Evidence:
+{evidence}
+
+Reply with JSON only: {{"verdict": ..., "confidence": 0.0-1.0, "reasoning": one or two sentences citing evidence numbers}}"""
+
+BULK_TEMPLATE = """Fact-check each numbered claim using only the evidence listed under it.
+'True': evidence confirms all key facts. 'False': evidence contradicts any key fact. 'Unverifiable': otherwise.
+Ignore case, punctuation and number formats (2005 crore = ₹2,005 cr).
+
+{items}
+
+Reply with JSON only, one entry per claim id:
+{{"verdicts": [{{"id": <claim id>, "verdict": ..., "confidence": 0.0-1.0, "reasoning": one sentence citing evidence}}]}}"""
+
+
+def count_tokens(text: str) -> int:
+    """Estimate the number of LLM tokens in text without calling the API"""
+    count = 0
+    for piece in _TOKEN_PATTERN.findall(text):
+        count += 1 + (len(piece) - 1) // 6
+    return count
+
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text at a word boundary so that it fits in max_tokens"""
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    kept = []
+    used = 0
+    for word in text.split():
+        cost = count_tokens(word)
+        if used + cost > max_tokens - 1:  # Reserve one token for the ellipsis
+            break
+        kept.append(word)
+        used += cost
+    return " ".join(kept) + " ..."
+
+
+class PromptBuilder:
+    """Builds verdict prompts that fit a token budget"""
+
+    def __init__(self, variant: str = LLM_PROMPT_VARIANT):
+        if variant not in ("full", "compact"):
+            raise ValueError(f"Unknown prompt variant '{variant}'. Use 'full' or 'compact'.")
+        self.variant = variant
+        self.template = PromptTemplate(
+            template=FULL_TEMPLATE if variant == "full" else COMPACT_TEMPLATE,
+            input_variables=["claim", "evidence"]
+        )
+        self.token_budget = PROMPT_TOKEN_BUDGET
+        self.evidence_max_tokens = EVIDENCE_MAX_TOKENS
+        self.dedup_threshold = EVIDENCE_DEDUP_THRESHOLD
+        self.base_tokens = count_tokens(self.template.format(claim="", evidence=""))
+
+    def _token_set(self, text: str) -> Set[str]:
+        return set(_WORD_PATTERN.findall(text.lower()))
+
+    def dedupe_evidence(self, evidence: List[str]) -> List[str]:
+        """Drop evidence items that are near-identical to a higher-ranked item"""
+        kept: List[Tuple[str, Set[str]]] = []
+        for item in evidence:
+            tokens = self._token_set(item)
+            is_duplicate = False
+            for _, kept_tokens in kept:
+                union = tokens | kept_tokens
+                if union and len(tokens & kept_tokens) / len(union) >= self.dedup_threshold:
+                    is_duplicate = True
+                    break
+            if not is_duplicate:
+                kept.append((item, tokens))
+
+        if len(kept) < len(evidence):
+            logger.info(f"Dropped {len(evidence) - len(kept)} near-duplicate evidence items")
+        return [item for item, _ in kept]
+
+    def select_evidence(self, claim: str, evidence: List[str]) -> List[str]:
+        """Dedupe, trim and cut evidence (in rank order) to fit the prompt budget"""
+        remaining = self.token_budget - self.base_tokens - count_tokens(claim)
+        selected = []
+        for item in self.dedupe_evidence(evidence):
+            item = trim_to_tokens(item, self.evidence_max_tokens)
+            cost = count_tokens(item) + 2  # Numbering and newline
+            if cost > remaining:
+                break
+            selected.append(item)
+            remaining -= cost
+        return selected
+
+    def format_evidence(self, evidence: List[str]) -> str:
+        return "\n".join([f"{i+1}. {e}" for i, e in enumerate(evidence)])
+
+    def build(self, claim: str, evidence: List[str]) -> Tuple[str, int]:
+        """
+        Build the verdict prompt for a claim.
+        Returns: (prompt text, estimated prompt tokens)
+        """
+        selected = self.select_evidence(claim, evidence)
+        prompt = self.template.format(claim=claim, evidence=self.format_evidence(selected))
+        return prompt, count_tokens(prompt)
+
+    def _format_bulk_item(self, position: int, claim: str, evidence: List[str]) -> str:
+        evidence = self.select_evidence(claim, evidence)
+        lines = [f"[{position}] Claim: \"{claim}\"", "Evidence:"]
+        lines.extend(f"  {i+1}. {e}" for i, e in enumerate(evidence))
+        return "\n".join(lines)
+
+    def build_bulk_batches(
+        self, items: List[Tuple[int, str, List[str]]]
+    ) -> List[Tuple[List[int], str, int]]:
+        """
+        Pack (item id, claim, evidence) triples into bulk prompts. A batch grows
+        until its prompt plus reserved completion tokens would exceed
+        BULK_TOKEN_BUDGET, or it reaches BULK_MAX_BATCH_SIZE.
+        Returns: list of (item ids in prompt order, prompt text, estimated prompt tokens)
+        """
+        base_tokens = count_tokens(BULK_TEMPLATE.format(items=""))
+        batches = []
+        batch_ids: List[int] = []
+        blocks: List[str] = []
+        used = base_tokens
+
+        def flush():
+            prompt = BULK_TEMPLATE.format(items="\n\n".join(blocks))
+            batches.append((list(batch_ids), prompt, count_tokens(prompt)))
+
+        for item_id, claim, evidence in items:
+            block = self._format_bulk_item(len(batch_ids) + 1, claim, evidence)
+            cost = count_tokens(block) + BULK_COMPLETION_TOKENS_PER_ITEM
+            if batch_ids and (used + cost > BULK_TOKEN_BUDGET or len(batch_ids) >= BULK_MAX_BATCH_SIZE):
+                flush()
+                batch_ids, blocks, used = [], [], base_tokens
+                block = self._format_bulk_item(1, claim, evidence)
+            batch_ids.append(item_id)
+            blocks.append(block)
+            used += cost
+
+        if batch_ids:
+            flush()
+
+        logger.info(f"Packed {len(items)} claims into {len(batches)} bulk prompts")
+        return batches
+
+prompt_builder = PromptBuilder()
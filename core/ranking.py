@@ -0,0 +1,102 @@
+# core/ranking.py
+import logging
+import threading
+import time
+from typing import List, Tuple, Optional
+import numpy as np
+from core.tracing import tracer
+from config import (
+    RANKING_ENABLED, RANKING_RECENCY_HALF_LIFE_DAYS, RANKING_RECENCY_WEIGHT,
+    RANKING_UNDATED_RECENCY, RANKING_SOURCE_WEIGHTS, RANKING_DEFAULT_SOURCE_WEIGHT,
+    RANKING_RELATIVE_CUTOFF, RANKING_PRIOR_REFRESH_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+class EvidenceRanker:
+    """
+    Blends CrossEncoder relevance with a per-fact prior (source weight x
+    recency decay). The prior is one float32 array aligned with fact ids,
+    rebuilt per snapshot and refreshed as facts age, so the blend for a
+    query is a gather plus a multiply.
+    """
+
+    def __init__(self):
+        self.enabled = RANKING_ENABLED
+        self._priors: Optional[np.ndarray] = None
+        self._priors_version = -1
+        self._priors_snapshot_id = None
+        self._priors_computed_at = 0.0
+        self._lock = threading.Lock()
+
+    def compute_priors(self, snapshot, now: Optional[float] = None) -> np.ndarray:
+        """source_weight * ((1 - w) + w * 0.5 ** (age / half_life)) for every fact id"""
+        now = now or time.time()
+        filter_index = snapshot.filter_index
+
+        source_weights = np.full(filter_index.size, RANKING_DEFAULT_SOURCE_WEIGHT, dtype=np.float32)
+        for source, bitmap in filter_index.by_source.items():
+            if source in RANKING_SOURCE_WEIGHTS:
+                source_weights[bitmap] = RANKING_SOURCE_WEIGHTS[source]
+
+        age_days = np.clip((now - filter_index.timestamps) / 86400, 0, None)
+        recency = np.where(
+            np.isnan(age_days),
+            RANKING_UNDATED_RECENCY,
+            0.5 ** (np.nan_to_num(age_days) / RANKING_RECENCY_HALF_LIFE_DAYS)
+        ).astype(np.float32)
+
+        return source_weights * ((1 - RANKING_RECENCY_WEIGHT) + RANKING_RECENCY_WEIGHT * recency)
+
+    def priors(self, snapshot) -> np.ndarray:
+        """Cached priors for this snapshot"""
+        stale = (
+            self._priors is None
+            or self._priors_snapshot_id != id(snapshot)
+            or self._priors_version != snapshot.version
+            or time.time() - self._priors_computed_at > RANKING_PRIOR_REFRESH_SECONDS
+        )
+        if stale:
+            with self._lock:
+                priors = self.compute_priors(snapshot)
+                self._priors, self._priors_version = priors, snapshot.version
+                self._priors_snapshot_id = id(snapshot)
+                self._priors_computed_at = time.time()
+            return priors
+        return self._priors
+
+    def rank(
+        self,
+        snapshot,
+        fact_ids: List[int],
+        relevance_scores: np.ndarray,
+        top_k: int
+    ) -> List[Tuple[int, float]]:
+        """
+        Order candidates by blended score and keep the top_k.
+        Evidence far below the best candidate is dropped so stale or weak
+        facts do not cost prompt tokens.
+        Returns: (fact_id, score) pairs, best first
+        """
+        if not fact_ids:
+            return []
+
+        scores = np.asarray(relevance_scores, dtype=np.float32)
+        if not self.enabled:
+            order = np.argsort(-scores)[:top_k]
+            return [(fact_ids[i], float(scores[i])) for i in order]
+
+        with tracer.span("rank", candidates=len(fact_ids)):
+            ids = np.asarray(fact_ids)
+            relevance = 1 / (1 + np.exp(-scores))  # CrossEncoder logits -> (0, 1)
+            blended = relevance * self.priors(snapshot)[ids]
+
+            order = np.argsort(-blended)[:top_k]
+            cutoff = blended[order[0]] * RANKING_RELATIVE_CUTOFF
+            kept = [i for i in order if blended[i] >= cutoff]
+
+        if len(kept) < len(order):
+            logger.info(f"Dropped {len(order) - len(kept)} weak/stale evidence items after ranking")
+        return [(int(ids[i]), float(blended[i])) for i in kept]
+
+evidence_ranker = EvidenceRanker()
@@ -1,8 +1,10 @@
 import logging
 from typing import List, Tuple
-from sentence_transformers import CrossEncoder
+import numpy as np
 
-from config import CROSS_ENCODER_MODEL
+from config import CROSS_ENCODER_MODEL, INFERENCE_MODE
+from core.tracing import tracer
+from core.inference import inference_client
 
 logger = logging.getLogger(__name__)
 
@@ -11,13 +13,31 @@ class ReRanker:
     
     def __init__(self):
         self.model = None
+        self.remote = INFERENCE_MODE == "server"  # Score on the model server instead of in-process
     
     def _initialize_model(self):
         if self.model is None:
+            # Imported lazily so server-mode API processes never load torch
+            from sentence_transformers import CrossEncoder
             logger.info(f"Loading CrossEncoder model: {CROSS_ENCODER_MODEL}")
             self.model = CrossEncoder(CROSS_ENCODER_MODEL, max_length=512)
             logger.info("CrossEncoder loaded successfully.")
             
+    def score(self, query: str, documents: List[str]) -> np.ndarray:
+        """CrossEncoder relevance score per document, in input order"""
+        if not documents:
+            return np.zeros(0, dtype=np.float32)
+        
+        pairs = [[query, doc] for doc in documents]
+        logger.info(f"Scoring {len(documents)} documents...")
+        if self.remote:
+            with tracer.span("rerank", documents=len(documents), remote=True):
+                return inference_client.score(pairs)
+        
+        self._initialize_model()
+        with tracer.span("rerank", documents=len(documents)):
+            return np.asarray(self.model.predict(pairs), dtype=np.float32)
+    
     def rerank(self, query: str, documents: List[str], top_k: int) -> List[Tuple[str, float]]:
         """
         Scores the documents against the query and returns the top_k sorted.
@@ -25,15 +45,9 @@ class ReRanker:
         """
         if not documents:
             return []
-            
-        self._initialize_model()
         
         # CrossEncoder expects pairs of (query, document)
-        pairs = [[query, doc] for doc in documents]
-        
-        # Predict scores
-        logger.info(f"Re-ranking {len(documents)} documents...")
-        scores = self.model.predict(pairs)
+        scores = self.score(query, documents)
         
         # Combine docs and scores, then sort descending
         doc_score_pairs = list(zip(documents, scores))
@@ -0,0 +1,226 @@
+# core/shared_index.py
+"""
+Read-only index bundles that many worker processes can map at once.
+
+A bundle is a directory of flat files: the FAISS index (memory-mapped with
+IO_FLAG_MMAP_IFC), fact texts as one UTF-8 blob plus offsets, BM25 as CSR
+postings and the filter bitmaps, all as .npy files opened with
+mmap_mode='r'. Pages come from the OS page cache, so N workers cost
+roughly one copy of the index instead of N.
+
+    python -m core.shared_index export     # bundle the current private index
+"""
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple, Union
+import faiss
+import numpy as np
+from rank_bm25 import BM25Okapi
+from core.fact_filters import FilterIndex
+from config import SHARED_INDEX_DIR, SHARED_INDEX_KEEP
+
+logger = logging.getLogger(__name__)
+
+CURRENT_POINTER = "CURRENT"
+
+class MmapTexts:
+    """Sequence of fact texts backed by a memory-mapped UTF-8 blob"""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode('utf-8')
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+class PostingsBM25:
+    """
+    BM25Okapi scores computed from CSR postings (term -> docs, term
+    frequencies). Only documents containing a query term are touched, and
+    the arrays can be memory-mapped. Scores match rank_bm25.BM25Okapi.
+    """
+
+    def __init__(
+        self,
+        vocab: Dict[str, int],
+        indptr: np.ndarray,
+        doc_ids: np.ndarray,
+        tfs: np.ndarray,
+        idf: np.ndarray,
+        norm: np.ndarray,
+        k1: float
+    ):
+        self.vocab = vocab
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self.idf = idf
+        self.norm = norm  # k1 * (1 - b + b * doc_len / avgdl) per document
+        self.k1 = k1
+        self.corpus_size = len(norm)
+
+    @staticmethod
+    def arrays_from_bm25(bm25: BM25Okapi) -> Tuple[List[str], Dict[str, np.ndarray], float]:
+        """Flatten a BM25Okapi into (terms, arrays, k1)"""
+        terms = sorted(bm25.idf)
+        column = {term: i for i, term in enumerate(terms)}
+
+        cols, docs, tfs = [], [], []
+        for doc_id, freqs in enumerate(bm25.doc_freqs):
+            for term, tf in freqs.items():
+                cols.append(column[term])
+                docs.append(doc_id)
+                tfs.append(tf)
+        cols = np.asarray(cols, dtype=np.int64)
+        order = np.argsort(cols, kind='stable')
+
+        doc_len = np.asarray(bm25.doc_len, dtype=np.float64)
+        arrays = {
+            'indptr': np.concatenate([[0], np.cumsum(np.bincount(cols, minlength=len(terms)))]).astype(np.int64),
+            'doc_ids': np.asarray(docs, dtype=np.int32)[order],
+            'tfs': np.asarray(tfs, dtype=np.float32)[order],
+            'idf': np.asarray([bm25.idf[t] for t in terms], dtype=np.float64),
+            'norm': (bm25.k1 * (1 - bm25.b + bm25.b * doc_len / bm25.avgdl)).astype(np.float64),
+        }
+        return terms, arrays, bm25.k1
+
+    def get_scores(self, query: List[str]) -> np.ndarray:
+        scores = np.zeros(self.corpus_size)
+        for term in query:
+            col = self.vocab.get(term)
+            if col is None:
+                continue
+            start, end = self.indptr[col], self.indptr[col + 1]
+            docs = self.doc_ids[start:end]
+            tf = self.tfs[start:end]
+            scores[docs] += self.idf[col] * tf * (self.k1 + 1) / (tf + self.norm[docs])
+        return scores
+
+    def get_batch_scores(self, query: List[str], doc_ids: List[int]) -> np.ndarray:
+        return self.get_scores(query)[doc_ids]
+
+def _bitmap_rows(bitmaps: Dict[str, np.ndarray], size: int) -> Tuple[List[str], np.ndarray]:
+    keys = sorted(bitmaps)
+    matrix = np.zeros((len(keys), size), dtype=bool)
+    for row, key in enumerate(keys):
+        matrix[row] = bitmaps[key]
+    return keys, matrix
+
+def export_bundle(snapshot, root: Path = SHARED_INDEX_DIR) -> Path:
+    """Write the snapshot as a new bundle and point CURRENT at it (atomic rename)"""
+    root.mkdir(parents=True, exist_ok=True)
+    name = f"v{snapshot.version}-{time.time_ns()}-{os.getpid()}"
+    tmp_dir = root / (name + ".tmp")
+    tmp_dir.mkdir()
+
+    faiss.write_index(snapshot.index, str(tmp_dir / "faiss.index"))
+
+    encoded = [text.encode('utf-8') for text in snapshot.facts]
+    offsets = np.concatenate([[0], np.cumsum([len(b) for b in encoded])]).astype(np.int64)
+    with open(tmp_dir / "texts.bin", 'wb') as f:
+        f.write(b''.join(encoded))
+    np.save(tmp_dir / "text_offsets.npy", offsets)
+
+    terms, arrays, k1 = PostingsBM25.arrays_from_bm25(snapshot.bm25)
+    for key, array in arrays.items():
+        np.save(tmp_dir / f"bm25_{key}.npy", array)
+
+    filter_index = snapshot.filter_index
+    sources, source_bitmaps = _bitmap_rows(filter_index.by_source, filter_index.size)
+    categories, category_bitmaps = _bitmap_rows(filter_index.by_category, filter_index.size)
+    np.save(tmp_dir / "source_bitmaps.npy", source_bitmaps)
+    np.save(tmp_dir / "category_bitmaps.npy", category_bitmaps)
+    np.save(tmp_dir / "timestamps.npy", filter_index.timestamps)
+    np.save(tmp_dir / "searchable.npy", filter_index.searchable)
+
+    with open(tmp_dir / "manifest.json", 'w') as f:
+        json.dump({
+            'version': snapshot.version,
+            'facts': len(snapshot.facts),
+            'created': time.time(),
+            'bm25_terms': terms,
+            'bm25_k1': k1,
+            'sources': sources,
+            'categories': categories,
+        }, f)
+
+    tmp_dir.rename(root / name)
+    pointer_tmp = root / (CURRENT_POINTER + ".tmp")
+    pointer_tmp.write_text(name)
+    os.replace(pointer_tmp, root / CURRENT_POINTER)
+    logger.info(f"Exported shared index bundle {name} ({len(snapshot.facts)} facts)")
+
+    _prune(root, keep=name)
+    return root / name
+
+def _prune(root: Path, keep: str):
+    """Remove old bundles; workers still mapping them keep their pages until they re-attach"""
+    bundles = sorted(
+        (p for p in root.iterdir() if p.is_dir() and not p.name.endswith(".tmp") and p.name != keep),
+        key=lambda p: p.stat().st_mtime
+    )
+    for old in bundles[:max(len(bundles) - (SHARED_INDEX_KEEP - 1), 0)]:
+        shutil.rmtree(old, ignore_errors=True)
+
+def current_bundle(root: Path = SHARED_INDEX_DIR) -> Optional[str]:
+    try:
+        return (root / CURRENT_POINTER).read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+def load_bundle(name: str, root: Path = SHARED_INDEX_DIR) -> Dict[str, Any]:
+    """Attach to a bundle read-only. Returns: index, bm25, facts, filter_index, version"""
+    path = root / name
+    with open(path / "manifest.json") as f:
+        manifest = json.load(f)
+
+    def mapped(filename: str) -> np.ndarray:
+        return np.load(path / filename, mmap_mode='r')
+
+    index = faiss.read_index(str(path / "faiss.index"), faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY)
+    facts = MmapTexts(np.memmap(path / "texts.bin", dtype=np.uint8, mode='r'), mapped("text_offsets.npy"))
+    bm25 = PostingsBM25(
+        vocab={term: i for i, term in enumerate(manifest['bm25_terms'])},
+        indptr=mapped("bm25_indptr.npy"),
+        doc_ids=mapped("bm25_doc_ids.npy"),
+        tfs=mapped("bm25_tfs.npy"),
+        idf=mapped("bm25_idf.npy"),
+        norm=mapped("bm25_norm.npy"),
+        k1=manifest['bm25_k1']
+    )
+    source_bitmaps = mapped("source_bitmaps.npy")
+    category_bitmaps = mapped("category_bitmaps.npy")
+    filter_index = FilterIndex(
+        by_source={key: source_bitmaps[row] for row, key in enumerate(manifest['sources'])},
+        by_category={key: category_bitmaps[row] for row, key in enumerate(manifest['categories'])},
+        timestamps=mapped("timestamps.npy"),
+        searchable=mapped("searchable.npy")
+    )
+    return {
+        'index': index,
+        'bm25': bm25,
+        'facts': facts,
+        'filter_index': filter_index,
+        'version': manifest['version'],
+    }
+
+if __name__ == "__main__":
+    # Usage: python -m core.shared_index export
+    logging.basicConfig(level=logging.INFO)
+    from core.vector_db import vector_db
+    vector_db.load()
+    print(f"Exported {export_bundle(vector_db.snapshot)}")
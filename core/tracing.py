@@ -0,0 +1,153 @@
+# core/tracing.py
+import json
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional
+from config import TRACING_ENABLED, TRACE_EXPORT_PATH, APP_TITLE, APP_VERSION
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    end_ns: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+@dataclass
+class Trace:
+    """Spans of one pipeline request, timed with perf_counter_ns"""
+    trace_id: str
+    start_unix_ns: int
+    start_perf_ns: int
+    spans: List[Span] = field(default_factory=list)
+
+    def timings_ms(self) -> Dict[str, float]:
+        """Total milliseconds per span name (repeated spans such as cache lookups are summed)"""
+        timings: Dict[str, float] = {}
+        for span in self.spans:
+            timings[span.name] = timings.get(span.name, 0.0) + span.duration_ms
+        return {name: round(ms, 3) for name, ms in timings.items()}
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+class Tracer:
+    """Lightweight nested-span tracer with an OTLP/JSON file exporter"""
+
+    def __init__(self):
+        self.export_enabled = TRACING_ENABLED
+        self.export_path = TRACE_EXPORT_PATH
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def trace(self, name: str, **attributes):
+        """Start a new trace with a root span; spans opened inside nest under it"""
+        trace = Trace(
+            trace_id=os.urandom(16).hex(),
+            start_unix_ns=time.time_ns(),
+            start_perf_ns=time.perf_counter_ns()
+        )
+        trace_token = _current_trace.set(trace)
+        try:
+            with self.span(name, **attributes):
+                yield trace
+        finally:
+            _current_trace.reset(trace_token)
+            if self.export_enabled:
+                self.export(trace)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Time a block as a child of the current span. No-op outside a trace."""
+        trace = _current_trace.get()
+        if trace is None:
+            yield None
+            return
+
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            trace_id=trace.trace_id,
+            span_id=os.urandom(8).hex(),
+            parent_id=parent.span_id if parent else None,
+            start_ns=time.perf_counter_ns(),
+            attributes=attributes
+        )
+        span_token = _current_span.set(span)
+        try:
+            yield span
+        finally:
+            span.end_ns = time.perf_counter_ns()
+            _current_span.reset(span_token)
+            trace.spans.append(span)
+
+    def _to_otlp(self, trace: Trace) -> Dict[str, Any]:
+        offset = trace.start_unix_ns - trace.start_perf_ns
+        spans = []
+        for span in trace.spans:
+            otlp_span = {
+                "traceId": span.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": 1,  # SPAN_KIND_INTERNAL
+                "startTimeUnixNano": str(span.start_ns + offset),
+                "endTimeUnixNano": str(span.end_ns + offset),
+                "attributes": [
+                    {"key": key, "value": _otlp_value(value)}
+                    for key, value in span.attributes.items()
+                ]
+            }
+            if span.parent_id:
+                otlp_span["parentSpanId"] = span.parent_id
+            spans.append(otlp_span)
+
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    {"key": "service.name", "value": {"stringValue": APP_TITLE}},
+                    {"key": "service.version", "value": {"stringValue": APP_VERSION}}
+                ]},
+                "scopeSpans": [{
+                    "scope": {"name": __name__},
+                    "spans": spans
+                }]
+            }]
+        }
+
+    def export(self, trace: Trace):
+        """Append the trace as one OTLP/JSON line (readable by the OTel collector file receiver)"""
+        try:
+            line = json.dumps(self._to_otlp(trace))
+            with self._lock:
+                self.export_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.export_path, 'a') as f:
+                    f.write(line + '\n')
+        except Exception as e:
+            logger.error(f"Failed to export trace: {e}")
+
+tracer = Tracer()
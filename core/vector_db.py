@@ -1,36 +1,109 @@
 # core/vector_db.py
 import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
-import pandas as pd
-from typing import List, Tuple, Dict, Any, Optional
+from dataclasses import dataclass
+from typing import List, Tuple, Dict, Any, Optional, Sequence
 import logging
+import os
 import pickle
+import threading
+import time
 from rank_bm25 import BM25Okapi
+from core.tracing import tracer
+from core.dedup import searchable_mask
+from core.fact_filters import FactFilter, FilterIndex
+from core.fact_store import fact_store
+from core.shared_index import export_bundle, current_bundle, load_bundle
+from core.inference import inference_client
+from core.cache import embedding_cache
 from config import (
     EMBEDDING_MODEL, VECTOR_INDEX_PATH, 
-    FACTS_CSV_PATH, DATA_DIR, BM25_INDEX_PATH,
-    TOP_K_RETRIEVE
+    DATA_DIR, BM25_INDEX_PATH,
+    TOP_K_RETRIEVE, INDEX_SERVING_MODE,
+    EXPORT_SHARED_INDEX, SHARED_INDEX_CHECK_SECONDS,
+    INFERENCE_MODE
 )
 
 logger = logging.getLogger(__name__)
 
+@dataclass(frozen=True)
+class IndexSnapshot:
+    """
+    Immutable view of everything a search reads. Writers build a new
+    snapshot and swap the reference, so readers never take a lock and
+    always see a consistent index/facts pair.
+    In shared serving mode the members are memory-mapped views of a
+    bundle (see core.shared_index) and metadata is None.
+    """
+    index: Any
+    bm25: Any  # BM25Okapi, or PostingsBM25 for a shared bundle
+    facts: Sequence[str]
+    metadata: Optional[List[Dict]]
+    filter_index: Optional[FilterIndex] = None
+    version: int = 0
+
+EMPTY_SNAPSHOT = IndexSnapshot(index=None, bm25=None, facts=[], metadata=None)
+
+def tokenize(text: str) -> List[str]:
+    return text.lower().split()
+
+def tokenize_corpus(facts: List[str], mask: np.ndarray) -> List[List[str]]:
+    # Non-searchable rows keep an empty document so BM25 positions stay equal to fact ids
+    return [tokenize(f) if keep else [] for f, keep in zip(facts, mask)]
+
 class VectorDB:
     """Enhanced FAISS vector database with metadata support"""
     
     def __init__(self):
         self.embedding_model = None
         self.embedding_dim = None
-        self.index = None
-        self.bm25 = None
-        self.facts = []
-        self.metadata = []
+        self._snapshot = EMPTY_SNAPSHOT
+        self._write_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._tokenized_corpus: Optional[List[List[str]]] = None  # Kept for BM25 rebuilds on append
         self.index_path = VECTOR_INDEX_PATH
         self.bm25_path = BM25_INDEX_PATH
+        self.serving_mode = INDEX_SERVING_MODE
+        self.remote = INFERENCE_MODE == "server"  # Embed on the model server instead of in-process
+        self._bundle: Optional[str] = None
+        self._bundle_checked_at = 0.0
+    
+    # Read-only views of the current snapshot
+    @property
+    def snapshot(self) -> IndexSnapshot:
+        return self._get_snapshot()
+    
+    @property
+    def index(self):
+        return self._snapshot.index
+    
+    @property
+    def bm25(self):
+        return self._snapshot.bm25
+    
+    @property
+    def facts(self) -> Sequence[str]:
+        return self._snapshot.facts
+    
+    @property
+    def metadata(self) -> Optional[List[Dict]]:
+        return self._snapshot.metadata
+    
+    def _get_snapshot(self) -> IndexSnapshot:
+        """Current snapshot, loading from disk on first use"""
+        if self._snapshot.index is None:
+            with self._load_lock:
+                if self._snapshot.index is None:
+                    self.load()
+        elif self.serving_mode == "shared" and time.time() - self._bundle_checked_at > SHARED_INDEX_CHECK_SECONDS:
+            self._refresh_shared()
+        return self._snapshot
     
     def _initialize_model(self):
         """Lazy load embedding model"""
-        if self.embedding_model is None:
+        if self.embedding_model is None and not self.remote:
+            # Imported lazily so server-mode API processes never load torch
+            from sentence_transformers import SentenceTransformer
             logger.info(f"Loading embedding model: {EMBEDDING_MODEL}")
             self.embedding_model = SentenceTransformer(EMBEDDING_MODEL)
             self.embedding_dim = self.embedding_model.get_sentence_embedding_dimension()
@@ -38,6 +111,10 @@ class VectorDB:
     
     def load(self):
         """Load FAISS index and facts from disk"""
+        if self.serving_mode == "shared":
+            self._attach_shared()
+            return
+        
         if not self.index_path.exists():
             raise FileNotFoundError(
                 f"Vector index not found at {self.index_path}. "
@@ -47,117 +124,388 @@ class VectorDB:
         self._initialize_model()
         
         try:
-            self.index = faiss.read_index(str(self.index_path))
+            index = faiss.read_index(str(self.index_path))
+            self.embedding_dim = self.embedding_dim or index.d
             
-            # Load facts and metadata
-            df = pd.read_csv(FACTS_CSV_PATH)
-            self.facts = df["statement"].tolist()
-            self.metadata = df.to_dict('records') if len(df.columns) > 1 else None
+            # Load facts and metadata; list position == fact_id == FAISS id
+            metadata = fact_store.all()
+            facts = [record['statement'] for record in metadata]
+            if metadata and metadata[-1]['fact_id'] != len(metadata) - 1:
+                raise ValueError("Fact ids are not contiguous. Please rebuild database.")
             
             try:
                 with open(self.bm25_path, 'rb') as f:
-                    self.bm25 = pickle.load(f)
+                    bm25 = pickle.load(f)
                 logger.info("BM25 index loaded.")
             except FileNotFoundError:
-                logger.warning("BM25 index not found. Please rebuild database.")
-                self.bm25 = None
-                
-            logger.info(f"VectorDB loaded: {len(self.facts)} facts indexed")
+                logger.warning("BM25 index not found.")
+                bm25 = None
+            
+            # BM25 has one document per indexed row and FAISS one vector per
+            # canonical row among them; anything else means ids no longer line up
+            indexed = bm25.corpus_size if bm25 is not None else None
+            searchable = int(searchable_mask(metadata[:indexed], indexed).sum()) if indexed is not None else None
+            if indexed is None or indexed > len(facts) or index.ntotal != searchable:
+                logger.warning(
+                    f"Indexes do not match the fact store ({index.ntotal} vectors, "
+                    f"{indexed} BM25 documents, {len(facts)} facts); rebuilding"
+                )
+                self.build_and_save(facts, metadata=metadata)
+                return
+            
+            self._tokenized_corpus = None
+            self._snapshot = IndexSnapshot(
+                index=index, bm25=bm25, facts=facts[:indexed], metadata=metadata[:indexed],
+                filter_index=FilterIndex.from_metadata(metadata[:indexed], indexed)
+            )
+            logger.info(f"VectorDB loaded: {indexed} facts indexed")
+            
+            # Rows stored after the indexes were last written (e.g. a crash mid-ingest)
+            if indexed < len(facts):
+                logger.warning(f"Indexing {len(facts) - indexed} stored facts missing from the index")
+                # Imported here: core.ingest imports this module
+                from core.ingest import IngestPipeline
+                IngestPipeline(db=self).index_stored(metadata[indexed:])
             
         except Exception as e:
             logger.error(f"Error loading vector DB: {e}")
             raise
     
+    def _attach_shared(self, name: Optional[str] = None):
+        """Map the current read-only bundle; nothing is copied into this process"""
+        name = name or current_bundle()
+        if name is None:
+            raise FileNotFoundError(
+                "No shared index bundle found. Build the index with EXPORT_SHARED_INDEX=true "
+                "or run 'python -m core.shared_index' first."
+            )
+        self._initialize_model()
+        bundle = load_bundle(name)
+        self.embedding_dim = self.embedding_dim or bundle['index'].d
+        self._snapshot = IndexSnapshot(metadata=None, **bundle)
+        self._bundle = name
+        self._bundle_checked_at = time.time()
+        logger.info(f"Attached to shared index bundle {name}: {len(bundle['facts'])} facts")
+    
+    def _refresh_shared(self):
+        """Re-attach when a writer has published a newer bundle"""
+        with self._load_lock:
+            if time.time() - self._bundle_checked_at <= SHARED_INDEX_CHECK_SECONDS:
+                return
+            self._bundle_checked_at = time.time()
+            name = current_bundle()
+            if name and name != self._bundle:
+                try:
+                    self._attach_shared(name)
+                except Exception as e:
+                    # A bundle pruned between the pointer read and the attach; retry next interval
+                    logger.error(f"Failed to attach shared index bundle {name}: {e}")
+    
     def build_and_save(self, facts: List[str], metadata: Optional[List[Dict]] = None):
         """Build FAISS index from facts and save to disk"""
         self._initialize_model()
         
-        logger.info(f"Building index for {len(facts)} facts...")
+        filter_index = FilterIndex.from_metadata(metadata, len(facts))
+        mask = filter_index.searchable
+        ids = np.flatnonzero(mask)
+        logger.info(f"Building index for {len(ids)} facts ({len(facts) - len(ids)} near-duplicates skipped)...")
         
         # Generate embeddings with progress
-        fact_embeddings = self.embedding_model.encode(
-            facts,
-            convert_to_numpy=True,
-            show_progress_bar=True,
-            batch_size=32
-        )
+        fact_embeddings = self.encode_facts([facts[i] for i in ids], show_progress_bar=True)
+        self.embedding_dim = fact_embeddings.shape[1]
         
         # Create FAISS index
-        self.index = faiss.IndexFlatL2(self.embedding_dim)
-        self.index = faiss.IndexIDMap(self.index)
+        index = faiss.IndexFlatL2(self.embedding_dim)
+        index = faiss.IndexIDMap(index)
         
         # Add vectors with IDs
-        ids = np.arange(len(facts))
-        self.index.add_with_ids(fact_embeddings.astype('float32'), ids)
+        index.add_with_ids(fact_embeddings.astype('float32'), ids)
         
-        # Save index
-        DATA_DIR.mkdir(parents=True, exist_ok=True)
-        faiss.write_index(self.index, str(self.index_path))
-        
-        # Build and Save BM25 Index
+        # Build BM25 Index
         logger.info("Building BM25 index...")
-        tokenized_facts = [f.lower().split() for f in facts]
-        self.bm25 = BM25Okapi(tokenized_facts)
-        with open(self.bm25_path, 'wb') as f:
-            pickle.dump(self.bm25, f)
+        tokenized_facts = tokenize_corpus(facts, mask)
+        bm25 = BM25Okapi(tokenized_facts)
         
-        self.facts = facts
-        self.metadata = metadata
+        self._tokenized_corpus = tokenized_facts
+        self._snapshot = IndexSnapshot(
+            index=index, bm25=bm25, facts=list(facts), metadata=metadata, filter_index=filter_index
+        )
+        self.save()
         
         logger.info(f"✓ Index built and saved to {self.index_path}")
         logger.info(f"  - Total facts: {len(facts)}")
         logger.info(f"  - Dimension: {self.embedding_dim}")
-        logger.info(f"  - Index type: {type(self.index).__name__}")
+        logger.info(f"  - Index type: {type(index).__name__}")
     
-    def search(
+    def save(self, snapshot: Optional[IndexSnapshot] = None):
+        """Write the FAISS and BM25 indexes atomically (temp file + rename)"""
+        snapshot = snapshot or self._snapshot
+        if self.serving_mode == "shared":
+            raise RuntimeError("Shared index bundles are read-only; save from a private-mode writer.")
+        DATA_DIR.mkdir(parents=True, exist_ok=True)
+        
+        tmp_index = self.index_path.with_name(self.index_path.name + '.tmp')
+        faiss.write_index(snapshot.index, str(tmp_index))
+        os.replace(tmp_index, self.index_path)
+        
+        if snapshot.bm25 is not None:
+            tmp_bm25 = self.bm25_path.with_name(self.bm25_path.name + '.tmp')
+            with open(tmp_bm25, 'wb') as f:
+                pickle.dump(snapshot.bm25, f)
+            os.replace(tmp_bm25, self.bm25_path)
+        
+        if EXPORT_SHARED_INDEX:
+            export_bundle(snapshot)
+    
+    def encode_facts(
+        self,
+        facts: List[str],
+        batch_size: int = 32,
+        show_progress_bar: bool = False
+    ) -> np.ndarray:
+        """Embed texts in batches, in-process or on the model server"""
+        if self.remote:
+            return inference_client.embed(facts)
+        self._initialize_model()
+        return self.embedding_model.encode(
+            facts,
+            convert_to_numpy=True,
+            show_progress_bar=show_progress_bar,
+            batch_size=batch_size
+        ).astype('float32')
+    
+    def append(
+        self,
+        facts: List[str],
+        metadata: Optional[List[Dict]] = None,
+        embeddings: Optional[np.ndarray] = None
+    ) -> IndexSnapshot:
+        """
+        Add facts to the live index without blocking readers: the current
+        index is cloned, extended and swapped in as a new snapshot.
+        embeddings, when given, has one row per fact (near-duplicates included).
+        Returns: the snapshot that now serves searches
+        """
+        if not facts:
+            return self._get_snapshot()
+        if self.serving_mode == "shared":
+            raise RuntimeError("Shared index bundles are read-only; append from a private-mode writer.")
+        mask = searchable_mask(metadata, len(facts))
+        if embeddings is None:
+            embeddings = np.zeros((len(facts), self._get_snapshot().index.d), dtype='float32')
+            if mask.any():
+                embeddings[mask] = self.encode_facts([f for f, keep in zip(facts, mask) if keep])
+        
+        with self._write_lock:
+            current = self._get_snapshot()
+            start_id = len(current.facts)
+            
+            index = faiss.clone_index(current.index)
+            if mask.any():
+                index.add_with_ids(embeddings[mask], start_id + np.flatnonzero(mask))
+            
+            # BM25Okapi has no incremental update; rebuild from the kept token lists
+            if self._tokenized_corpus is None:
+                self._tokenized_corpus = tokenize_corpus(current.facts, current.filter_index.searchable)
+            tokenized = self._tokenized_corpus + tokenize_corpus(facts, mask)
+            bm25 = BM25Okapi(tokenized)
+            
+            added_metadata = metadata or [{'statement': f} for f in facts]
+            new_metadata = None
+            if current.metadata is not None:
+                new_metadata = current.metadata + added_metadata
+            
+            snapshot = IndexSnapshot(
+                index=index,
+                bm25=bm25,
+                facts=current.facts + list(facts),
+                metadata=new_metadata,
+                filter_index=current.filter_index.extend(added_metadata),
+                version=current.version + 1
+            )
+            self._tokenized_corpus = tokenized
+            self._snapshot = snapshot
+        
+        logger.info(f"Appended {len(facts)} facts to live index (version {snapshot.version}, {len(snapshot.facts)} total)")
+        return snapshot
+    
+    def _filter_mask(self, snapshot: IndexSnapshot, filters: Optional[FactFilter]) -> Optional[np.ndarray]:
+        """Bool array over fact ids allowed by the filter, or None when unfiltered"""
+        if filters is None or filters.is_empty():
+            return None
+        with tracer.span("filter") as span:
+            mask = snapshot.filter_index.mask(filters)
+            if span is not None:
+                span.set_attribute("allowed", int(mask.sum()))
+        return mask
+    
+    def embed_query(self, query: str) -> np.ndarray:
+        """Embedding of one query, from the embedding cache when it was seen before"""
+        with tracer.span("embed") as span:
+            query_embedding = embedding_cache.get(query)
+            if span:
+                span.set_attribute("cached", query_embedding is not None)
+            if query_embedding is None:
+                query_embedding = self.encode_facts([query])[0]
+                embedding_cache.set(query, query_embedding)
+        return query_embedding
+    
+    def faiss_search_ids(
         self,
         query: str,
         k: int = TOP_K_RETRIEVE,
-    ) -> List[str]:
+        snapshot: Optional[IndexSnapshot] = None,
+        filters: Optional[FactFilter] = None,
+        mask: Optional[np.ndarray] = None,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> List[int]:
         """
-        Hybrid Search: Retrieve top K from FAISS and top K from BM25.
-        Returns: A unique list of retrieved facts.
+        Dense retrieval: fact ids of the k nearest embeddings (within the filter).
+        query_embedding skips encoding when the caller already has the vector.
         """
-        if self.index is None:
-            self.load()
-            
-        k = min(k, len(self.facts))
-        retrieved_facts = set()
+        snapshot = snapshot or self._get_snapshot()
+        if mask is None:
+            mask = self._filter_mask(snapshot, filters)
         
-        # 1. FAISS Search
-        query_embedding = self.embedding_model.encode([query])
-        distances, indices = self.index.search(
-            query_embedding.astype('float32'), k
-        )
+        params = None
+        k = min(k, len(snapshot.facts))
+        if mask is not None:
+            # The selector skips disallowed ids inside the scan, so no top-k is lost to post-filtering
+            k = min(k, int(mask.sum()))
+            if k == 0:
+                return []
+            bitmap = np.packbits(mask, bitorder='little')
+            params = faiss.SearchParameters(sel=faiss.IDSelectorBitmap(len(mask), faiss.swig_ptr(bitmap)))
         
-        for i in indices[0]:
-            if i != -1:
-                retrieved_facts.add(self.facts[i])
+        if query_embedding is None:
+            query_embedding = self.embed_query(query)
+        with tracer.span("faiss", k=k):
+            distances, indices = snapshot.index.search(
+                np.asarray(query_embedding, dtype='float32').reshape(1, -1), k, params=params
+            )
+        return [int(i) for i in indices[0] if i != -1]
+    
+    def bm25_search_ids(
+        self,
+        query: str,
+        k: int = TOP_K_RETRIEVE,
+        snapshot: Optional[IndexSnapshot] = None,
+        filters: Optional[FactFilter] = None,
+        mask: Optional[np.ndarray] = None
+    ) -> List[int]:
+        """Sparse retrieval: fact ids of the k best BM25 matches (within the filter)"""
+        snapshot = snapshot or self._get_snapshot()
+        if snapshot.bm25 is None:
+            return []
+        if mask is None:
+            mask = self._filter_mask(snapshot, filters)
         
-        # 2. BM25 Search
-        if self.bm25 is not None:
-            tokenized_query = query.lower().split()
-            bm25_scores = self.bm25.get_scores(tokenized_query)
+        k = min(k, len(snapshot.facts))
+        with tracer.span("bm25", k=k):
+            tokenized_query = tokenize(query)
+            if mask is None:
+                doc_ids = None
+                bm25_scores = snapshot.bm25.get_scores(tokenized_query)
+            else:
+                # Score only the allowed documents
+                doc_ids = np.flatnonzero(mask)
+                if len(doc_ids) == 0:
+                    return []
+                bm25_scores = np.asarray(snapshot.bm25.get_batch_scores(tokenized_query, doc_ids.tolist()))
             top_bm25_indices = bm25_scores.argsort()[::-1][:k]
-            
-            for i in top_bm25_indices:
-                if bm25_scores[i] > 0: # Only if it actually matched
-                    retrieved_facts.add(self.facts[i])
+        
+        # Only keep documents that actually matched
+        top = [i for i in top_bm25_indices if bm25_scores[i] > 0]
+        return [int(doc_ids[i]) if doc_ids is not None else int(i) for i in top]
+    
+    def search_ids(
+        self,
+        query: str,
+        k: int = TOP_K_RETRIEVE,
+        snapshot: Optional[IndexSnapshot] = None,
+        filters: Optional[FactFilter] = None,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> List[int]:
+        """
+        Hybrid Search: top K from FAISS and top K from BM25.
+        Returns: unique fact ids, FAISS hits first
+        """
+        # Both retrievers read the same snapshot even if an append lands mid-query
+        snapshot = snapshot or self._get_snapshot()
+        mask = self._filter_mask(snapshot, filters)
+        
+        # 1. FAISS Search
+        fact_ids = self.faiss_search_ids(query, k, snapshot, mask=mask, query_embedding=query_embedding)
+        
+        # 2. BM25 Search
+        bm25_ids = self.bm25_search_ids(query, k, snapshot, mask=mask)
+        
+        with tracer.span("fuse"):
+            seen = set(fact_ids)
+            for i in bm25_ids:
+                if i not in seen:
+                    seen.add(i)
+                    fact_ids.append(i)
+        
+        return fact_ids
+    
+    @staticmethod
+    def unique_by_text(snapshot: IndexSnapshot, fact_ids: List[int]) -> List[int]:
+        """First id per statement text; different ids (sources) can carry the same statement"""
+        seen = set()
+        unique_ids = []
+        for i in fact_ids:
+            if snapshot.facts[i] not in seen:
+                seen.add(snapshot.facts[i])
+                unique_ids.append(i)
+        return unique_ids
+    
+    def search(
+        self,
+        query: str,
+        k: int = TOP_K_RETRIEVE,
+        filters: Optional[FactFilter] = None
+    ) -> List[str]:
+        """
+        Hybrid Search: Retrieve top K from FAISS and top K from BM25.
+        filters restricts both retrievers to matching sources/categories/dates.
+        Returns: A unique list of retrieved facts.
+        """
+        snapshot = self._get_snapshot()
+        retrieved_facts = [snapshot.facts[i] for i in self.unique_by_text(snapshot, self.search_ids(query, k, snapshot, filters))]
         
         logger.info(f"Retrieved {len(retrieved_facts)} unique facts via Hybrid Search")
-        return list(retrieved_facts)
+        return retrieved_facts
+    
+    def filter_options(self) -> Dict[str, List[str]]:
+        """Distinct sources and categories available for filtering"""
+        snapshot = self._get_snapshot()
+        if snapshot.metadata is None and snapshot.filter_index is not None:
+            # Shared bundles only carry the (lowercased) bitmap keys
+            return {
+                'sources': sorted(k for k in snapshot.filter_index.by_source if k),
+                'categories': sorted(k for k in snapshot.filter_index.by_category if k),
+            }
+        metadata = snapshot.metadata or []
+        return {
+            'sources': sorted({m['source'] for m in metadata if isinstance(m.get('source'), str)}),
+            'categories': sorted({m['category'] for m in metadata if isinstance(m.get('category'), str)}),
+        }
     
     def get_stats(self) -> Dict[str, Any]:
         """Get database statistics"""
-        if self.index is None:
+        snapshot = self._snapshot
+        if snapshot.index is None:
             return {'status': 'not_loaded'}
         
         return {
             'status': 'loaded',
-            'total_facts': len(self.facts),
+            'total_facts': len(snapshot.facts),
             'embedding_dim': self.embedding_dim,
-            'index_type': type(self.index).__name__,
-            'has_metadata': self.metadata is not None
+            'index_type': type(snapshot.index).__name__,
+            'has_metadata': snapshot.metadata is not None,
+            'snapshot_version': snapshot.version,
+            'serving_mode': self.serving_mode
         }
 
 vector_db = VectorDB()
@@ -0,0 +1,216 @@
+# core/verdict_index.py
+"""
+Precomputed verdicts for restatements of the trusted facts themselves.
+
+Every searchable fact gets two keys at build time:
+  - a hash of its normalized text (case, punctuation and number formatting
+    removed, currency symbols reduced to "inr"/"usd"), for exact restatements;
+  - a hash of its number/entity signature (numbers with their currency and
+    named entities in order of appearance), for the same statement with
+    articles added or dropped.
+
+A claim resolves to "True" with the fact as evidence when its normalized
+text equals a fact's, or when it has the same signature and the same words
+in the same order once articles are removed. Prepositions are kept, so
+swapping who did what ("given by India to Sri Lanka" vs "given to India
+by Sri Lanka") never matches.
+Both checks are hash lookups plus one comparison against the cited fact,
+so they run before claim extraction and retrieval.
+
+    python -m core.verdict_index     # rebuild from the current index
+"""
+import hashlib
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from core.fact_filters import FactFilter
+from config import VERDICT_INDEX_PATH
+
+logger = logging.getLogger(__name__)
+
+# Never part of a named entity
+STOPWORDS = frozenset({
+    "a", "an", "the", "of", "in", "on", "at", "to", "for", "by", "with", "as",
+    "and", "that", "which", "it", "its", "this", "s"
+})
+
+_CURRENCY = re.compile(r'₹|\brs\b\.?|\binr\b|\$|\busd\b', re.IGNORECASE)
+
+def _tag_currency(text: str) -> str:
+    """Currency symbols as one lowercase token each, so "₹5" and "$5" never compare equal"""
+    return _CURRENCY.sub(lambda m: ' usd ' if m.group(0) in ('$', 'usd', 'USD') else ' inr ', text)
+
+def normalize_text(text: str) -> str:
+    """Normalize text for comparison"""
+    text = _tag_currency(text.lower())
+    # Remove commas
+    text = text.replace(',', '')
+    # Standardize number formats
+    text = re.sub(r'(\d+)\s*(crore|cr|crores|billion|million)', r'\1 \2', text)
+    text = re.sub(r'(\d+)\s*lakh', r'\1 lakh', text)
+    # Remove punctuation
+    text = re.sub(r'[^\w\s]', ' ', text)
+    # Normalize common entities
+    text = re.sub(r'\bireda\b', 'india renewable energy development agency', text)
+    # Remove extra spaces
+    text = ' '.join(text.split())
+    return text
+
+def signature(text: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """(numbers with their currency, entity words) in order of appearance"""
+    text = _tag_currency(text).replace(',', '')
+    numbers = tuple(' '.join(n.split()) for n in re.findall(r'(?:\b(?:inr|usd)\s+)?\d+(?:\.\d+)?', text))
+    entities = []
+    for word in re.findall(r'\b[A-Z][\w&-]*', text):
+        entities.extend(w for w in normalize_text(word).split() if w not in STOPWORDS)
+    return numbers, tuple(entities)
+
+# The only words a signature match may add or drop; prepositions carry who did what to whom
+ARTICLES = frozenset({"a", "an", "the"})
+
+def content_words(normalized: str) -> Tuple[str, ...]:
+    """Words in order, articles removed"""
+    return tuple(w for w in normalized.split() if w not in ARTICLES)
+
+def _key(text: str) -> int:
+    """Non-zero 64-bit key (0 marks rows without a key)"""
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little') or 1
+
+def _signature_key(sig: Tuple[Tuple[str, ...], Tuple[str, ...]]) -> int:
+    numbers, entities = sig
+    if not numbers and not entities:
+        return 0  # Too generic to key on
+    return _key(f"{' '.join(numbers)}|{' '.join(entities)}")
+
+@dataclass
+class PrecomputedMatch:
+    fact_id: int
+    kind: str  # "exact" or "signature"
+
+class VerdictIndex:
+    """
+    Keys persisted as arrays aligned with fact ids, so a sync only hashes
+    rows added since the last one. The lookup dicts are rebuilt from the
+    arrays on load and extended as the index grows.
+    """
+
+    def __init__(self):
+        self.path = VERDICT_INDEX_PATH
+        self.exact_keys = np.zeros(0, dtype=np.uint64)
+        self.signature_keys = np.zeros(0, dtype=np.uint64)
+        self.exact: Dict[int, int] = {}
+        self.signatures: Dict[int, List[int]] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return len(self.exact_keys)
+
+    def _load(self):
+        try:
+            if self.path.exists():
+                with np.load(self.path) as data:
+                    self.exact_keys = data['exact_keys']
+                    self.signature_keys = data['signature_keys']
+                self._index_rows(0)
+                logger.info(f"Loaded verdict index for {self.size} facts")
+        except Exception as e:
+            logger.error(f"Failed to load verdict index: {e}")
+        self._loaded = True
+
+    def save(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + '.tmp.npz')
+            np.savez(tmp_path, exact_keys=self.exact_keys, signature_keys=self.signature_keys)
+            tmp_path.replace(self.path)
+        except Exception as e:
+            logger.error(f"Failed to save verdict index: {e}")
+
+    def _index_rows(self, start: int):
+        for fact_id in range(start, self.size):
+            key = int(self.exact_keys[fact_id])
+            if key:
+                # The first copy of a statement is the one cited
+                self.exact.setdefault(key, fact_id)
+            sig_key = int(self.signature_keys[fact_id])
+            if sig_key:
+                self.signatures.setdefault(sig_key, []).append(fact_id)
+
+    def sync(self, facts: Sequence[str], searchable: Optional[np.ndarray] = None, rebuild: bool = False):
+        """Key the facts not seen yet (all of them with rebuild=True). Non-searchable rows get no keys."""
+        with self._lock:
+            if not self._loaded and not rebuild:
+                self._load()
+            self._loaded = True
+
+            known = self.size
+            if rebuild or known > len(facts):
+                # Rebuilt store: ids no longer line up with the saved keys
+                known = 0
+                self.exact_keys = self.exact_keys[:0]
+                self.signature_keys = self.signature_keys[:0]
+                self.exact, self.signatures = {}, {}
+            if known >= len(facts):
+                return
+
+            exact_keys = np.zeros(len(facts) - known, dtype=np.uint64)
+            signature_keys = np.zeros(len(facts) - known, dtype=np.uint64)
+            for offset, fact_id in enumerate(range(known, len(facts))):
+                if searchable is not None and not searchable[fact_id]:
+                    continue
+                fact = facts[fact_id]
+                exact_keys[offset] = _key(normalize_text(fact))
+                signature_keys[offset] = _signature_key(signature(fact))
+
+            self.exact_keys = np.concatenate([self.exact_keys, exact_keys])
+            self.signature_keys = np.concatenate([self.signature_keys, signature_keys])
+            self._index_rows(known)
+            logger.info(f"Verdict index: keyed {len(facts) - known} facts ({len(self.exact)} statements, {len(self.signatures)} signatures)")
+
+    def lookup(self, text: str, snapshot, filters: Optional[FactFilter] = None) -> Optional[PrecomputedMatch]:
+        """The trusted fact this text restates, if any (within the filter)"""
+        facts = snapshot.facts
+        if self.size != len(facts) or not self._loaded:
+            # Catch up with appends (or a first lookup) before answering
+            self.sync(facts, snapshot.filter_index.searchable if snapshot.filter_index else None)
+
+        allowed = None
+        if filters is not None and not filters.is_empty():
+            allowed = snapshot.filter_index.mask(filters)
+
+        # Every hit is confirmed against the fact text, so a stale key can only miss
+        normalized = normalize_text(text)
+        fact_id = self.exact.get(_key(normalized))
+        if fact_id is not None and (allowed is None or allowed[fact_id]):
+            if normalize_text(facts[fact_id]) == normalized:
+                return PrecomputedMatch(fact_id, "exact")
+
+        sig = signature(text)
+        candidates = self.signatures.get(_signature_key(sig), ())
+        if candidates:
+            words = content_words(normalized)
+            for fact_id in candidates:
+                if allowed is not None and not allowed[fact_id]:
+                    continue
+                fact = facts[fact_id]
+                if signature(fact) == sig and content_words(normalize_text(fact)) == words:
+                    return PrecomputedMatch(fact_id, "signature")
+        return None
+
+    def get_stats(self) -> Dict[str, int]:
+        return {'facts': self.size, 'statements': len(self.exact), 'signatures': len(self.signatures)}
+
+verdict_index = VerdictIndex()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    from core.vector_db import vector_db
+    snapshot = vector_db.snapshot
+    verdict_index.sync(snapshot.facts, snapshot.filter_index.searchable, rebuild=True)
+    verdict_index.save()
+    print(f"Verdict index: {verdict_index.get_stats()} -> {verdict_index.path}")
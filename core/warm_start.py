@@ -0,0 +1,152 @@
+# core/warm_start.py
+"""
+Warm restarts after the hosted app sleeps.
+
+The query cache, the query embedding cache and the most frequent recent
+claims are snapshotted every WARM_START_SNAPSHOT_SECONDS and at exit
+(a killed process loses at most one interval). On startup they are
+restored, and a background thread runs the top recent claims through
+claim extraction, embedding, retrieval and the CrossEncoder, so models
+are loaded and warm before the first real request. The LLM is never
+called during warmup.
+
+    python -m core.warm_start      # restore and warm up once, printing stats
+"""
+import atexit
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+from core.cache import query_cache, embedding_cache
+from config import (
+    RECENT_CLAIMS_PATH, RECENT_CLAIMS_MAX, WARM_START_SNAPSHOT_SECONDS,
+    WARMUP_ENABLED, WARMUP_CLAIMS
+)
+
+logger = logging.getLogger(__name__)
+
+class WarmStart:
+    """Snapshots hot state periodically and restores it (plus model warmup) on startup"""
+
+    def __init__(self):
+        self.path = RECENT_CLAIMS_PATH
+        self.recent: "OrderedDict[str, int]" = OrderedDict()  # claim -> requests, least recent first
+        self.warmed_claims = 0
+        self.warmup_seconds: Optional[float] = None
+        self._changes = 0
+        self._started = False
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def record(self, claim: str):
+        """Remember a served claim (O(1); called once per request)"""
+        with self._lock:
+            self.recent[claim] = self.recent.get(claim, 0) + 1
+            self.recent.move_to_end(claim)
+            while len(self.recent) > RECENT_CLAIMS_MAX:
+                self.recent.popitem(last=False)
+            self._changes += 1
+
+    def top_claims(self, n: int) -> List[str]:
+        """Most requested recent claims, most recent first among equals"""
+        with self._lock:
+            ordered = list(reversed(self.recent.items()))
+        return [claim for claim, _ in sorted(ordered, key=lambda item: -item[1])[:n]]
+
+    def snapshot(self):
+        """Persist the query cache, embedding cache and recent claims"""
+        with self._lock:
+            recent = list(self.recent.items())
+            self._changes = 0
+        query_cache.save_to_disk()
+        embedding_cache.save_to_disk()
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + '.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(recent, f)
+            tmp_path.replace(self.path)
+        except Exception as e:
+            logger.error(f"Failed to save recent claims: {e}")
+
+    def restore(self):
+        """Reload the snapshot (the query cache loads itself on import)"""
+        embedding_cache.load_from_disk()
+        try:
+            if self.path.exists():
+                with open(self.path) as f:
+                    saved = json.load(f)
+                with self._lock:
+                    restored = OrderedDict((claim, int(count)) for claim, count in saved[-RECENT_CLAIMS_MAX:])
+                    for claim, count in self.recent.items():
+                        restored[claim] = restored.pop(claim, 0) + count
+                    self.recent = restored
+                logger.info(f"Restored {len(saved)} recent claims from {self.path}")
+        except Exception as e:
+            logger.error(f"Failed to load recent claims: {e}")
+
+    def warmup(self, n: int = WARMUP_CLAIMS):
+        """Run the top recent claims through every model except the LLM"""
+        # Imported here so restoring caches never loads models
+        from core.claim_extractor import claim_extractor
+        from core.vector_db import vector_db
+        from core.re_ranker import re_ranker
+
+        start = time.perf_counter()
+        claims = self.top_claims(n)
+        for raw_text in claims:
+            if self._stop.is_set():
+                break
+            try:
+                # Stage 1-2 of the pipeline: extract, embed + retrieve, rerank
+                claim = claim_extractor.extract(raw_text)
+                snapshot = vector_db.snapshot
+                candidate_ids = vector_db.search_ids(claim, snapshot=snapshot)
+                re_ranker.score(claim, [snapshot.facts[i] for i in candidate_ids])
+                self.warmed_claims += 1
+            except Exception as e:
+                logger.warning(f"Warmup failed for '{raw_text[:60]}': {e}")
+        self.warmup_seconds = time.perf_counter() - start
+        logger.info(f"Warmup: ran {self.warmed_claims}/{len(claims)} recent claims in {self.warmup_seconds:.2f}s")
+
+    def _run(self):
+        while not self._stop.wait(WARM_START_SNAPSHOT_SECONDS):
+            if self._changes:
+                self.snapshot()
+
+    def start(self, warmup: bool = WARMUP_ENABLED):
+        """Restore, start periodic snapshots and (optionally) warm up in the background. Idempotent."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        self.restore()
+        threading.Thread(target=self._run, name="warm-start-snapshot", daemon=True).start()
+        atexit.register(self.stop)
+        if warmup:
+            threading.Thread(target=self.warmup, name="warm-start-warmup", daemon=True).start()
+
+    def stop(self):
+        """Stop periodic snapshots and write a final one"""
+        if self._started and not self._stop.is_set():
+            self._stop.set()
+            self.snapshot()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'recent_claims': len(self.recent),
+            'warmed_claims': self.warmed_claims,
+            'warmup_seconds': round(self.warmup_seconds, 3) if self.warmup_seconds is not None else None,
+            'query_cache': query_cache.get_stats(),
+            'embedding_cache': embedding_cache.get_stats(),
+        }
+
+warm_start = WarmStart()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    warm_start.restore()
+    warm_start.warmup()
+    print(warm_start.get_stats())
@@ -3,6 +3,7 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from core.metrics import metrics_collector
+from core.analytics_store import analytics_store
 from core.cache import query_cache
 from datetime import datetime, timedelta
 
@@ -12,8 +13,21 @@ st.set_page_config(page_title="Analytics Dashboard", layout="wide")
 
 st.title("Fact Checker Analytics")
 
-# Get metrics
-stats = metrics_collector.get_summary()
+# Time range, answered from the pre-aggregated rollups
+RANGES = {
+    "Last hour": timedelta(hours=1),
+    "Last 24 hours": timedelta(days=1),
+    "Last 7 days": timedelta(days=7),
+    "Last 30 days": timedelta(days=30),
+    "Last 90 days": timedelta(days=90),
+    "Last 365 days": timedelta(days=365),
+}
+range_label = st.selectbox("Time range", list(RANGES.keys()), index=1)
+range_end = datetime.now()
+range_start = range_end - RANGES[range_label]
+start_ts, end_ts = int(range_start.timestamp()), int(range_end.timestamp()) + 1
+
+stats = analytics_store.summary(start_ts, end_ts)
 cache_stats = query_cache.get_stats()
 
 if stats.get('total_queries', 0) == 0:
@@ -33,8 +47,36 @@ with col3:
 with col4:
     st.metric("Cache Hit Rate", f"{stats.get('cache_hit_rate', 0)*100:.1f}%")
 
+# Tail latency from the rollup histograms (no history rescan)
+col5, col6, col7 = st.columns(3)
+with col5:
+    st.metric("p50 Response Time", f"{stats.get('p50_total_time', 0):.2f}s")
+with col6:
+    st.metric("p95 Response Time", f"{stats.get('p95_total_time', 0):.2f}s")
+with col7:
+    st.metric("p99 Response Time", f"{stats.get('p99_total_time', 0):.2f}s")
+
 st.divider()
 
+# Per-stage latency percentiles
+st.subheader("Stage Latency Percentiles")
+percentiles = analytics_store.stage_percentiles(start_ts, end_ts)
+if percentiles:
+    stage_df = pd.DataFrame([
+        {'stage': stage, 'percentile': p, 'ms': values[p] * 1000}
+        for stage, values in percentiles.items()
+        for p in ('p50', 'p95', 'p99')
+    ])
+    fig_stages = px.bar(
+        stage_df,
+        x='stage',
+        y='ms',
+        color='percentile',
+        barmode='group',
+        title='Latency by Stage (ms)'
+    )
+    st.plotly_chart(fig_stages, use_container_width=True)
+
 # Verdict Distribution
 st.subheader("Verdict Distribution")
 dist = stats.get('verdict_distribution', {})
@@ -50,24 +92,39 @@ st.plotly_chart(fig_pie, use_container_width=True)
 # Performance over time
 st.subheader("Performance Trends")
 
-if len(metrics_collector.metrics) > 0:
-    df = pd.DataFrame([vars(m) for m in metrics_collector.metrics[-100:]])
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
+series = analytics_store.timeseries(start_ts, end_ts)
+if series:
+    ts_df = pd.DataFrame(series)
+    # Bucket starts are epoch seconds; show them in the server's local time, like the metric timestamps
+    ts_df['time'] = pd.to_datetime([datetime.fromtimestamp(t) for t in ts_df['bucket_start']])
     
     fig_time = px.line(
-        df,
-        x='timestamp',
-        y='total_time',
-        title='Response Time Over Last 100 Queries'
+        ts_df,
+        x='time',
+        y=['avg_total_time', 'p95_total_time'],
+        title=f"Response Time per {stats['granularity'].title()} (s)"
     )
     st.plotly_chart(fig_time, use_container_width=True)
     
+    fig_mix = px.bar(
+        ts_df,
+        x='time',
+        y=['True', 'False', 'Unverifiable'],
+        title=f"Verdict Mix per {stats['granularity'].title()}",
+        color_discrete_sequence=['#00cc00', '#cc0000', '#ffcc00']
+    )
+    st.plotly_chart(fig_mix, use_container_width=True)
+
+recent_metrics = metrics_collector.recent(100)
+if len(recent_metrics) > 0:
+    df = pd.DataFrame([vars(m) for m in recent_metrics])
+    
     # Confidence distribution
     fig_conf = px.histogram(
         df,
         x='confidence',
         nbins=20,
-        title='Confidence Score Distribution'
+        title='Confidence Score Distribution (Last 100 Queries)'
     )
     st.plotly_chart(fig_conf, use_container_width=True)
 
@@ -1,80 +1,188 @@
 # pipeline.py
 import logging
 import time
-from typing import Dict, Any
+from typing import Dict, Any, Optional, List, Tuple
+import numpy as np
 from core.claim_extractor import claim_extractor
 from core.vector_db import vector_db
-from core.llm_service import llm_service
+from core.llm_service import llm_service, verdict_batcher, Verdict
 from core.re_ranker import re_ranker
+from core.ranking import evidence_ranker
 from core.metrics import metrics_collector, PipelineMetrics
-from config import TOP_K_RETRIEVE, TOP_K_RERANK_RESULTS
+from core.tracing import tracer
+from core.fact_filters import FactFilter
+from core.deadline import Deadline
+from core.verdict_index import verdict_index
+from core.warm_start import warm_start
+from core.profiling import profiler
+from config import (
+    TOP_K_RETRIEVE, TOP_K_RERANK_RESULTS, PIPELINE_DEADLINE_MS,
+    DEADLINE_FEWER_CANDIDATES_MS, DEADLINE_REDUCED_TOP_K, DEADLINE_SKIP_RERANK_MS,
+    VERDICT_INDEX_ENABLED, PRECOMPUTED_CONFIDENCE, WARM_START_ENABLED
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def run_fact_checking_pipeline(raw_text: str, use_cache: bool = True) -> Dict[str, Any]:
+def _precomputed_verdict(text: str, snapshot, filters: Optional[FactFilter]) -> Optional[Tuple[List[str], Verdict]]:
+    """Evidence and verdict from the verdict index when text restates a trusted fact"""
+    if not VERDICT_INDEX_ENABLED:
+        return None
+    with tracer.span("verdict-index") as span:
+        match = verdict_index.lookup(text, snapshot, filters)
+        if span:
+            span.set_attribute("hit", match.kind if match else "")
+    if match is None:
+        return None
+    fact = snapshot.facts[match.fact_id]
+    return [fact], Verdict(
+        verdict="True",
+        confidence=PRECOMPUTED_CONFIDENCE[match.kind],
+        reasoning=f"The claim restates a verified fact: '{fact[:200]}'"
+    )
+
+def run_fact_checking_pipeline(
+    raw_text: str,
+    use_cache: bool = True,
+    filters: Optional[FactFilter] = None,
+    deadline: Optional[Deadline] = None,
+    profile: Optional[str] = None,
+    bulk: bool = False
+) -> Dict[str, Any]:
     """
     Enhanced RAG pipeline with timing and metrics collection.
     
     Args:
         raw_text: Input text to fact-check
         use_cache: Whether to use cached results
+        filters: Restrict evidence to matching sources/categories/dates
+        deadline: Latency budget, started when the request arrived
+            (default: PIPELINE_DEADLINE_MS from now)
+        profile: Profile this run ("cpu" or "memory"); otherwise a
+            PROFILE_SAMPLE_RATE fraction of runs is profiled
+        bulk: Verify together with concurrent bulk runs, several claims per
+            LLM request (for batch jobs; the deadline does not bound the LLM)
     
     Returns:
         Dictionary with verification results and metadata
     """
+    mode = profiler.choose(profile)
+    if mode is None:
+        return _run_pipeline(raw_text, use_cache, filters, deadline, bulk)
+    with profiler.profile(mode, label=raw_text) as run:
+        response = _run_pipeline(raw_text, use_cache, filters, deadline, bulk)
+    if run is not None:
+        response["profile"] = run.name
+    return response
+
+def _run_pipeline(
+    raw_text: str,
+    use_cache: bool,
+    filters: Optional[FactFilter],
+    deadline: Optional[Deadline],
+    bulk: bool = False
+) -> Dict[str, Any]:
     logger.info("=" * 60)
     logger.info("Pipeline started")
     logger.info(f"Input: {raw_text[:100]}...")
-    
-    start_time = time.time()
-    cache_hit = False
+    deadline = deadline or Deadline(PIPELINE_DEADLINE_MS)
     
     try:
-        # Stage 1: Claim Extraction
-        extraction_start = time.time()
-        claim = claim_extractor.extract(raw_text)
-        extraction_time = time.time() - extraction_start
-        logger.info(f"[1/3] Claim extracted in {extraction_time:.2f}s: {claim}")
-        
-        # Stage 2: Evidence Retrieval & Re-ranking
-        retrieval_start = time.time()
-        
-        # 2a. Hybrid Search Retrieval (FAISS + BM25)
-        retrieved_docs = vector_db.search(
-            query=claim,
-            k=TOP_K_RETRIEVE
-        )
+        with tracer.trace("pipeline", input_length=len(raw_text)) as trace:
+            snapshot = vector_db.snapshot
+            
+            # Stage 0: Restatements of a trusted fact resolve before any model runs
+            precomputed = _precomputed_verdict(raw_text, snapshot, filters)
+            claim = raw_text
+            extraction_time = 0.0
+            
+            # Stage 1: Claim Extraction
+            if precomputed is None:
+                with tracer.span("extract") as span:
+                    claim = claim_extractor.extract(raw_text)
+                extraction_time = span.duration_ms / 1000
+                logger.info(f"[1/3] Claim extracted in {extraction_time:.2f}s: {claim}")
+                if claim != raw_text:
+                    precomputed = _precomputed_verdict(claim, snapshot, filters)
+            
+            if precomputed is not None:
+                evidence_items, verdict_obj = precomputed
+                evidence_scores = [1.0]
+                retrieval_time = llm_time = 0.0
+                logger.info(f"Precomputed verdict: claim restates trusted fact '{evidence_items[0][:80]}'")
+            else:
+                # Stage 2: Evidence Retrieval & Re-ranking
+                with tracer.span("retrieve") as retrieve_span:
+                    # 2a. Hybrid Search Retrieval (FAISS + BM25), all stages on one snapshot
+                    k = TOP_K_RETRIEVE
+                    if deadline.below(DEADLINE_FEWER_CANDIDATES_MS):
+                        deadline.degrade("fewer_candidates")
+                        k = DEADLINE_REDUCED_TOP_K
+                    candidate_ids = vector_db.unique_by_text(snapshot, vector_db.search_ids(
+                        claim,
+                        k=k,
+                        snapshot=snapshot,
+                        filters=filters
+                    ))
+                
+                    # 2b. CrossEncoder Re-ranking
+                    if deadline.below(DEADLINE_SKIP_RERANK_MS):
+                        deadline.degrade("skip_rerank")
+                        # Logits that fall with fused retrieval rank stand in for the CrossEncoder
+                        relevance = -np.log1p(np.arange(len(candidate_ids), dtype=np.float32))
+                    else:
+                        relevance = re_ranker.score(
+                            query=claim,
+                            documents=[snapshot.facts[i] for i in candidate_ids]
+                        )
+                
+                    # 2c. Blend in source weight and recency
+                    ranked = evidence_ranker.rank(
+                        snapshot,
+                        candidate_ids,
+                        relevance,
+                        top_k=TOP_K_RERANK_RESULTS
+                    )
+                    reranked_results = [(snapshot.facts[i], score) for i, score in ranked]
+                retrieval_time = retrieve_span.duration_ms / 1000
+            
+                # Extract evidence texts and scores
+                evidence_items = [item[0] for item in reranked_results]
+                evidence_scores = [float(item[1]) for item in reranked_results]
+            
+                logger.info(
+                    f"[2/3] Retrieved {len(evidence_items)} evidence items in {retrieval_time:.2f}s"
+                )
+                for i, (text, score) in enumerate(zip(evidence_items, evidence_scores)):
+                    logger.info(f"  {i+1}. (score: {score:.3f}) {text[:80]}...")
+            
+                # Stage 3: LLM Verification
+                with tracer.span("verdict") as verdict_span:
+                    evidence_ids = [i for i, _ in ranked]
+                    if bulk:
+                        verdict_obj = verdict_batcher.get_verdict(claim, evidence_items, evidence_ids)
+                    else:
+                        verdict_obj = llm_service.get_verdict(
+                            claim, evidence_items, deadline=deadline, evidence_ids=evidence_ids
+                        )
+                llm_time = verdict_span.duration_ms / 1000
+            
+                logger.info(f"[3/3] Verdict generated in {llm_time:.2f}s")
+                logger.info(f"  Verdict: {verdict_obj.verdict}")
+                logger.info(f"  Confidence: {verdict_obj.confidence:.2f}")
+                if verdict_obj.prompt_tokens:
+                    logger.info(
+                        f"  Tokens: {verdict_obj.prompt_tokens} prompt, "
+                        f"{verdict_obj.completion_tokens} completion"
+                    )
         
-        # 2b. CrossEncoder Re-ranking
-        reranked_results = re_ranker.rerank(
-            query=claim,
-            documents=retrieved_docs,
-            top_k=TOP_K_RERANK_RESULTS
+        # The root span closes when the trace block exits
+        timings_ms = trace.timings_ms()
+        total_time = timings_ms["pipeline"] / 1000
+        cache_hit = any(
+            span.name == "cache.lookup" and span.attributes.get("hit")
+            for span in trace.spans
         )
-        retrieval_time = time.time() - retrieval_start
-        
-        # Extract evidence texts and scores
-        evidence_items = [item[0] for item in reranked_results]
-        evidence_scores = [float(item[1]) for item in reranked_results]
-        
-        logger.info(
-            f"[2/3] Retrieved {len(evidence_items)} evidence items in {retrieval_time:.2f}s"
-        )
-        for i, (text, score) in enumerate(zip(evidence_items, evidence_scores)):
-            logger.info(f"  {i+1}. (score: {score:.3f}) {text[:80]}...")
-        
-        # Stage 3: LLM Verification
-        llm_start = time.time()
-        verdict_obj = llm_service.get_verdict(claim, evidence_items)
-        llm_time = time.time() - llm_start
-        
-        logger.info(f"[3/3] Verdict generated in {llm_time:.2f}s")
-        logger.info(f"  Verdict: {verdict_obj.verdict}")
-        logger.info(f"  Confidence: {verdict_obj.confidence:.2f}")
-        
-        # Calculate total time
-        total_time = time.time() - start_time
         
         # Collect metrics
         metric = PipelineMetrics(
@@ -87,9 +195,16 @@ def run_fact_checking_pipeline(raw_text: str, use_cache: bool = True) -> Dict[st
             confidence=verdict_obj.confidence,
             num_evidence_retrieved=len(evidence_items),
             cache_hit=cache_hit,
-            input_length=len(raw_text)
+            input_length=len(raw_text),
+            prompt_tokens=verdict_obj.prompt_tokens,
+            completion_tokens=verdict_obj.completion_tokens,
+            stage_timings={name: ms / 1000 for name, ms in timings_ms.items()},
+            degradations=list(deadline.degradations)
         )
         metrics_collector.log_metric(metric)
+        if WARM_START_ENABLED:
+            # Replayed by the warmup after a restart
+            warm_start.record(raw_text)
         
         # Assemble response
         response = {
@@ -100,14 +215,19 @@ def run_fact_checking_pipeline(raw_text: str, use_cache: bool = True) -> Dict[st
             "reasoning": verdict_obj.reasoning,
             "evidence": evidence_items,
             "evidence_scores": [f"{score:.3f}" for score in evidence_scores],
+            "filters": filters.to_dict() if filters else None,
             "performance": {
                 "extraction_time": f"{extraction_time:.2f}s",
                 "retrieval_time": f"{retrieval_time:.2f}s",
                 "llm_time": f"{llm_time:.2f}s",
                 "total_time": f"{total_time:.2f}s"
-            }
+            },
+            "timings_ms": timings_ms,
+            "degradations": deadline.degradations
         }
         
+        if deadline.degradations:
+            logger.info(f"Degradations applied: {', '.join(deadline.degradations)}")
         logger.info(f"Pipeline completed in {total_time:.2f}s")
         logger.info("=" * 60)
         